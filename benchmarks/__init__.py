@@ -0,0 +1 @@
+#modulo de benchmarks
\ No newline at end of file
@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import threading
+import http.client
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.seed import seed_database, BENCH_PASSWORD, DEFAULT_VOLUMES
+
+"""
+Benchmark y prueba de carga de la API.
+Carga una base SQLite local con volúmenes configurables (benchmarks/seed.py) y ejecuta los
+escenarios login, list, by_id, create y update, reportando latencia p50/p95/p99 y throughput.
+
+Modos:
+- wsgi: peticiones con el cliente de pruebas de Flask, sin red (por defecto).
+- http: levanta la aplicación en un servidor HTTP local con hilos y envía peticiones reales.
+- --url: envía peticiones HTTP a un servidor externo ya cargado (ver --seed-only).
+
+Líneas base: --save-baseline guarda los resultados en JSON y --baseline los compara; si un escenario
+empeora más que --tolerance (p95 mayor o throughput menor) se marca como regresión y el proceso
+termina con código 1.
+
+Ejemplos:
+    python -m benchmarks.loadtest --productos 20000 --requests 500
+    python -m benchmarks.loadtest --mode http --concurrency 8 --save-baseline baseline.json
+    python -m benchmarks.loadtest --baseline baseline.json --tolerance 0.2
+    python -m benchmarks.loadtest --seed-only /tmp/bench && (cd /tmp/bench && python /ruta/main.py)
+"""
+
+SCENARIOS = ('login', 'list', 'by_id', 'create', 'update')
+
+# -------------------- CLIENTES --------------------
+class WSGIClient:
+    """
+    Cliente sobre el test client de Flask (una instancia por hilo).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+class HTTPClient:
+    """
+    Cliente HTTP real con una conexión persistente por hilo.
+    """
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        payload = json.dumps(body) if body is not None else None
+        all_headers = {'Content-Type': 'application/json', **(headers or {})}
+        try:
+            conn.request(method, path, body=payload, headers=all_headers)
+            response = conn.getresponse()
+            raw = response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            raise
+        if response.getheader('Connection', '').lower() == 'close':
+            conn.close()
+        data = json.loads(raw) if raw and response.getheader('Content-Type', '').startswith('application/json') else None
+        return response.status, data
+
+# -------------------- ESCENARIOS --------------------
+class Scenarios:
+    """
+    Peticiones de cada escenario. `i` es el número de petición, usado para variar los datos.
+    """
+
+    def __init__(self, client, volumes: dict, token: str, seed: int = 7):
+        self.client = client
+        self.volumes = volumes
+        self.auth = {'Authorization': f'Bearer {token}'}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _randint(self, low: int, high: int) -> int:
+        with self._lock:
+            return self._rng.randint(low, high)
+
+    def login(self, i):
+        username = f"user{i % self.volumes['users']}"
+        return self.client.request('POST', '/login', {'username': username, 'password': BENCH_PASSWORD})[0]
+
+    def list(self, i):
+        after = self._randint(0, max(self.volumes['productos'] - 50, 0))
+        return self.client.request('GET', f'/productos?limit=50&after={after}', headers=self.auth)[0]
+
+    def by_id(self, i):
+        return self.client.request('GET', f"/productos/{self._randint(1, self.volumes['productos'])}")[0]
+
+    def create(self, i):
+        body = {
+            'nombre_producto': f'Bench {i}', 'precio': 19.99, 'stock': 10,
+            'id_categoria': self._randint(1, self.volumes['categorias']),
+            'id_descuento': 1, 'id_iva': 1, 'id_proveedor': self._randint(1, self.volumes['proveedores'])
+        }
+        return self.client.request('POST', '/productos', body)[0]
+
+    def update(self, i):
+        producto_id = self._randint(1, self.volumes['productos'])
+        return self.client.request('PUT', f'/productos/{producto_id}', {'stock': i % 500})[0]
+
+# -------------------- MEDICIÓN --------------------
+def percentile(sorted_values, p: float) -> float:
+    """
+    Percentil por rango más cercano sobre una lista ya ordenada.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def run_scenario(fn, requests: int, concurrency: int, warmup: int) -> dict:
+    """
+    Ejecuta `requests` peticiones del escenario con `concurrency` hilos y retorna sus estadísticas.
+    """
+    for i in range(warmup):
+        fn(i)
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(indexes):
+        nonlocal errors
+        local, failed = [], 0
+        for i in indexes:
+            start = time.perf_counter()
+            try:
+                status = fn(i)
+            except Exception:
+                status = None
+            local.append(time.perf_counter() - start)
+            if status is None or status >= 400:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    shares = [range(w, requests, concurrency) for w in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, shares))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'rps': round(requests / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """
+    Retorna la lista de regresiones: escenarios con p95 mayor o throughput menor que la línea base
+    en más de `tolerance` (fracción).
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']} ms > línea base {base['p95_ms']} ms")
+        if current['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']} req/s < línea base {base['rps']} req/s")
+    return regressions
+
+def print_report(results: dict, meta: dict):
+    print(f"Modo: {meta['mode']}  concurrencia: {meta['concurrency']}  volúmenes: {meta['volumes']}")
+    print(f"{'escenario':<10}{'n':>7}{'errores':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['requests']:>7}{r['errors']:>9}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['rps']:>10.1f}")
+
+# -------------------- PREPARACIÓN --------------------
+def prepare_database(directory: str, volumes: dict):
+    """
+    Carga la base SQLite que usará la aplicación (products_local.db dentro de `directory`).
+    """
+    from sqlalchemy import create_engine
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'products_local.db')}")
+    volumes = seed_database(engine, volumes)
+    engine.dispose()
+    return volumes
+
+def load_app(directory: str):
+    """
+    Importa la aplicación con la base SQLite de `directory` (config.database usa una ruta relativa).
+    """
+    os.environ['MYSQL_URI'] = ''  # Forzar SQLite aunque exista un .env con MySQL
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.chdir(directory)
+    import main
+    return main.app
+
+def start_http_server(app):
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark y prueba de carga de la API')
+    parser.add_argument('--mode', choices=('wsgi', 'http'), default='wsgi')
+    parser.add_argument('--url', help='Servidor externo ya cargado (implica modo http sin carga de datos)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones por escenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--categorias', type=int)
+    parser.add_argument('--proveedores', type=int)
+    parser.add_argument('--productos', type=int)
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--db-dir', help='Directorio de la base de benchmark (por defecto uno temporal)')
+    parser.add_argument('--seed-only', metavar='DIR', help='Solo cargar la base en DIR y terminar')
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--baseline', metavar='PATH')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    volumes = {**DEFAULT_VOLUMES, **{k: getattr(args, k) for k in DEFAULT_VOLUMES if getattr(args, k) is not None}}
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(unknown)}")
+
+    if args.seed_only:
+        os.makedirs(args.seed_only, exist_ok=True)
+        print(f"Base cargada en {args.seed_only}: {prepare_database(args.seed_only, volumes)}")
+        return 0
+
+    server = None
+    if args.url:
+        mode, client = 'http', HTTPClient(args.url)
+    else:
+        directory = args.db_dir or tempfile.mkdtemp(prefix='api-bench-')
+        prepare_database(directory, volumes)
+        app = load_app(directory)
+        mode = args.mode
+        if mode == 'http':
+            server, url = start_http_server(app)
+            client = HTTPClient(url)
+        else:
+            client = WSGIClient(app)
+
+    status, data = client.request('POST', '/login', {'username': 'user0', 'password': BENCH_PASSWORD})
+    if status != 200:
+        print(f"No se pudo iniciar sesión con user0 (HTTP {status})")
+        return 2
+    runner = Scenarios(client, volumes, data['access_token'])
+
+    results = {}
+    for name in scenarios:
+        results[name] = run_scenario(getattr(runner, name), args.requests, args.concurrency, args.warmup)
+    if server is not None:
+        server.shutdown()
+
+    meta = {'mode': mode, 'concurrency': args.concurrency, 'requests': args.requests, 'volumes': volumes}
+    print_report(results, meta)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"Línea base guardada en {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        differing = [k for k in ('mode', 'concurrency', 'volumes') if baseline.get('meta', {}).get(k) != meta[k]]
+        if differing:
+            print(f"Aviso: la línea base se midió con otro {', '.join(differing)}; la comparación no es equivalente")
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESIÓN {line}")
+        if regressions:
+            return 1
+        print(f"Sin regresiones respecto a {args.baseline} (tolerancia {args.tolerance:.0%})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
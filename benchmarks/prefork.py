@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadtest import HTTPClient, Scenarios, run_scenario, prepare_database, BENCH_PASSWORD, DEFAULT_VOLUMES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Benchmark del despliegue prefork (gunicorn -c gunicorn.conf.py wsgi:app).
+Para cada número de workers levanta gunicorn sobre una base SQLite cargada, mide el throughput de
+los escenarios de lectura (benchmarks/loadtest.py) y la memoria de los workers leída de
+/proc/<pid>/smaps_rollup: RSS, PSS y fracción compartida. Se compara con y sin preload_app.
+Requiere gunicorn (pip install gunicorn) y Linux.
+
+Uso:
+    python -m benchmarks.prefork --workers 1,2,4 --requests 2000
+"""
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _children(pid: int) -> list:
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+def _smaps(pid: int) -> dict:
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values
+
+def worker_memory(master_pid: int) -> dict:
+    """
+    Memoria media por worker en MiB: RSS, PSS y fracción de la RSS compartida con otros procesos.
+    Los procesos del pool de hashing (hijos de los workers) no se cuentan.
+    """
+    stats = [_smaps(pid) for pid in _children(master_pid)]
+    rss = sum(s['Rss'] for s in stats) / len(stats)
+    pss = sum(s['Pss'] for s in stats) / len(stats)
+    shared = sum(s['Shared_Clean'] + s['Shared_Dirty'] for s in stats) / len(stats)
+    return {'rss_mib': rss / 1024, 'pss_mib': pss / 1024, 'shared': shared / rss if rss else 0.0}
+
+def start_server(directory: str, workers: int, threads: int, preload: bool):
+    port = _free_port()
+    env = {**os.environ, 'MYSQL_URI': '', 'LOG_LEVEL': 'WARNING', 'WEB_WORKERS': str(workers),
+           'WEB_THREADS': str(threads), 'WEB_PRELOAD': str(preload).lower(), 'WEB_BIND': f'127.0.0.1:{port}'}
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+         '--chdir', directory, '--pythonpath', ROOT, 'wsgi:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = HTTPClient(f'http://127.0.0.1:{port}')
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if client.request('GET', '/productos/1')[0] == 200 and len(_children(process.pid)) >= workers:
+                return process, client
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn no respondió a tiempo')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput y memoria compartida del despliegue prefork')
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--productos', type=int, default=DEFAULT_VOLUMES['productos'])
+    args = parser.parse_args(argv)
+
+    worker_counts = [int(n) for n in args.workers.split(',')]
+    volumes = {**DEFAULT_VOLUMES, 'productos': args.productos}
+    configs = [(n, True) for n in worker_counts] + [(max(worker_counts), False)]
+    with tempfile.TemporaryDirectory() as tmp:
+        prepare_database(tmp, volumes)
+        print(f"{args.threads} hilos por worker, {args.requests} peticiones por escenario, CPUs: {os.cpu_count()}")
+        print(f"{'workers':>8}{'preload':>9}{'by_id req/s':>13}{'list req/s':>12}{'RSS MiB':>10}{'PSS MiB':>10}{'compartida':>12}")
+        for workers, preload in configs:
+            process, client = start_server(tmp, workers, args.threads, preload)
+            try:
+                token = client.request('POST', '/login', {'username': 'user0', 'password': BENCH_PASSWORD})[1]['access_token']
+                runner = Scenarios(client, volumes, token)
+                concurrency = workers * args.threads
+                by_id = run_scenario(runner.by_id, args.requests, concurrency, warmup=20)
+                listing = run_scenario(runner.list, args.requests, concurrency, warmup=20)
+                memory = worker_memory(process.pid)
+            finally:
+                process.terminate()
+                process.wait()
+            print(f"{workers:>8}{'sí' if preload else 'no':>9}{by_id['rps']:>13.1f}{listing['rps']:>12.1f}"
+                  f"{memory['rss_mib']:>10.1f}{memory['pss_mib']:>10.1f}{memory['shared']:>12.0%}")
+
+if __name__ == '__main__':
+    main()
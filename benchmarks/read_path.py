@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.db import Base
+from models.product_model import Producto
+from repositories.product_repository import ProductoRepository
+from controllers.serializers import serialize_many
+
+"""
+Microbenchmark de la lectura de productos: instancias ORM rastreadas por la sesión frente a la
+lectura de solo lectura (select() de Core que retorna filas) que usan los GET.
+Mide la consulta y la serialización a diccionarios de la respuesta sobre una base SQLite temporal.
+
+Uso:
+    python -m benchmarks.read_path --rows 20000 --repeat 5
+"""
+
+def seed(engine, rows: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Producto.__table__), [
+            {'nombre_producto': f'Producto {i}', 'Precio': f'{10 + i % 500}.50', 'Stock': i % 100,
+             'id_categoria': 1 + i % 20, 'id_descuento': None, 'id_iva': None, 'id_proveedor': None}
+            for i in range(rows)
+        ])
+
+def orm_read(session):
+    return serialize_many(Producto, session.query(Producto).all())
+
+def row_read(session):
+    return serialize_many(Producto, ProductoRepository(session).get_all_productos())
+
+def measure(factory, fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat + 1):
+        session = factory()
+        start = time.perf_counter()
+        fn(session)
+        timings.append(time.perf_counter() - start)
+        session.close()
+    return min(timings[1:])  # La primera ejecución calienta cachés de compilación
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ORM frente a filas de solo lectura en la lectura de productos')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, args.rows)
+        factory = sessionmaker(bind=engine)
+        orm = measure(factory, orm_read, args.repeat)
+        rows = measure(factory, row_read, args.repeat)
+        engine.dispose()
+
+    print(f"{args.rows} productos (mejor de {args.repeat} ejecuciones)")
+    print(f"  ORM (session.query(Producto)):   {orm * 1000:8.1f} ms")
+    print(f"  Solo lectura (select() + Row):  {rows * 1000:8.1f} ms")
+    print(f"  Mejora: x{orm / rows:.2f}")
+
+if __name__ == '__main__':
+    main()
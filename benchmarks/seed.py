@@ -0,0 +1,61 @@
+import random
+import logging
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from models.db import Base
+from models.product_model import Categoria, Proveedor, Descuento, Impuesto, Producto
+from models.user_model import User
+from repositories.search_index import create_search_schema
+from repositories.versioning import install_version_tracking
+logger = logging.getLogger(__name__)
+
+"""
+Carga de datos para los benchmarks: crea las tablas y las llena con volúmenes configurables.
+Todos los usuarios comparten la contraseña BENCH_PASSWORD; el hash se calcula una sola vez.
+"""
+
+BENCH_PASSWORD = 'bench-password'
+DEFAULT_VOLUMES = {'categorias': 20, 'proveedores': 50, 'productos': 10000, 'users': 100}
+INSERT_BATCH_SIZE = 5000
+
+def _insert(conn, model, rows):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        conn.execute(insert(model.__table__), rows[start:start + INSERT_BATCH_SIZE])
+
+def seed_database(engine, volumes: dict = None, seed: int = 42):
+    """
+    Llena la base de `engine` con `volumes` ({'categorias', 'proveedores', 'productos', 'users'}).
+    Retorna los volúmenes usados.
+    """
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    rng = random.Random(seed)
+    Base.metadata.create_all(engine)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    with engine.begin() as conn:
+        _insert(conn, Categoria, [{'nombre_categoria': f'Categoría {i}'} for i in range(volumes['categorias'])])
+        _insert(conn, Proveedor, [
+            {'nombre': f'Proveedor {i}', 'telefono': f'555-{i:04d}', 'email': f'proveedor{i}@example.com', 'direccion': f'Calle {i}'}
+            for i in range(volumes['proveedores'])
+        ])
+        _insert(conn, Descuento, [{'nombre': f'Descuento {p}%', 'porcentaje': p} for p in (0, 5, 10, 15)])
+        _insert(conn, Impuesto, [{'nombre': f'IVA {p}%', 'porcentaje': p} for p in (0, 5, 19)])
+        _insert(conn, Producto, [
+            {
+                'nombre_producto': f'Producto {i}',
+                'Precio': f'{rng.randint(1, 5000)}.{rng.randint(0, 99):02d}',
+                'Stock': rng.randint(0, 500),
+                'id_categoria': rng.randint(1, volumes['categorias']),
+                'id_descuento': rng.randint(1, 4),
+                'id_iva': rng.randint(1, 3),
+                'id_proveedor': rng.randint(1, volumes['proveedores']),
+            } for i in range(volumes['productos'])
+        ])
+        _insert(conn, User, [
+            {'username': f'user{i}', 'password': password_hash, 'email': f'user{i}@example.com', 'full_name': f'Usuario {i}'}
+            for i in range(volumes['users'])
+        ])
+    # Índice de búsqueda con los productos cargados y filas de versión, como tras migrate
+    create_search_schema(engine)
+    install_version_tracking(engine)
+    logger.info("Base de benchmark cargada: %s", volumes)
+    return volumes
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.db import Base
+from models.product_model import Producto
+from config.sqlite_profile import create_sqlite_engines
+
+"""
+Benchmark de lecturas y escrituras concurrentes sobre SQLite.
+Compara el engine por defecto (journal de rollback, un único pool para todo) con el perfil de
+config/sqlite_profile.py (WAL, pragmas, un escritor y un pool de lectores). Cada hilo lector
+consulta productos por id y cada hilo escritor actualiza el stock, una transacción por operación.
+
+Uso:
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --seconds 5
+"""
+
+def seed(engine, rows: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Producto.__table__), [
+            {'nombre_producto': f'Producto {i}', 'Precio': f'{10 + i % 500}.50', 'Stock': i % 100, 'id_categoria': 1}
+            for i in range(rows)
+        ])
+
+def run(writer, reader, rows: int, readers: int, writers: int, seconds: float) -> dict:
+    """
+    Ejecuta los hilos lectores y escritores durante `seconds` y retorna operaciones y errores.
+    """
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def read_loop(seed_value):
+        rng, done, failed = random.Random(seed_value), 0, 0
+        while not stop.is_set():
+            try:
+                with reader.connect() as conn:
+                    conn.execute(select(Producto.__table__).where(Producto.id_producto == rng.randint(1, rows))).first()
+                done += 1
+            except OperationalError:
+                failed += 1
+        with lock:
+            counts['reads'] += done
+            counts['errors'] += failed
+
+    def write_loop(seed_value):
+        rng, done, failed = random.Random(seed_value), 0, 0
+        while not stop.is_set():
+            try:
+                with writer.begin() as conn:
+                    conn.execute(update(Producto.__table__)
+                                 .where(Producto.id_producto == rng.randint(1, rows))
+                                 .values(Stock=rng.randint(0, 500)))
+                done += 1
+            except OperationalError:
+                failed += 1
+        with lock:
+            counts['writes'] += done
+            counts['errors'] += failed
+
+    threads = [threading.Thread(target=read_loop, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=write_loop, args=(1000 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lecturas y escrituras concurrentes en SQLite: por defecto frente al perfil WAL')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'default.db')}"
+        engine = create_engine(uri, pool_size=args.readers + args.writers)
+        seed(engine, args.rows)
+        results['por defecto (journal de rollback)'] = run(engine, engine, args.rows, args.readers, args.writers, args.seconds)
+        engine.dispose()
+
+        uri = f"sqlite:///{os.path.join(tmp, 'wal.db')}"
+        writer, reader = create_sqlite_engines(uri, pool_size=args.readers, max_overflow=0)
+        seed(writer, args.rows)
+        results['perfil (WAL, 1 escritor + lectores)'] = run(writer, reader, args.rows, args.readers, args.writers, args.seconds)
+        writer.dispose()
+        reader.dispose()
+
+    print(f"{args.readers} lectores y {args.writers} escritores durante {args.seconds:g} s ({args.rows} productos)")
+    for name, counts in results.items():
+        print(f"  {name:<38}{counts['reads'] / args.seconds:10.0f} lecturas/s {counts['writes'] / args.seconds:8.0f} escrituras/s"
+              f" {counts['errors']:6d} errores")
+
+if __name__ == '__main__':
+    main()
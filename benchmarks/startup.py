@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Benchmark del arranque de un proceso de la aplicación. El tiempo de arranque es imports + create_app
+(app.config['STARTUP_SECONDS']['boot']), que es lo que espera un worker nuevo; se reporta con su
+desglose y con el total de `import main` visto desde fuera (incluye la carga de los módulos de
+Python del propio hijo). Cada ejecución usa un intérprete nuevo, como el arranque de un worker.
+
+La mayor parte del arranque es importar Flask y SQLAlchemy, que los modelos y las rutas necesitan
+desde el primer momento. El benchmark mide aparte, en hijos que importan antes esas dependencias,
+el arranque propio de la aplicación (módulos del repositorio + create_app) y falla (código de
+salida 1) si su mínimo supera --budget-ms.
+Los hijos usan una caché de bytecode temporal ya compilada (con PYTHONDONTWRITEBYTECODE cada
+arranque volvería a compilar los módulos modificados, cosa que un worker en producción no hace).
+
+Uso:
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --budget-ms 60
+    python -m benchmarks.startup --mysql-uri mysql+pymysql://u:p@10.255.255.1/db  # MySQL inalcanzable
+"""
+
+CHILD = (
+    "import sys, time, json; start = time.perf_counter(); {preload}deps = time.perf_counter() - start; "
+    "start = time.perf_counter(); sys.path.insert(0, {root!r}); import main; "
+    "print(json.dumps({{'total': time.perf_counter() - start, 'deps': deps, **main.app.config['STARTUP_SECONDS']}}))"
+)
+
+# Dependencias que se importan de todas formas al arrancar: el piso del tiempo de arranque
+DEPENDENCIES = "import flask, flask_jwt_extended, sqlalchemy.orm, dotenv; "
+
+def run_once(directory: str, env: dict, preload: bool = False) -> dict:
+    code = CHILD.format(root=ROOT, preload=DEPENDENCIES if preload else '')
+    output = subprocess.run([sys.executable, '-c', code], cwd=directory, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de un proceso de la aplicación')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--mysql-uri', default='', help='MYSQL_URI del proceso (por defecto SQLite local)')
+    parser.add_argument('--budget-ms', type=float, default=60,
+                        help='Máximo para el arranque propio de la aplicación, con las dependencias ya importadas')
+    args = parser.parse_args(argv)
+
+    env = {**os.environ, 'MYSQL_URI': args.mysql_uri, 'LOG_LEVEL': 'WARNING'}
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as pycache:
+        env['PYTHONPYCACHEPREFIX'] = pycache
+        run_once(tmp, env)  # Compila el bytecode; no se mide
+        runs, own_runs = [], []
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            runs.append(run_once(tmp, env))
+            own_runs.append(run_once(tmp, env, preload=True))
+        elapsed = time.perf_counter() - start
+        created = sorted(os.listdir(tmp))
+
+    print(f"{args.runs} arranques ({elapsed:.1f} s en total, archivos creados: {created or 'ninguno'})")
+    for key, label in (('boot', 'arranque'), ('import', '  imports'), ('create_app', '  create_app'),
+                       ('total', 'import main')):
+        values = [r[key] * 1000 for r in runs]
+        print(f"  {label:<14} mediana {statistics.median(values):8.1f} ms   mínimo {min(values):8.1f} ms")
+    for key, label in (('deps', 'dependencias'), ('boot', 'propio')):
+        values = [r[key] * 1000 for r in own_runs]
+        print(f"  {label:<14} mediana {statistics.median(values):8.1f} ms   mínimo {min(values):8.1f} ms")
+
+    # Mínimo: el arranque sin interferencias de otros procesos, más estable que la mediana
+    own = min(r['boot'] * 1000 for r in own_runs)
+    print(f"Arranque propio de la aplicación: {own:.1f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    if own > args.budget_ms:
+        print("Presupuesto de arranque excedido", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
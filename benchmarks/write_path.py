@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.db import Base
+from models.product_model import Producto
+from repositories.writes import insert_row, update_row
+
+"""
+Microbenchmark de las escrituras de productos: el patrón ORM anterior (add + commit + refresh y
+SELECT previo + UPDATE + refresh) frente a las escrituras en una sola sentencia con RETURNING de
+repositories/writes.py. Reporta el tiempo por operación y las sentencias SQL enviadas.
+
+Uso:
+    python -m benchmarks.write_path --ops 2000
+"""
+
+VALUES = {'nombre_producto': 'Bench', 'Precio': '19.99', 'Stock': 10, 'id_categoria': 1,
+          'id_descuento': None, 'id_iva': None, 'id_proveedor': None}
+
+def seed(engine, rows: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Producto.__table__), [{**VALUES, 'nombre_producto': f'Producto {i}'} for i in range(rows)])
+
+def orm_create(session, i):
+    producto = Producto(**{**VALUES, 'nombre_producto': f'ORM {i}'})
+    session.add(producto)
+    session.commit()
+    session.refresh(producto)
+    return producto.id_producto
+
+def returning_create(session, i):
+    producto = insert_row(session, Producto, {**VALUES, 'nombre_producto': f'RET {i}'})
+    session.commit()
+    return producto.id_producto
+
+def orm_update(session, i):
+    producto = session.query(Producto).filter(Producto.id_producto == 1 + i % 1000).first()
+    producto.Stock = i % 500
+    session.commit()
+    session.refresh(producto)
+    return producto.Stock
+
+def returning_update(session, i):
+    producto = update_row(session, Producto, Producto.id_producto, 1 + i % 1000, {'Stock': i % 500})
+    session.commit()
+    return producto.Stock
+
+def measure(engine, fn, ops: int):
+    """
+    Ejecuta `ops` operaciones (cada una en su sesión, como una petición) y retorna
+    (ms por operación, sentencias por operación).
+    """
+    factory = sessionmaker(bind=engine)
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    for i in range(ops):
+        session = factory()
+        fn(session, i)
+        session.close()
+    elapsed = time.perf_counter() - start
+    event.remove(engine, 'before_cursor_execute', count)
+    return elapsed / ops * 1000, statements / ops
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ORM frente a RETURNING en las escrituras de productos')
+    parser.add_argument('--ops', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, 1000)
+        results = {
+            'create ORM (add + refresh)': measure(engine, orm_create, args.ops),
+            'create RETURNING': measure(engine, returning_create, args.ops),
+            'update ORM (select + refresh)': measure(engine, orm_update, args.ops),
+            'update RETURNING': measure(engine, returning_update, args.ops),
+        }
+        engine.dispose()
+
+    print(f"{args.ops} operaciones por caso (SQLite, una sesión por operación)")
+    for name, (ms, statements) in results.items():
+        print(f"  {name:<32}{ms:8.3f} ms/op {statements:6.1f} sentencias/op")
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,14 @@
 import os
 import logging
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import OperationalError
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from flask import has_app_context
+from flask.globals import app_ctx
+from sqlalchemy import create_engine, make_url, TextClause
+from sqlalchemy.orm import Session as OrmSession, sessionmaker, scoped_session
 from models.product_model import Base
 from dotenv import load_dotenv
-logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # Cargar variables de entorno desde .env
 load_dotenv()
@@ -13,30 +16,313 @@ load_dotenv()
 MYSQL_URI = os.getenv('MYSQL_URI')
 SQLITE_URI = 'sqlite:///products_local.db'
 
-def get_engine():
+# Configuración del pool de conexiones (ajustable por variables de entorno)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))  # Conexiones persistentes en el pool
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))  # Conexiones extra permitidas en picos
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # Segundos antes de reciclar una conexión
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # Segundos de espera por una conexión libre
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'  # Verificar conexión antes de usarla
+# Registrar cada sentencia SQL; para verlas sin duplicar handlers usar LOG_LEVELS=sqlalchemy.engine=INFO
+DB_ECHO = os.getenv('DB_ECHO', 'false').lower() == 'true'
+# Réplicas de lectura del primario MYSQL_URI, separadas por comas
+MYSQL_REPLICA_URIS = [uri.strip() for uri in os.getenv('MYSQL_REPLICA_URIS', '').split(',') if uri.strip()]
+REPLICA_STRATEGY = os.getenv('REPLICA_STRATEGY', 'round_robin')  # round_robin | least_connections
+REPLICA_HEALTH_INTERVAL = float(os.getenv('REPLICA_HEALTH_INTERVAL', '5'))  # Segundos entre chequeos de salud
+# Segundos máximos de espera por la prueba de conexión a MySQL antes de usar SQLite
+DB_CONNECT_TIMEOUT = float(os.getenv('DB_CONNECT_TIMEOUT', '3'))
+
+"""
+Los engines se crean de forma perezosa: importar este módulo no abre conexiones.
+start_connectivity_check() lanza en segundo plano la prueba de conexión a MySQL (lo hace create_app)
+y el primer uso de un engine espera su resultado como máximo DB_CONNECT_TIMEOUT segundos.
+El esquema no se crea al arrancar: se crea con migrate() (comando `flask --app main migrate`).
+"""
+
+def get_pool_options():
+    """
+    Retorna los parámetros del pool de conexiones para create_engine.
+    """
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+
+_engine_lock = threading.RLock()
+_engines = None  # (engine principal, engine de lectura, réplicas) una vez creados
+_mysql_probe = None  # (engine de MySQL, Future con el resultado de la prueba de conexión)
+_engine_callbacks = []
+
+def _create_mysql_engine():
+    connect_args = {}
+    if make_url(MYSQL_URI).get_backend_name() == 'mysql':
+        connect_args['connect_timeout'] = max(int(DB_CONNECT_TIMEOUT), 1)
+    return create_engine(MYSQL_URI, echo=DB_ECHO, connect_args=connect_args, **get_pool_options())
+
+def start_connectivity_check():
     """
-    Intenta crear una conexión con MySQL. Si falla, usa SQLite local.
+    Lanza en segundo plano la prueba de conexión a MYSQL_URI, sin bloquear el arranque.
+    Retorna (engine, Future con True/False), o None si MYSQL_URI no está definido.
+    """
+    global _mysql_probe
+    if not MYSQL_URI:
+        return None
+    with _engine_lock:
+        if _mysql_probe is None:
+            result = Future()
+            try:
+                engine = _create_mysql_engine()
+            except Exception as e:
+                # URL inválida o driver no instalado: se usa SQLite igual que con MySQL inalcanzable
+                logger.warning('MYSQL_URI no utilizable: %s', e)
+                engine = None
+                result.set_result(False)
+
+            def probe():
+                try:
+                    with engine.connect():
+                        pass
+                    result.set_result(True)
+                except Exception as e:
+                    # Cualquier error, no solo los del driver, debe resolver el Future y quedar registrado
+                    logger.warning('No se pudo conectar a MySQL: %s', getattr(e, 'orig', None) or e)
+                    result.set_result(False)
+
+            if engine is not None:
+                threading.Thread(target=probe, name='mysql-probe', daemon=True).start()
+            _mysql_probe = (engine, result)
+        return _mysql_probe
+
+def _create_engines():
+    """
+    Usa MySQL si la prueba de conexión responde a tiempo; si no, SQLite local.
+    Retorna (engine principal, engine de lectura). Con MySQL ambos son el mismo engine; con SQLite
+    el principal es el escritor de una sola conexión y el de lectura un pool de conexiones
+    query_only (ver config/sqlite_profile.py).
     """
     if MYSQL_URI:
+        engine, result = start_connectivity_check()
         try:
-            engine = create_engine(MYSQL_URI, echo=True)
-            # Probar conexión
-            conn = engine.connect()
-            conn.close()
-            logging.info('Conexión a MySQL exitosa.')
-            return engine
-        except OperationalError:
-            logging.warning('No se pudo conectar a MySQL. Usando SQLite local.')
+            connected = result.result(timeout=DB_CONNECT_TIMEOUT)
+        except FutureTimeoutError:
+            logger.warning('MySQL no respondió en %s s.', DB_CONNECT_TIMEOUT)
+            connected = False
+        if connected:
+            logger.info('Conexión a MySQL exitosa.')
+            return engine, engine
+        logger.warning('Usando SQLite local.')
     # Fallback a SQLite
-    engine = create_engine(SQLITE_URI, echo=True)
-    return engine
+    from config.sqlite_profile import create_sqlite_engines
+    return create_sqlite_engines(SQLITE_URI, echo=DB_ECHO, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                                 pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE)
+
+def init_engines():
+    """
+    Crea los engines en el primer uso y retorna (engine principal, engine de lectura, réplicas).
+    """
+    global _engines
+    if _engines is not None:
+        return _engines
+    with _engine_lock:
+        if _engines is None:
+            engine, read_engine = _create_engines()
+            replicas = get_replica_set(engine, read_engine)
+            SessionFactory.configure(bind=engine, read_bind=read_engine, replicas=replicas)
+            _engines = (engine, read_engine, replicas)
+            logger.info('Base de datos usada: %s', engine.url)
+            for callback in _engine_callbacks:
+                callback(get_engine_pools())
+    return _engines
+
+def on_engines_created(callback):
+    """
+    Registra `callback(pools)` para cuando se creen los engines (ver get_engine_pools).
+    Si ya existen se invoca de inmediato.
+    """
+    with _engine_lock:
+        _engine_callbacks.append(callback)
+        if _engines is not None:
+            callback(get_engine_pools())
+
+def dispose_engines(close: bool = True):
+    """
+    Descarta las conexiones de los pools de todos los engines creados; se abren de nuevo al usarse.
+    En un proceso hijo tras un fork usar close=False: las conexiones heredadas pertenecen al padre
+    y solo se olvidan, sin cerrarlas.
+    """
+    if _engines is None:
+        return
+    for engine in get_engine_pools().values():
+        engine.dispose(close=close)
+
+def get_engine():
+    """
+    Retorna el engine principal (escrituras), creándolo si es necesario.
+    """
+    return init_engines()[0]
+
+def __getattr__(name):
+    # Compatibilidad con `from config.database import engine`: se resuelve de forma perezosa
+    if name in ('engine', 'read_engine', 'replicas'):
+        return init_engines()[('engine', 'read_engine', 'replicas').index(name)]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_replica_set(primary, read_engine):
+    """
+    Crea el conjunto de réplicas de MYSQL_REPLICA_URIS, o retorna None si no hay réplicas.
+    Las réplicas se ignoran si se usa el fallback a SQLite: no replican esa base.
+    """
+    if not MYSQL_REPLICA_URIS:
+        return None
+    if read_engine is not primary:
+        logger.warning('MYSQL_REPLICA_URIS ignorado: se usa SQLite local en lugar de MYSQL_URI.')
+        return None
+    engines = {
+        f'replica-{i}': create_engine(uri, echo=DB_ECHO, **get_pool_options())
+        for i, uri in enumerate(MYSQL_REPLICA_URIS)
+    }
+    logger.info('Réplicas de lectura: %s (%s)', len(engines), REPLICA_STRATEGY)
+    from config.replicas import ReplicaSet
+    return ReplicaSet(engines, strategy=REPLICA_STRATEGY, health_interval=REPLICA_HEALTH_INTERVAL)
+
+def is_read_statement(clause) -> bool:
+    """
+    Indica si la sentencia solo lee: un SELECT sin FOR UPDATE o un texto SQL que empieza por SELECT.
+    """
+    if clause is None:
+        return False
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].lower() == 'select'
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+class RoutingSession(OrmSession):
+    """
+    Sesión que envía las lecturas al engine de lectura (`read_bind`) o a una réplica (`replicas`)
+    y las escrituras al principal.
+    Tras la primera escritura todas las sentencias van al principal hasta el commit o rollback,
+    para que la transacción lea sus propias escrituras. Con réplicas, que pueden ir retrasadas,
+    la sesión se queda en el principal hasta cerrarse (el resto de la petición).
+    Cada sesión usa una sola réplica, elegida en su primera lectura.
+    """
+
+    def __init__(self, *args, read_bind=None, replicas=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_bind = read_bind
+        self.replicas = replicas
+        self._writing = False
+        self._wrote = False
+        self._replica = None
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if self.replicas is None and (self.read_bind is None or self.read_bind is primary):
+            return primary
+        if self._flushing or (clause is not None and not is_read_statement(clause)):
+            self._writing = self._wrote = True
+        if self._writing or clause is None:
+            return primary
+        if self.replicas is None:
+            return self.read_bind
+        if self._wrote:
+            return primary
+        if self._replica is None:
+            self._replica = self.replicas.choose() or primary
+        return self._replica
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._writing = False
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._writing = False
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._writing = self._wrote = False
+            self._replica = None
+
+def _session_scope():
+    """
+    Identifica el ámbito de la sesión: el contexto de aplicación de Flask activo
+    (una petición) o, fuera de Flask, el hilo actual.
+    """
+    if has_app_context():
+        return id(app_ctx._get_current_object())
+    return threading.get_ident()
+
+# Los binds se configuran en init_engines()
+SessionFactory = sessionmaker(class_=RoutingSession)
 
-engine = get_engine()
-Session = sessionmaker(bind=engine)
-Base.metadata.create_all(engine)
+def _new_session():
+    init_engines()
+    return SessionFactory()
+
+# Sesión con ámbito por petición: cada contexto de Flask obtiene su propia sesión
+Session = scoped_session(_new_session, scopefunc=_session_scope)
+
+def ensure_indexes(bind):
+    """
+    Crea los índices declarados en los modelos que falten en tablas ya existentes.
+    create_all no modifica tablas existentes, por lo que los índices nuevos se crean aquí.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+def migrate():
+    """
+    Crea las tablas e índices que falten, incluidas la estructura de texto completo de la búsqueda
+    y las filas de versión de los recursos.
+    Se ejecuta una vez por despliegue (`flask --app main migrate` o `python main.py migrate`),
+    no en cada arranque de la aplicación.
+    """
+    import models.user_model  # Registrar todos los modelos en Base.metadata
+    from repositories.search_index import create_search_schema
+    from repositories.versioning import install_version_tracking
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    ensure_indexes(engine)
+    create_search_schema(engine)
+    install_version_tracking(engine)
+    logger.info('Esquema actualizado en %s', engine.url)
+
+def get_engine_pools() -> dict:
+    """
+    Retorna los engines en uso por nombre (para las métricas del pool).
+    """
+    engine, read_engine, replicas = init_engines()
+    pools = {'primary': engine}
+    if read_engine is not engine:
+        pools['read'] = read_engine
+    if replicas is not None:
+        pools.update(replicas.engines)
+    return pools
 
 def get_db_session():
     """
-    Retorna una nueva sesión de base de datos para ser utilizada en los servicios o controladores.
+    Retorna la sesión de base de datos asociada a la petición actual.
+    Dentro de una misma petición siempre se obtiene la misma sesión; al finalizar
+    la petición se cierra y su conexión vuelve al pool (ver register_session_teardown).
     """
     return Session()
+
+def remove_db_session(exception=None):
+    """
+    Cierra la sesión de la petición actual y devuelve su conexión al pool.
+    """
+    Session.remove()
+
+def register_session_teardown(app):
+    """
+    Registra el cierre automático de la sesión al terminar cada contexto de aplicación.
+    """
+    app.teardown_appcontext(remove_db_session)
@@ -0,0 +1,144 @@
+import os
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+# Cargar variables de entorno desde .env (este módulo se importa antes que config.database)
+load_dotenv()
+
+"""
+Configuración central de logging.
+Los módulos solo crean su logger (logging.getLogger(__name__)) y registran mensajes con formato
+diferido (logger.info("... %s", valor)); la configuración se aplica una sola vez al arrancar.
+
+- Los registros se encolan (DeferredQueueHandler) y un hilo aparte (QueueListener) los formatea y
+  escribe, de modo que la petición no espera por la E/S del log. En el hilo de la petición solo se
+  combinan el mensaje y sus argumentos; la fecha, el JSON y la traza de excepciones se formatean
+  en el hilo escritor.
+- Los mensajes INFO/DEBUG de las capas del camino caliente (controladores, servicios, repositorios)
+  pueden muestrearse; WARNING y superiores siempre se registran.
+
+Variables de entorno:
+- LOG_LEVEL: nivel raíz (por defecto INFO).
+- LOG_LEVELS: niveles por módulo, ej. 'repositories=WARNING,sqlalchemy.engine=INFO'.
+- LOG_FORMAT: text|json (por defecto text).
+- LOG_SAMPLE_RATE: fracción (0-1) de los INFO/DEBUG del camino caliente que se registran (por defecto 1).
+- LOG_SAMPLED_LOGGERS: prefijos de logger sujetos al muestreo (por defecto controllers,services,repositories).
+"""
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1'))
+LOG_SAMPLED_LOGGERS = tuple(p.strip() for p in os.getenv('LOG_SAMPLED_LOGGERS', 'controllers,services,repositories').split(',') if p.strip())
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+class JsonFormatter(logging.Formatter):
+    """
+    Una línea JSON por registro: timestamp, nivel, logger, mensaje y traza si la hay.
+    """
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción de los registros por debajo de WARNING de los loggers indicados.
+    """
+
+    def __init__(self, rate: float, prefixes=()):
+        super().__init__()
+        self.rate = rate
+        self.prefixes = tuple(prefixes)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        if not record.name.startswith(self.prefixes):
+            return True
+        return random.random() < self.rate
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que encola el registro sin formatearlo. QueueHandler.prepare aplica el formato
+    completo en el hilo que registra; aquí solo se resuelven los argumentos del mensaje (los objetos
+    pueden cambiar o quedar desligados de su sesión antes de que el hilo escritor los lea).
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def parse_levels(spec: str) -> dict:
+    """
+    Convierte 'modulo=NIVEL,otro=NIVEL' en un diccionario {modulo: NIVEL}.
+    """
+    levels = {}
+    for item in spec.split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+_listener = None
+_handler = None
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, levels: str = LOG_LEVELS,
+                      sample_rate: float = LOG_SAMPLE_RATE):
+    """
+    Configura el logger raíz con un QueueHandler y arranca el hilo que escribe los registros.
+    Llamadas posteriores no tienen efecto.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    handler = _handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(sample_rate, LOG_SAMPLED_LOGGERS))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+def restart_after_fork():
+    """
+    Arranca el hilo escritor en un proceso hijo (servidor prefork): los hilos no sobreviven al fork
+    y sin él los registros quedarían en la cola. Usa una cola nueva con los mismos handlers de salida.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
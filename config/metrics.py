@@ -0,0 +1,425 @@
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import request, Response
+from sqlalchemy import event
+logger = logging.getLogger(__name__)
+
+"""
+Métricas de rendimiento por petición.
+- Middleware de Flask: latencia por ruta, consultas SQL y tiempo de base de datos por petición.
+- Eventos de SQLAlchemy sobre el engine: duración de cada consulta y espera por una conexión del pool.
+- GET /metrics expone los acumulados en formato de texto de Prometheus.
+- Cada respuesta incluye un encabezado Server-Timing con los totales de la petición (db, pool, app).
+
+Los histogramas usan buckets fijos y un lock por serie, por lo que el coste por petición es de
+unas pocas sumas; está pensado para dejarse activo en producción.
+
+Los acumulados viven en la memoria de cada proceso. Con varios workers (gunicorn -c gunicorn.conf.py)
+se usa el modo multiproceso: cada worker escribe sus histogramas cada METRICS_FLUSH_INTERVAL
+segundos en METRICS_MULTIPROC_DIR/<pid>.json y /metrics responde con la suma de todos los workers,
+sea cual sea el que atiende la petición. Cuando un worker termina, el maestro suma su archivo a
+dead.json (mark_process_dead, hook child_exit), de modo que los contadores nunca retroceden.
+El gauge db_pool_checked_out se reporta por worker, con la etiqueta `pid`.
+
+Las respuestas en streaming (exportación) se miden al terminar de enviarse: sus consultas cuentan
+en la petición, pero no llevan Server-Timing (los encabezados salen antes que el cuerpo).
+
+Variables de entorno:
+- METRICS_ENABLED: true|false, activa el middleware, los eventos y /metrics (por defecto true).
+- SERVER_TIMING_ENABLED: true|false, agrega el encabezado Server-Timing (por defecto true).
+- METRICS_MULTIPROC_DIR: directorio compartido por los workers; activa el modo multiproceso
+  (gunicorn.conf.py crea uno temporal si no se indica). Debe estar vacío al arrancar el servidor.
+- METRICS_FLUSH_INTERVAL: segundos entre escrituras del archivo de cada worker (por defecto 1).
+"""
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '1'))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """
+    Histograma acumulativo con buckets fijos (semántica de Prometheus).
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # El último es +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def state(self):
+        """
+        Retorna (conteos por bucket, suma, total).
+        """
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+def _samples(buckets, counts, total, count):
+    cumulative = 0
+    for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+        cumulative += bucket_count
+        yield ('+Inf' if bound == float('inf') else repr(float(bound))), cumulative
+    yield 'sum', total
+    yield 'count', count
+
+def _merge_dumps(dumps) -> list:
+    """
+    Suma varios estados de una familia (ver HistogramFamily.dump) serie a serie.
+    """
+    merged = {}
+    for dump in dumps:
+        for label_values, counts, total, count in dump:
+            entry = merged.get(tuple(label_values))
+            if entry is None:
+                merged[tuple(label_values)] = [list(counts), total, count]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+    return [[list(label_values), *entry] for label_values, entry in merged.items()]
+
+class HistogramFamily:
+    """
+    Conjunto de histogramas con el mismo nombre y distintos valores de etiquetas.
+    """
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(label_values, Histogram(self.buckets))
+        series.observe(value)
+
+    def dump(self) -> list:
+        """
+        Estado de cada serie como [valores de etiquetas, conteos por bucket, suma, total], serializable en JSON.
+        """
+        with self._lock:
+            series_items = list(self._series.items())
+        return [[list(label_values), *series.state()] for label_values, series in series_items]
+
+    def render(self, dump=None):
+        """
+        Líneas de exposición de la familia; `dump` es un estado (por ejemplo la suma de varios
+        procesos) y por defecto el del proceso actual.
+        """
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, counts, total, count in sorted(self.dump() if dump is None else dump):
+            base = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            for key, value in _samples(self.buckets, counts, total, count):
+                if key in ('sum', 'count'):
+                    labels = f"{{{base}}}" if base else ''
+                    lines.append(f"{self.name}_{key}{labels} {value}")
+                else:
+                    labels = f'{{{base + "," if base else ""}le="{key}"}}'
+                    lines.append(f"{self.name}_bucket{labels} {value}")
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class RequestStats:
+    """
+    Totales de la petición en curso, acumulados por los eventos del engine.
+    """
+    __slots__ = ('queries', 'db_time', 'pool_wait')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+
+# Estadísticas de la petición actual (None fuera de una petición)
+_request_stats = ContextVar('request_stats', default=None)
+
+REQUEST_LATENCY = HistogramFamily('http_request_duration_seconds', 'Latencia de las peticiones HTTP por ruta.',
+                                  ('method', 'route', 'status'))
+REQUEST_DB_TIME = HistogramFamily('http_request_db_seconds', 'Tiempo total en consultas SQL por petición.',
+                                  ('method', 'route'))
+REQUEST_QUERIES = HistogramFamily('http_request_db_queries', 'Consultas SQL ejecutadas por petición.',
+                                  ('method', 'route'), buckets=QUERY_COUNT_BUCKETS)
+QUERY_DURATION = HistogramFamily('db_query_duration_seconds', 'Duración de cada consulta SQL.')
+POOL_WAIT = HistogramFamily('db_pool_checkout_wait_seconds', 'Espera por una conexión del pool.')
+FAMILIES = (REQUEST_LATENCY, REQUEST_DB_TIME, REQUEST_QUERIES, QUERY_DURATION, POOL_WAIT)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    QUERY_DURATION.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+def _handle_error(exception_context):
+    # Una consulta fallida no llega a after_cursor_execute: se descarta su marca de inicio
+    starts = exception_context.connection.info.get('query_start') if exception_context.connection is not None else None
+    if starts:
+        starts.pop()
+
+def _instrument_pool(pool):
+    """
+    Mide el tiempo que tarda pool.connect() en entregar una conexión (espera por una libre
+    o apertura de una nueva). SQLAlchemy no emite un evento al inicio del checkout.
+    """
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            elapsed = time.perf_counter() - start
+            POOL_WAIT.observe(elapsed)
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.pool_wait += elapsed
+
+    pool.connect = timed_connect
+
+def instrument_engine(engine):
+    """
+    Registra los eventos de SQLAlchemy que alimentan las métricas de base de datos.
+    """
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+    # engine.dispose() crea un pool nuevo que también debe medirse
+    event.listen(engine, 'engine_disposed', lambda e: _instrument_pool(e.pool))
+    _instrument_pool(engine.pool)
+
+def _route_label() -> str:
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def _start_request():
+    request.environ['metrics.start'] = time.perf_counter()
+    request.environ['metrics.token'] = _request_stats.set(RequestStats())
+
+def _observe_request(stats, elapsed: float, status_code: int):
+    route = _route_label()
+    REQUEST_LATENCY.observe(elapsed, request.method, route, str(status_code))
+    REQUEST_DB_TIME.observe(stats.db_time, request.method, route)
+    REQUEST_QUERIES.observe(stats.queries, request.method, route)
+
+def _finish_request(response):
+    start = request.environ.get('metrics.start')
+    stats = _request_stats.get()
+    if start is None or stats is None:
+        return response
+    if response.is_streamed:
+        # Las consultas del cuerpo aún no se ejecutaron: se mide en el teardown, al terminar el envío
+        request.environ['metrics.streamed_status'] = response.status_code
+        return response
+    elapsed = time.perf_counter() - start
+    _observe_request(stats, elapsed, response.status_code)
+    if SERVER_TIMING_ENABLED:
+        response.headers.add('Server-Timing', (
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+            f'pool;dur={stats.pool_wait * 1000:.2f}, app;dur={elapsed * 1000:.2f}'
+        ))
+    return response
+
+def _teardown_request(exception=None):
+    # Con stream_with_context el teardown corre después de enviar el cuerpo completo
+    status_code = request.environ.pop('metrics.streamed_status', None)
+    stats = _request_stats.get()
+    if status_code is not None and stats is not None:
+        _observe_request(stats, time.perf_counter() - request.environ['metrics.start'], status_code)
+    token = request.environ.pop('metrics.token', None)
+    if token is not None:
+        _request_stats.reset(token)
+
+def _as_engine_dict(engines) -> dict:
+    if engines is None:
+        return {}
+    if callable(engines):
+        engines = engines()
+    return engines if isinstance(engines, dict) else {'primary': engines}
+
+def _lazy_instrumentation(engines):
+    """
+    Retorna un before_request que instrumenta los engines en la primera petición
+    (cuando se crean de forma perezosa) y no hace nada en las siguientes.
+    """
+    lock = threading.Lock()
+    done = False
+
+    def instrument():
+        nonlocal done
+        if done:
+            return
+        with lock:
+            if not done:
+                for engine in _as_engine_dict(engines).values():
+                    instrument_engine(engine)
+                done = True
+    return instrument
+
+# -------------------- Multiproceso --------------------
+_DEAD_FILE = 'dead.json'
+
+def _process_state(engines=None) -> dict:
+    return {
+        'histograms': {family.name: family.dump() for family in FAMILIES},
+        'pools': {name: engine.pool.checkedout() for name, engine in _as_engine_dict(engines).items()
+                  if hasattr(engine.pool, 'checkedout')},
+    }
+
+def _read_json(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _write_json(path: str, data: dict):
+    # Escritura atómica: quien lee ve el archivo anterior o el nuevo, nunca uno a medias
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def write_process_metrics(directory: str = METRICS_MULTIPROC_DIR, engines=None):
+    """
+    Escribe los acumulados del proceso actual en `directory`/<pid>.json.
+    """
+    _write_json(os.path.join(directory, f"{os.getpid()}.json"), _process_state(engines))
+
+def mark_process_dead(pid: int, directory: str = METRICS_MULTIPROC_DIR):
+    """
+    Suma los histogramas de un worker terminado a dead.json y elimina su archivo: sus contadores
+    siguen contando en los totales y su gauge de pool desaparece. La llama solo el maestro (child_exit).
+    """
+    path = os.path.join(directory, f"{pid}.json")
+    state = _read_json(path)
+    if state is None:
+        return
+    dead_path = os.path.join(directory, _DEAD_FILE)
+    dead = _read_json(dead_path) or {'histograms': {}}
+    for name, dump in state['histograms'].items():
+        dead['histograms'][name] = _merge_dumps([dead['histograms'].get(name, []), dump])
+    _write_json(dead_path, dead)
+    os.remove(path)
+
+def clear_process_metrics(directory: str = METRICS_MULTIPROC_DIR):
+    """
+    Elimina los archivos de un arranque anterior del servidor.
+    """
+    for name in os.listdir(directory):
+        if name.endswith(('.json', '.tmp')):
+            os.remove(os.path.join(directory, name))
+
+def _process_states(engines, directory: str) -> list:
+    """
+    Retorna [(pid o None para los workers terminados, estado)], con el proceso actual en vivo.
+    """
+    own = str(os.getpid())
+    states = [(own, _process_state(engines))]
+    if directory:
+        for name in sorted(os.listdir(directory)):
+            pid, ext = os.path.splitext(name)
+            if ext != '.json' or pid == own:
+                continue
+            state = _read_json(os.path.join(directory, name))
+            if state is not None:
+                states.append((None if name == _DEAD_FILE else pid, state))
+    return states
+
+def _metrics_writer(engines):
+    """
+    Retorna un before_request que inicia, una vez por proceso (también tras un fork), el hilo que
+    escribe los acumulados del worker cada METRICS_FLUSH_INTERVAL segundos.
+    """
+    lock = threading.Lock()
+    started_pid = None
+
+    def run():
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                write_process_metrics(METRICS_MULTIPROC_DIR, engines)
+            except OSError as e:
+                logger.warning("No se pudieron escribir las métricas del worker: %s", e)
+
+    def ensure_started():
+        nonlocal started_pid
+        if started_pid == os.getpid():
+            return
+        with lock:
+            if started_pid != os.getpid():
+                started_pid = os.getpid()
+                threading.Thread(target=run, name='metrics-writer', daemon=True).start()
+    return ensure_started
+
+def render_metrics(engines=None, directory: str = METRICS_MULTIPROC_DIR) -> str:
+    """
+    Genera el texto de /metrics en formato de exposición de Prometheus.
+    `engines` es un engine, un diccionario {nombre: engine} o una función que lo retorna;
+    el nombre es la etiqueta `pool`. Con `directory` (modo multiproceso) suma los acumulados de
+    todos los workers y reporta el gauge del pool de cada uno con la etiqueta `pid`.
+    """
+    states = _process_states(engines, directory)
+    lines = []
+    for family in FAMILIES:
+        lines.extend(family.render(_merge_dumps(state['histograms'].get(family.name, []) for _, state in states)))
+    pools = [(pid, name, value) for pid, state in states if pid is not None for name, value in state['pools'].items()]
+    if pools:
+        lines.append('# HELP db_pool_checked_out Conexiones del pool en uso.')
+        lines.append('# TYPE db_pool_checked_out gauge')
+        for pid, name, value in pools:
+            labels = f'pool="{name}",pid="{pid}"' if directory else f'pool="{name}"'
+            lines.append(f'db_pool_checked_out{{{labels}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+def register_metrics(app, engines):
+    """
+    Activa las métricas: eventos de los engines, middleware de la aplicación y la ruta GET /metrics.
+    `engines` es un engine, un diccionario {nombre: engine} o una función que lo retorna
+    (ver config.database.get_engine_pools); con una función los engines se instrumentan en la primera petición.
+    """
+    if not METRICS_ENABLED:
+        logger.info("Métricas desactivadas (METRICS_ENABLED=false)")
+        return
+    if callable(engines):
+        app.before_request(_lazy_instrumentation(engines))
+    else:
+        for engine in _as_engine_dict(engines).values():
+            instrument_engine(engine)
+    if METRICS_MULTIPROC_DIR:
+        app.before_request(_metrics_writer(engines))
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(engines), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+import threading
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+logger = logging.getLogger(__name__)
+
+"""
+Réplicas de lectura.
+ReplicaSet reparte las lecturas entre varios engines de réplica (round_robin o least_connections)
+y solo elige réplicas sanas: un hilo en segundo plano ejecuta SELECT 1 en cada réplica cada
+`health_interval` segundos, y una réplica que pierde la conexión durante una consulta se marca
+caída hasta el siguiente chequeo exitoso. Sin réplicas sanas las lecturas van al primario.
+La elección de réplica por sesión y la permanencia en el primario tras una escritura las hace
+RoutingSession (config/database.py).
+"""
+
+STRATEGIES = ('round_robin', 'least_connections')
+
+class ReplicaSet:
+    """
+    Conjunto de engines de réplica con chequeos de salud y selección por estrategia.
+    """
+
+    def __init__(self, engines: dict, strategy: str = 'round_robin', health_interval: float = 5.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estrategia de réplicas desconocida: {strategy} (usar {' o '.join(STRATEGIES)})")
+        self.engines = dict(engines)
+        self.strategy = strategy
+        self.health_interval = health_interval
+        self._healthy = set(self.engines)
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        for name, engine in self.engines.items():
+            event.listen(engine, 'handle_error', self._error_listener(name))
+
+    def _error_listener(self, name: str):
+        def on_error(context):
+            if context.is_disconnect:
+                self.mark_down(name)
+        return on_error
+
+    def healthy(self) -> list:
+        """
+        Retorna los nombres de las réplicas sanas, en el orden de configuración.
+        """
+        with self._lock:
+            return [name for name in self.engines if name in self._healthy]
+
+    def mark_down(self, name: str):
+        with self._lock:
+            if name not in self._healthy:
+                return
+            self._healthy.discard(name)
+        logger.warning("Réplica %s fuera de servicio", name)
+
+    def mark_up(self, name: str):
+        with self._lock:
+            if name in self._healthy:
+                return
+            self._healthy.add(name)
+        logger.info("Réplica %s de nuevo en servicio", name)
+
+    def choose(self):
+        """
+        Retorna el engine de la réplica elegida según la estrategia, o None si no hay réplicas sanas.
+        """
+        self._ensure_health_checks()
+        healthy = self.healthy()
+        if not healthy:
+            return None
+        with self._lock:
+            self._counter += 1
+            start = self._counter % len(healthy)
+        # Rotar el punto de partida reparte también los empates de least_connections
+        rotated = healthy[start:] + healthy[:start]
+        if self.strategy == 'least_connections':
+            name = min(rotated, key=lambda n: _checked_out(self.engines[n]))
+        else:
+            name = rotated[0]
+        return self.engines[name]
+
+    def check_health(self):
+        """
+        Ejecuta SELECT 1 en cada réplica y actualiza su estado.
+        """
+        for name, engine in self.engines.items():
+            try:
+                with engine.connect() as conn:
+                    conn.exec_driver_sql('SELECT 1')
+            except SQLAlchemyError as e:
+                logger.debug("Chequeo de salud fallido en réplica %s: %s", name, e)
+                self.mark_down(name)
+            else:
+                self.mark_up(name)
+
+    def _ensure_health_checks(self):
+        # El hilo se inicia en el primer uso y de nuevo en cada proceso hijo tras un fork
+        if self._pid == os.getpid() or self.health_interval <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._health_loop, name='replica-health', daemon=True)
+            self._thread.start()
+
+    def _health_loop(self):
+        while True:
+            self.check_health()
+            time.sleep(self.health_interval)
+
+def _checked_out(engine) -> int:
+    checkedout = getattr(engine.pool, 'checkedout', None)
+    return checkedout() if checkedout is not None else 0
@@ -0,0 +1,75 @@
+import os
+import logging
+from sqlalchemy import create_engine, event
+logger = logging.getLogger(__name__)
+
+"""
+Perfil de SQLite para producción (fallback cuando MySQL no está disponible).
+- Pragmas aplicados a cada conexión nueva: WAL, synchronous=NORMAL, mmap_size, cache_size y busy_timeout.
+  Con WAL los lectores no bloquean al escritor ni el escritor a los lectores.
+- Un engine escritor con una única conexión: las escrituras del proceso se encolan en el pool
+  (DB_POOL_TIMEOUT) en lugar de competir por el bloqueo de la base y fallar con "database is locked".
+- Un engine lector con un pool de conexiones en modo query_only (DB_POOL_SIZE / DB_MAX_OVERFLOW).
+El reparto de sentencias entre ambos lo hace la sesión de config/database.py.
+"""
+
+SQLITE_WAL = os.getenv('SQLITE_WAL', 'true').lower() == 'true'
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # Bytes mapeados en memoria
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # Negativo: KiB por conexión (64 MiB)
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))  # Milisegundos de espera por un bloqueo
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+def get_pragmas(read_only: bool = False) -> list:
+    """
+    Retorna las sentencias PRAGMA que se ejecutan en cada conexión nueva.
+    """
+    if SQLITE_SYNCHRONOUS not in SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS debe ser uno de {', '.join(SYNCHRONOUS_MODES)}")
+    pragmas = [
+        f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}',
+        f'PRAGMA synchronous = {SQLITE_SYNCHRONOUS}',
+        f'PRAGMA mmap_size = {SQLITE_MMAP_SIZE}',
+        f'PRAGMA cache_size = {SQLITE_CACHE_SIZE}',
+    ]
+    if read_only:
+        pragmas.append('PRAGMA query_only = ON')
+    elif SQLITE_WAL:
+        # journal_mode es persistente en el archivo: basta con fijarlo desde el escritor
+        pragmas.insert(0, 'PRAGMA journal_mode = WAL')
+    return pragmas
+
+def apply_pragmas(engine, read_only: bool = False):
+    """
+    Registra la ejecución de los pragmas al abrir cada conexión DBAPI del engine.
+    """
+    pragmas = get_pragmas(read_only)
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def create_sqlite_engines(uri: str, echo: bool = False, pool_size: int = 10, max_overflow: int = 20,
+                          pool_timeout: int = 30, pool_recycle: int = -1):
+    """
+    Crea el engine escritor (una conexión) y el engine lector (`pool_size` + `max_overflow` conexiones)
+    para `uri`. Retorna (escritor, lector).
+    """
+    writer = create_engine(uri, echo=echo, pool_size=1, max_overflow=0,
+                           pool_timeout=pool_timeout, pool_recycle=pool_recycle)
+    apply_pragmas(writer)
+    # El escritor se conecta primero para que el archivo quede en modo WAL antes de abrir lectores
+    with writer.connect() as conn:
+        journal_mode = conn.exec_driver_sql('PRAGMA journal_mode').scalar()
+    reader = create_engine(uri, echo=echo, pool_size=pool_size, max_overflow=max_overflow,
+                           pool_timeout=pool_timeout, pool_recycle=pool_recycle)
+    apply_pragmas(reader, read_only=True)
+    logger.info("SQLite: journal_mode=%s, synchronous=%s, hasta %s conexiones lectoras y 1 escritora",
+                journal_mode, SQLITE_SYNCHRONOUS, pool_size + max_overflow)
+    return writer, reader
@@ -0,0 +1,51 @@
+import hashlib
+import logging
+from functools import wraps
+from datetime import datetime, timezone
+from flask import request, make_response
+from config.database import Session
+from repositories.versioning import get_versions
+logger = logging.getLogger(__name__)
+
+def _build_validators(resources):
+    """
+    Calcula el ETag fuerte y la fecha Last-Modified de la petición actual a partir de las
+    versiones de los recursos de los que depende la respuesta y de la URL (incluida la query string).
+    """
+    boot_id, versions = get_versions(Session, *resources)
+    key = f"{boot_id}|{request.full_path}|" + '|'.join(f"{r}:{v}" for r, v, _ in versions)
+    etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+    last_modified = datetime.fromtimestamp(max(ts for _, _, ts in versions), tz=timezone.utc)
+    return etag, last_modified
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since:
+        # Last-Modified tiene resolución de segundos; el ETag es el validador preferido
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def conditional_get(*resources):
+    """
+    Decorador para GET condicionales. Si el cliente envía un If-None-Match (o If-Modified-Since)
+    que coincide con la versión actual de `resources`, responde 304 sin ejecutar la vista,
+    es decir, sin consultar la base de datos ni serializar. En otro caso ejecuta la vista y
+    agrega los encabezados ETag y Last-Modified a las respuestas 200.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = _build_validators(resources)
+            if _not_modified(etag, last_modified):
+                logger.info("GET condicional sin cambios: %s", request.path)
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
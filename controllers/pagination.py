@@ -0,0 +1,36 @@
+import os
+import logging
+logger = logging.getLogger(__name__)
+
+# Tamaño de página por defecto y máximo permitido para los listados paginados
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '500'))
+
+class PaginationError(ValueError):
+    """
+    Error de validación de los parámetros de paginación (limit/after).
+    """
+    pass
+
+def get_pagination_args(args):
+    """
+    Lee los parámetros `limit` y `after` de la query string.
+    Retorna None si la petición no pide paginación (ninguno de los dos presente),
+    o una tupla (limit, after) validada. Lanza PaginationError si los valores no son válidos.
+    """
+    if 'limit' not in args and 'after' not in args:
+        return None
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        after = int(args['after']) if args.get('after') not in (None, '') else None
+    except ValueError:
+        raise PaginationError('Los parámetros limit y after deben ser números enteros')
+    if limit < 1:
+        raise PaginationError('El parámetro limit debe ser mayor que cero')
+    return min(limit, MAX_PAGE_SIZE), after
+
+def paginated_body(items: list, next_cursor):
+    """
+    Construye el cuerpo de una respuesta paginada con los elementos y el cursor siguiente.
+    """
+    return {'items': items, 'next_cursor': next_cursor}
@@ -1,36 +1,68 @@
+import os
+import json
 import logging
-logging.basicConfig(level=logging.INFO)
+from decimal import Decimal, InvalidOperation
 logger = logging.getLogger(__name__)
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required
 from services.product_service import (
     CategoriaService,
     ProveedorService,
     DescuentoService,
     ImpuestoService,
-    ProductoService
+    ProductoService,
+    BULK_BATCH_SIZE
 )
-from config.database import get_db_session
+from services.price_service import PrecioService
+from repositories.product_repository import ProductoRepository
+from models.product_model import Categoria, Proveedor, Descuento, Impuesto, Producto
+from config.database import Session
+from controllers.conditional import conditional_get
+from controllers.pagination import get_pagination_args, paginated_body, PaginationError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from controllers.serializers import get_serializer, get_fields, serialize_many, dumps
 
 # Crear blueprint para productos
 product_bp = Blueprint('product_bp', __name__)
 
-# Instancias globales de servicios (en producción, usar contexto de app o request)
-db_session = get_db_session()
+# Recursos de los que depende la representación de un producto (precios y relaciones expandidas)
+PRODUCTO_RESOURCES = ('productos', 'descuentos', 'impuestos', 'categorias', 'proveedores')
+
+# IDs máximos por consulta en GET /productos?ids=... y POST /productos/lookup
+MAX_LOOKUP_IDS = int(os.getenv('MAX_LOOKUP_IDS', '1000'))
+
+# Filas leídas por lote en la exportación en streaming
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+# Instancias globales de servicios sobre la sesión con ámbito (scoped_session):
+# cada petición resuelve su propia sesión y la devuelve al pool en el teardown
+db_session = Session
 categoria_service = CategoriaService(db_session)
 proveedor_service = ProveedorService(db_session)
 descuento_service = DescuentoService(db_session)
 impuesto_service = ImpuestoService(db_session)
 producto_service = ProductoService(db_session)
+precio_service = PrecioService(db_session)
 
 # -------------------- CATEGORÍAS --------------------
 @product_bp.route('/categorias', methods=['GET'])
 @jwt_required()
+@conditional_get('categorias')
 def get_categorias():
-    logger.info("Consulta de todas las categorías")
-    categorias = categoria_service.listar_categorias()
-    return jsonify([{'id': c.id_categoria, 'nombre': c.nombre_categoria} for c in categorias]), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    try:
+        pagination = get_pagination_args(request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    next_cursor = None
+    if pagination:
+        categorias, next_cursor = categoria_service.listar_categorias_paginado(*pagination)
+    else:
+        logger.info("Consulta de todas las categorías")
+        categorias = categoria_service.listar_categorias()
+    items = serialize_many(Categoria, categorias)
+    if pagination:
+        return jsonify(paginated_body(items, next_cursor)), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    return jsonify(items), 200, {'Content-Type': 'application/json; charset=utf-8'}
 
 @product_bp.route('/categorias', methods=['POST'])
 def create_categoria():
@@ -40,25 +72,29 @@ def create_categoria():
         logger.warning("Intento de crear categoría sin nombre")
         return jsonify({'error': 'El nombre de la categoría es obligatorio'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
     categoria = categoria_service.crear_categoria(nombre)
-    logger.info(f"Categoría creada: {nombre}")
-    return jsonify({'id': categoria.id_categoria, 'nombre': categoria.nombre_categoria}), 201, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.info("Categoría creada: %s", nombre)
+    return jsonify(get_serializer(Categoria)(categoria)), 201, {'Content-Type': 'application/json; charset=utf-8'}
 
 
 # -------------------- PROVEEDORES --------------------
 @product_bp.route('/proveedores', methods=['GET'])
 @jwt_required()
+@conditional_get('proveedores')
 def get_proveedores():
-    logger.info("Consulta de todos los proveedores")
-    proveedores = proveedor_service.listar_proveedores()
-    return jsonify([
-        {
-            'id': p.id_proveedor,
-            'nombre': p.nombre,
-            'telefono': p.telefono,
-            'email': p.email,
-            'direccion': p.direccion
-        } for p in proveedores
-    ]), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    try:
+        pagination = get_pagination_args(request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    next_cursor = None
+    if pagination:
+        proveedores, next_cursor = proveedor_service.listar_proveedores_paginado(*pagination)
+    else:
+        logger.info("Consulta de todos los proveedores")
+        proveedores = proveedor_service.listar_proveedores()
+    items = serialize_many(Proveedor, proveedores)
+    if pagination:
+        return jsonify(paginated_body(items, next_cursor)), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    return jsonify(items), 200, {'Content-Type': 'application/json; charset=utf-8'}
 
 @product_bp.route('/proveedores', methods=['POST'])
 def create_proveedor():
@@ -73,23 +109,18 @@ def create_proveedor():
         data.get('email'),
         data.get('direccion')
     )
-    logger.info(f"Proveedor creado: {nombre}")
-    return jsonify({
-        'id': proveedor.id_proveedor,
-        'nombre': proveedor.nombre,
-        'telefono': proveedor.telefono,
-        'email': proveedor.email,
-        'direccion': proveedor.direccion
-    }), 201, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.info("Proveedor creado: %s", nombre)
+    return jsonify(get_serializer(Proveedor)(proveedor)), 201, {'Content-Type': 'application/json; charset=utf-8'}
 
 
 # -------------------- DESCUENTOS --------------------
 @product_bp.route('/descuentos', methods=['GET'])
 @jwt_required()
+@conditional_get('descuentos')
 def get_descuentos():
     logger.info("Consulta de todos los descuentos")
     descuentos = descuento_service.listar_descuentos()
-    return jsonify([{'id': d.id_descuento, 'nombre': d.nombre, 'porcentaje': float(d.porcentaje)} for d in descuentos]), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    return jsonify(serialize_many(Descuento, descuentos)), 200, {'Content-Type': 'application/json; charset=utf-8'}
 
 @product_bp.route('/descuentos', methods=['POST'])
 def create_descuento():
@@ -100,17 +131,18 @@ def create_descuento():
         logger.warning("Intento de crear descuento sin nombre o porcentaje")
         return jsonify({'error': 'El nombre y porcentaje son obligatorios'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
     descuento = descuento_service.crear_descuento(nombre, porcentaje)
-    logger.info(f"Descuento creado: {nombre}")
-    return jsonify({'id': descuento.id_descuento, 'nombre': descuento.nombre, 'porcentaje': float(descuento.porcentaje)}), 201, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.info("Descuento creado: %s", nombre)
+    return jsonify(get_serializer(Descuento)(descuento)), 201, {'Content-Type': 'application/json; charset=utf-8'}
 
 
 # -------------------- IMPUESTOS --------------------
 @product_bp.route('/impuestos', methods=['GET'])
 @jwt_required()
+@conditional_get('impuestos')
 def get_impuestos():
     logger.info("Consulta de todos los impuestos")
     impuestos = impuesto_service.listar_impuestos()
-    return jsonify([{'id': i.id_iva, 'nombre': i.nombre, 'porcentaje': float(i.porcentaje)} for i in impuestos]), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    return jsonify(serialize_many(Impuesto, impuestos)), 200, {'Content-Type': 'application/json; charset=utf-8'}
 
 @product_bp.route('/impuestos', methods=['POST'])
 def create_impuesto():
@@ -121,45 +153,274 @@ def create_impuesto():
         logger.warning("Intento de crear impuesto sin nombre o porcentaje")
         return jsonify({'error': 'El nombre y porcentaje son obligatorios'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
     impuesto = impuesto_service.crear_impuesto(nombre, porcentaje)
-    logger.info(f"Impuesto creado: {nombre}")
-    return jsonify({'id': impuesto.id_iva, 'nombre': impuesto.nombre, 'porcentaje': float(impuesto.porcentaje)}), 201, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.info("Impuesto creado: %s", nombre)
+    return jsonify(get_serializer(Impuesto)(impuesto)), 201, {'Content-Type': 'application/json; charset=utf-8'}
 
 
 # -------------------- PRODUCTOS --------------------
 @product_bp.route('/productos', methods=['GET'])
 @jwt_required()
+@conditional_get(*PRODUCTO_RESOURCES)
 def get_productos():
-    logger.info("Consulta de todos los productos")
-    productos = producto_service.listar_productos()
-    return jsonify([
-        {
-            'id': p.id_producto,
-            'nombre': p.nombre_producto,
-            'precio': float(p.Precio),
-            'stock': p.Stock,
-            'categoria': p.id_categoria,
-            'descuento': p.id_descuento,
-            'iva': p.id_iva,
-            'proveedor': p.id_proveedor
-        } for p in productos
-    ]), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    try:
+        pagination = get_pagination_args(request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    try:
+        expand = _get_expand_args()
+        filters = _get_filter_args()
+        fields = _get_fields_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    if fields and expand:
+        return jsonify({'error': 'Los parámetros fields y expand no se pueden combinar'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    if 'ids' in request.args:
+        # Los IDs ya fijan qué productos y en qué orden: paginar o filtrar esa lista sería ambiguo
+        if pagination or filters:
+            return jsonify({'error': 'El parámetro ids no se puede combinar con limit, after ni filtros'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+        valores = [i for i in request.args['ids'].split(',') if i.strip()]
+        if len(valores) > MAX_LOOKUP_IDS:
+            return _too_many_ids_response()
+        try:
+            ids = [int(i) for i in valores]
+        except ValueError:
+            return jsonify({'error': 'El parámetro ids debe ser una lista de enteros separados por comas'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+        return _productos_por_ids_response(ids, expand, fields)
+    columns = _projection_columns(fields) if fields else None
+    next_cursor = None
+    if pagination:
+        productos, next_cursor = producto_service.listar_productos_paginado(*pagination, expand=expand, filters=filters, columns=columns)
+    else:
+        logger.info("Consulta de todos los productos")
+        productos = producto_service.listar_productos(expand, filters, columns)
+    if fields:
+        items = _productos_parciales(productos, fields)
+    else:
+        # Precio final calculado en una sola pasada para toda la página
+        items = _productos_dicts(productos, precio_service.calcular_lote(productos), expand)
+    if pagination:
+        return jsonify(paginated_body(items, next_cursor)), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    return jsonify(items), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+@product_bp.route('/productos/lookup', methods=['POST'])
+@jwt_required()
+def lookup_productos():
+    """
+    POST /productos/lookup
+    Variante de GET /productos?ids=... para listas largas de IDs.
+    Parámetros esperados (JSON):
+        ids (list[int]): IDs de los productos, en el orden deseado.
+        expand (list[str], opcional): Relaciones a expandir.
+    Respuesta: JSON {'items': [...], 'missing': [...]} con los productos en el orden pedido y los IDs inexistentes.
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return jsonify({'error': 'ids debe ser una lista de enteros'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    expand = data.get('expand') or []
+    invalid = [name for name in expand if name not in ProductoRepository.EXPANDABLE] if isinstance(expand, list) else [str(expand)]
+    if invalid:
+        return jsonify({'error': f"Relaciones no válidas en expand: {', '.join(map(str, invalid))}"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    return _productos_por_ids_response(ids, tuple(dict.fromkeys(expand)))
+
+def _too_many_ids_response():
+    return jsonify({'error': f'Se permiten como máximo {MAX_LOOKUP_IDS} IDs por consulta'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+def _productos_por_ids_response(ids, expand, fields=None):
+    if len(ids) > MAX_LOOKUP_IDS:
+        return _too_many_ids_response()
+    productos, faltantes = producto_service.obtener_productos(ids, expand)
+    if fields:
+        items = _productos_parciales(productos, fields)
+    else:
+        items = _productos_dicts(productos, precio_service.calcular_lote(productos), expand)
+    logger.info("Consulta de %s productos por ID: %s inexistentes", len(ids), len(faltantes))
+    return jsonify({'items': items, 'missing': faltantes}), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+@product_bp.route('/productos/search', methods=['GET'])
+@conditional_get(*PRODUCTO_RESOURCES)
+def search_productos():
+    """
+    GET /productos/search
+    Busca productos por nombre con el índice de texto completo (coincidencia por prefijo de cada término).
+    Parámetros (query string):
+        q (str): Texto a buscar.
+        limit (int, opcional): Resultados por página.
+        offset (int, opcional): Resultados a omitir (paginación del ranking).
+    Respuesta: JSON {'items': [...], 'next_offset': ...} ordenado por relevancia; cada producto incluye su 'score'.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'El parámetro q es obligatorio'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'Los parámetros limit y offset deben ser números enteros'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit debe ser mayor que cero y offset no puede ser negativo'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    # Se pide un resultado extra para saber si existe una página siguiente
+    resultados = producto_service.buscar_productos(query, limit + 1, offset)
+    next_offset = offset + limit if len(resultados) > limit else None
+    resultados = resultados[:limit]
+    productos = [p for p, _ in resultados]
+    items = _productos_dicts(productos, precio_service.calcular_lote(productos))
+    for item, (_, score) in zip(items, resultados):
+        item['score'] = round(score, 6)
+    logger.info("Búsqueda de productos %r: %s resultados", query, len(items))
+    return jsonify({'items': items, 'next_offset': next_offset}), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+@product_bp.route('/productos/export', methods=['GET'])
+@jwt_required()
+@conditional_get(*PRODUCTO_RESOURCES)
+def export_productos():
+    """
+    GET /productos/export
+    Exporta el catálogo completo en streaming, leyendo los productos por lotes.
+    La memoria usada es constante sin importar el tamaño de la tabla.
+    Parámetros opcionales (query string):
+        format (str): 'ndjson' (por defecto, un producto por línea) o 'json' (arreglo JSON por fragmentos).
+    """
+    formato = request.args.get('format', 'ndjson')
+    if formato not in ('ndjson', 'json'):
+        return jsonify({'error': "El formato debe ser 'ndjson' o 'json'"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.info("Exportación de productos en formato %s", formato)
+    productos = producto_service.exportar_productos(EXPORT_BATCH_SIZE)
+
+    def iter_items():
+        # Los precios y la serialización se hacen por bloques del mismo tamaño que los lotes leídos
+        for chunk in productos.partitions():
+            yield from _productos_dicts(chunk, precio_service.calcular_lote(chunk))
+
+    def generate_ndjson():
+        for item in iter_items():
+            yield dumps(item) + '\n'
+
+    def generate_json_array():
+        yield '['
+        separator = ''
+        for item in iter_items():
+            yield separator + dumps(item)
+            separator = ','
+        yield ']'
+
+    if formato == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(generate_json_array()), content_type='application/json; charset=utf-8')
+
+def _get_expand_args():
+    """
+    Lee el parámetro `expand` (lista separada por comas) y valida los nombres de relación.
+    """
+    raw = request.args.get('expand', '')
+    expand = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    invalid = [name for name in expand if name not in ProductoRepository.EXPANDABLE]
+    if invalid:
+        raise ValueError(f"Relaciones no válidas en expand: {', '.join(invalid)}. Permitidas: {', '.join(ProductoRepository.EXPANDABLE)}")
+    return expand
+
+def _get_filter_args():
+    """
+    Lee los filtros de GET /productos: id_categoria, id_proveedor, precio_min, precio_max,
+    en_stock (true/false) y nombre (prefijo). Lanza ValueError si algún valor no es válido.
+    """
+    args = request.args
+    filters = {}
+    try:
+        for campo in ('id_categoria', 'id_proveedor'):
+            if args.get(campo):
+                filters[campo] = int(args[campo])
+    except ValueError:
+        raise ValueError('Los filtros id_categoria e id_proveedor deben ser números enteros')
+    try:
+        for campo in ('precio_min', 'precio_max'):
+            if args.get(campo):
+                filters[campo] = Decimal(args[campo])
+    except InvalidOperation:
+        raise ValueError('Los filtros precio_min y precio_max deben ser números')
+    if args.get('en_stock'):
+        valor = args['en_stock'].lower()
+        if valor not in ('true', 'false', '1', '0'):
+            raise ValueError("El filtro en_stock debe ser 'true' o 'false'")
+        filters['en_stock'] = valor in ('true', '1')
+    if args.get('nombre'):
+        filters['nombre'] = args['nombre']
+    return filters
+
+# Columnas necesarias para calcular los precios de un producto
+PRECIO_COLUMNS = ('Precio', 'id_descuento', 'id_iva')
+
+def _get_fields_args():
+    """
+    Lee el parámetro `fields` (lista separada por comas de claves de la respuesta, más 'precios').
+    Retorna una tupla vacía si no se indicó.
+    """
+    raw = request.args.get('fields', '')
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    allowed = tuple(get_fields(Producto)) + ('precios',)
+    invalid = [name for name in fields if name not in allowed]
+    if invalid:
+        raise ValueError(f"Campos no válidos en fields: {', '.join(invalid)}. Permitidos: {', '.join(allowed)}")
+    return fields
+
+def _projection_columns(fields):
+    """
+    Columnas de Producto que debe leer la consulta para responder `fields`: las de los campos
+    pedidos, id_producto (cursor de paginación) y, si se piden los precios, las que usa el cálculo.
+    """
+    attrs = get_fields(Producto)
+    columns = ['id_producto'] + [attrs[name] for name in fields if name != 'precios']
+    if 'precios' in fields:
+        columns.extend(PRECIO_COLUMNS)
+    return tuple(dict.fromkeys(columns))
+
+def _productos_parciales(productos, fields):
+    items = serialize_many(Producto, productos, [name for name in fields if name != 'precios'])
+    if 'precios' in fields:
+        for item, pr in zip(items, precio_service.calcular_lote(productos)):
+            item['precios'] = pr
+    return items
+
+# Clave de la respuesta que reemplaza cada relación expandida (el id pasa a ser el objeto completo)
+EXPAND_RESPONSE_KEYS = {'categoria': 'categoria', 'proveedor': 'proveedor', 'descuento': 'descuento', 'impuesto': 'iva'}
+EXPAND_MODELS = {'categoria': Categoria, 'proveedor': Proveedor, 'descuento': Descuento, 'impuesto': Impuesto}
+
+_encode_producto = get_serializer(Producto)
+
+def _producto_dict(p, precios=None, expand=()):
+    data = _encode_producto(p)
+    if precios is not None:
+        # Importes calculados: precio neto, valor del descuento, valor del IVA y precio final
+        data['precios'] = precios
+    for name in expand:
+        related = getattr(p, name)
+        data[EXPAND_RESPONSE_KEYS[name]] = get_serializer(EXPAND_MODELS[name])(related) if related is not None else None
+    return data
+
+def _productos_dicts(productos, precios, expand=()):
+    """
+    Serializa una lista de productos (filas o instancias) con sus precios calculados.
+    """
+    if expand:
+        return [_producto_dict(p, pr, expand) for p, pr in zip(productos, precios)]
+    items = serialize_many(Producto, productos)
+    for item, pr in zip(items, precios):
+        item['precios'] = pr
+    return items
 
 @product_bp.route('/productos/<int:producto_id>', methods=['GET'])
+@conditional_get(*PRODUCTO_RESOURCES)
 def get_producto(producto_id):
-    producto = producto_service.obtener_producto(producto_id)
+    try:
+        expand = _get_expand_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    producto = producto_service.obtener_producto(producto_id, expand)
     if producto:
-        logger.info(f"Consulta de producto por ID: {producto_id}")
-        return jsonify({
-            'id': producto.id_producto,
-            'nombre': producto.nombre_producto,
-            'precio': float(producto.Precio),
-            'stock': producto.Stock,
-            'categoria': producto.id_categoria,
-            'descuento': producto.id_descuento,
-            'iva': producto.id_iva,
-            'proveedor': producto.id_proveedor
-        }), 200, {'Content-Type': 'application/json; charset=utf-8'}
-    logger.warning(f"Producto no encontrado: {producto_id}")
+        logger.info("Consulta de producto por ID: %s", producto_id)
+        precios = precio_service.calcular_precio(producto)
+        return jsonify(_producto_dict(producto, precios, expand)), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.warning("Producto no encontrado: %s", producto_id)
     return jsonify({'error': 'Producto no encontrado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
 
 @product_bp.route('/productos', methods=['POST'])
@@ -183,17 +444,49 @@ def create_producto():
         data.get('id_iva'),
         data.get('id_proveedor')
     )
-    logger.info(f"Producto creado: {nombre}")
-    return jsonify({
-        'id': producto.id_producto,
-        'nombre': producto.nombre_producto,
-        'precio': float(producto.Precio),
-        'stock': producto.Stock,
-        'categoria': producto.id_categoria,
-        'descuento': producto.id_descuento,
-        'iva': producto.id_iva,
-        'proveedor': producto.id_proveedor
-    }), 201, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.info("Producto creado: %s", nombre)
+    return jsonify(_producto_dict(producto)), 201, {'Content-Type': 'application/json; charset=utf-8'}
+
+@product_bp.route('/productos/bulk', methods=['POST'])
+def create_productos_bulk():
+    """
+    POST /productos/bulk
+    Crea productos de forma masiva. El cuerpo puede ser un arreglo JSON o NDJSON
+    (Content-Type: application/x-ndjson, un producto por línea) con los mismos campos de POST /productos.
+    Parámetros opcionales (query string):
+        batch_size (int): Filas insertadas por transacción.
+    Respuesta: JSON con el total recibido, el total creado y los errores por fila (índice y mensaje).
+    """
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)  # Se reporta como error de fila en la validación
+    else:
+        items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        logger.warning("Carga masiva con cuerpo inválido")
+        return jsonify({'error': 'El cuerpo debe ser un arreglo JSON o NDJSON de productos'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    try:
+        batch_size = int(request.args.get('batch_size', BULK_BATCH_SIZE))
+    except ValueError:
+        batch_size = 0
+    if batch_size < 1:
+        return jsonify({'error': 'El parámetro batch_size debe ser un entero mayor que cero'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    resultado = producto_service.crear_productos_bulk(items, batch_size)
+    logger.info("Carga masiva: %s de %s productos creados", resultado['created'], resultado['received'])
+    if not resultado['errors']:
+        status = 201
+    elif resultado['created']:
+        status = 207  # Éxito parcial: algunas filas fallaron
+    else:
+        status = 400
+    return jsonify(resultado), status, {'Content-Type': 'application/json; charset=utf-8'}
 
 @product_bp.route('/productos/<int:producto_id>', methods=['PUT'])
 def update_producto(producto_id):
@@ -209,25 +502,96 @@ def update_producto(producto_id):
         data.get('id_proveedor')
     )
     if producto:
-        logger.info(f"Producto actualizado: {producto_id}")
-        return jsonify({
-            'id': producto.id_producto,
-            'nombre': producto.nombre_producto,
-            'precio': float(producto.Precio),
-            'stock': producto.Stock,
-            'categoria': producto.id_categoria,
-            'descuento': producto.id_descuento,
-            'iva': producto.id_iva,
-            'proveedor': producto.id_proveedor
-        }), 200, {'Content-Type': 'application/json; charset=utf-8'}
-    logger.warning(f"Producto no encontrado para actualizar: {producto_id}")
+        logger.info("Producto actualizado: %s", producto_id)
+        return jsonify(_producto_dict(producto)), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.warning("Producto no encontrado para actualizar: %s", producto_id)
     return jsonify({'error': 'Producto no encontrado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
 
+STOCK_ERRORS = {
+    'no_encontrado': 'Producto no encontrado',
+    'stock_insuficiente': 'Stock insuficiente'
+}
+
+def _cantidad_valida(cantidad):
+    return isinstance(cantidad, int) and not isinstance(cantidad, bool) and cantidad != 0
+
+@product_bp.route('/productos/<int:producto_id>/stock', methods=['POST'])
+def adjust_stock(producto_id):
+    """
+    POST /productos/<producto_id>/stock
+    Descuenta stock de forma atómica con un UPDATE condicional (Stock >= cantidad), sin leer la fila antes.
+    Parámetros esperados (JSON):
+        cantidad (int): Unidades a descontar; un valor negativo repone stock.
+    Respuesta: JSON con el stock resultante, 404 si el producto no existe o 409 si el stock es insuficiente.
+    """
+    data = request.get_json(silent=True) or {}
+    cantidad = data.get('cantidad')
+    if not _cantidad_valida(cantidad):
+        return jsonify({'error': 'La cantidad debe ser un entero distinto de cero'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    stock, error = producto_service.ajustar_stock(producto_id, cantidad)
+    if error:
+        logger.warning("Ajuste de stock rechazado para %s: %s", producto_id, error)
+        status = 404 if error == 'no_encontrado' else 409
+        return jsonify({'error': STOCK_ERRORS[error]}), status, {'Content-Type': 'application/json; charset=utf-8'}
+    logger.info("Stock ajustado: %s -> %s", producto_id, stock)
+    return jsonify({'id': producto_id, 'stock': stock}), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+@product_bp.route('/productos/stock', methods=['POST'])
+def adjust_stock_batch():
+    """
+    POST /productos/stock
+    Ajusta el stock de varias líneas de un pedido en una sola transacción.
+    Parámetros esperados (JSON):
+        items (list): Líneas {'id_producto': int, 'cantidad': int}.
+        atomic (bool, opcional): Si es true (por defecto) y alguna línea falla, no se aplica ninguna.
+    Respuesta: JSON con el resultado de cada línea; 200 si se aplicaron todas, 207 si solo algunas y 409 si ninguna.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    atomic = data.get('atomic', True)
+    if not isinstance(items, list) or not items or not isinstance(atomic, bool):
+        return jsonify({'error': 'items debe ser una lista no vacía y atomic un booleano'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    lineas = []
+    for index, item in enumerate(items):
+        producto_id = item.get('id_producto') if isinstance(item, dict) else None
+        cantidad = item.get('cantidad') if isinstance(item, dict) else None
+        if not isinstance(producto_id, int) or isinstance(producto_id, bool) or not _cantidad_valida(cantidad):
+            return jsonify({'error': f'Línea {index} inválida: se requieren id_producto y cantidad enteros (cantidad distinta de cero)'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+        lineas.append((producto_id, cantidad))
+
+    resultados, aplicado = producto_service.ajustar_stock_lote(lineas, atomic)
+    fallidas = [r for r in resultados if r['error']]
+    for r in resultados:
+        r['error'] = STOCK_ERRORS.get(r['error']) if r['error'] else None
+    if not aplicado:
+        status = 409
+    elif fallidas:
+        status = 207
+    else:
+        status = 200
+    logger.info("Ajuste de stock en lote: %s de %s líneas válidas (aplicado=%s)", len(resultados) - len(fallidas), len(resultados), aplicado)
+    return jsonify({'aplicado': aplicado, 'items': resultados}), status, {'Content-Type': 'application/json; charset=utf-8'}
+
 @product_bp.route('/productos/<int:producto_id>', methods=['DELETE'])
 def delete_producto(producto_id):
     producto = producto_service.eliminar_producto(producto_id)
     if producto:
-        logger.info(f"Producto eliminado: {producto_id}")
+        logger.info("Producto eliminado: %s", producto_id)
         return jsonify({'message': 'Producto eliminado'}), 200, {'Content-Type': 'application/json; charset=utf-8'}
-    logger.warning(f"Producto no encontrado para eliminar: {producto_id}")
+    logger.warning("Producto no encontrado para eliminar: %s", producto_id)
     return jsonify({'error': 'Producto no encontrado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+
+def warmup():
+    """
+    Precarga lo que usan las primeras peticiones de productos: listados en caché de las tablas de
+    referencia, serializadores de sus filas y de los productos, tasas de precios e índice de búsqueda.
+    Debe ejecutarse dentro de un contexto de aplicación; la usa la precarga del servidor prefork (wsgi.py).
+    """
+    for model, listar in ((Categoria, categoria_service.listar_categorias),
+                          (Proveedor, proveedor_service.listar_proveedores),
+                          (Descuento, descuento_service.listar_descuentos),
+                          (Impuesto, impuesto_service.listar_impuestos)):
+        serialize_many(model, listar())
+    productos, _ = producto_service.listar_productos_paginado(1)
+    _productos_dicts(productos, precio_service.calcular_lote(productos))
+    producto_service.repository.search_index.ensure_ready(db_session())
@@ -0,0 +1,188 @@
+import os
+import json
+import logging
+from decimal import Decimal
+from flask.json.provider import JSONProvider, DefaultJSONProvider
+from models.product_model import Categoria, Proveedor, Descuento, Impuesto, Producto
+from models.user_model import User
+logger = logging.getLogger(__name__)
+
+"""
+Serialización de respuestas.
+- Registro de serializadores por modelo: para cada modelo se genera una única función que construye
+  el diccionario de la respuesta leyendo los atributos directamente (sin bucles ni getattr por campo).
+  Funciona con instancias ORM y con las copias de solo lectura de la caché.
+- Los valores Numeric se mantienen como Decimal hasta el proveedor JSON, que los escribe sin pasar
+  por float como texto exacto, ej. "10.50". Es el mismo formato con los dos proveedores: el tipo
+  JSON de los importes no depende de la librería instalada.
+- Proveedor JSON de Flask: orjson si está instalado (pip install -r requirements.txt) o el de
+  la librería estándar.
+
+Variables de entorno:
+- JSON_PROVIDER: auto|orjson|std (por defecto auto: orjson si está disponible).
+"""
+
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')
+
+_serializers = {}
+_fields = {}
+_projections = {}
+
+def _compile(name: str, fields):
+    body = ', '.join(f"{key!r}: o.{attr}" for key, attr in fields)
+    namespace = {}
+    exec(f"def encode(o):\n    return {{{body}}}\n", namespace)
+    encode = namespace['encode']
+    encode.__name__ = name
+    return encode
+
+def register_serializer(model, fields):
+    """
+    Registra el serializador de `model`. `fields` es una lista de pares (clave de la respuesta, atributo).
+    El código de la función se genera una sola vez, al registrar el modelo.
+    """
+    _fields[model] = dict(fields)
+    encode = _serializers[model] = _compile(f"encode_{model.__name__.lower()}", fields)
+    return encode
+
+def get_fields(model) -> dict:
+    """
+    Retorna el mapeo {clave de la respuesta: atributo del modelo} de `model`.
+    """
+    return _fields[model]
+
+def get_projection_serializer(model, keys):
+    """
+    Serializador que solo incluye las claves `keys` (fieldsets parciales, parámetro fields=).
+    Funciona con instancias y con filas (Row) que tengan al menos esos atributos.
+    Se compila una vez por combinación de claves.
+    """
+    cache_key = (model, tuple(keys))
+    encode = _projections.get(cache_key)
+    if encode is None:
+        attrs = _fields[model]
+        encode = _projections[cache_key] = _compile(
+            f"encode_{model.__name__.lower()}_partial", [(key, attrs[key]) for key in keys])
+    return encode
+
+def get_serializer(model):
+    """
+    Retorna la función que convierte una instancia de `model` en diccionario.
+    """
+    return _serializers[model]
+
+def _row_serializer(model, row_fields, keys=None):
+    """
+    Serializador de filas (Row) que lee cada valor por posición, más rápido que por nombre.
+    Se compila una vez por combinación de columnas de la fila y claves de la respuesta.
+    """
+    cache_key = (model, tuple(row_fields), tuple(keys) if keys is not None else None)
+    encode = _projections.get(cache_key)
+    if encode is None:
+        attrs = _fields[model]
+        positions = {name: index for index, name in enumerate(row_fields)}
+        body = ', '.join(f"{key!r}: o[{positions[attrs[key]]}]" for key in (keys if keys is not None else attrs))
+        namespace = {}
+        exec(f"def encode(o):\n    return {{{body}}}\n", namespace)
+        encode = _projections[cache_key] = namespace['encode']
+    return encode
+
+def serialize_many(model, objs, keys=None):
+    """
+    Serializa una lista de instancias o filas (Row) del mismo modelo, opcionalmente solo las claves `keys`.
+    """
+    if not objs:
+        return []
+    if hasattr(objs[0], '_fields'):
+        encode = _row_serializer(model, objs[0]._fields, keys)
+    elif keys is not None:
+        encode = get_projection_serializer(model, keys)
+    else:
+        encode = _serializers[model]
+    return [encode(o) for o in objs]
+
+# Campos expuestos por cada modelo (clave de la respuesta, atributo del modelo)
+register_serializer(Categoria, [('id', 'id_categoria'), ('nombre', 'nombre_categoria')])
+register_serializer(Proveedor, [('id', 'id_proveedor'), ('nombre', 'nombre'), ('telefono', 'telefono'),
+                                ('email', 'email'), ('direccion', 'direccion')])
+register_serializer(Descuento, [('id', 'id_descuento'), ('nombre', 'nombre'), ('porcentaje', 'porcentaje')])
+register_serializer(Impuesto, [('id', 'id_iva'), ('nombre', 'nombre'), ('porcentaje', 'porcentaje')])
+register_serializer(Producto, [('id', 'id_producto'), ('nombre', 'nombre_producto'), ('precio', 'Precio'),
+                               ('stock', 'Stock'), ('categoria', 'id_categoria'), ('descuento', 'id_descuento'),
+                               ('iva', 'id_iva'), ('proveedor', 'id_proveedor')])
+register_serializer(User, [('id', 'id'), ('username', 'username'), ('email', 'email'), ('full_name', 'full_name')])
+
+# -------------------- JSON --------------------
+def _std_default(o):
+    # La librería estándar no puede escribir un número con los dígitos exactos de un Decimal
+    # (solo pasando por float): se escribe como texto exacto, ej. "10.50"
+    if isinstance(o, Decimal):
+        return str(o)
+    return DefaultJSONProvider.default(o)
+
+class StdJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor de la librería estándar: los Decimal se escriben como texto exacto.
+    Conserva el orden de los campos del serializador, como OrjsonProvider.
+    """
+    default = staticmethod(_std_default)
+    sort_keys = False
+
+class OrjsonProvider(JSONProvider):
+    """
+    Proveedor JSON sobre orjson: los Decimal se escriben como texto exacto, igual que StdJSONProvider.
+    """
+
+    def __init__(self, app):
+        import orjson  # Dependencia opcional, solo necesaria con JSON_PROVIDER=orjson|auto
+        super().__init__(app)
+        self._orjson = orjson
+        self._default = _std_default
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def dumps_bytes(self, obj) -> bytes:
+        return self._orjson.dumps(obj, default=self._default, option=self._orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, s, **kwargs):
+        return self._orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype='application/json')
+
+def build_json_provider(app, provider: str = JSON_PROVIDER):
+    """
+    Construye el proveedor JSON indicado por nombre; en modo auto usa orjson si está instalado.
+    Con JSON_PROVIDER=orjson la falta de orjson impide arrancar; en modo auto se avisa y se usa
+    la librería estándar (mismo formato, menor rendimiento).
+    """
+    if provider in ('auto', 'orjson'):
+        try:
+            return OrjsonProvider(app)
+        except ImportError as e:
+            if provider == 'orjson':
+                raise
+            logger.warning("orjson no disponible, se usa la librería estándar (pip install -r requirements.txt): %s", e)
+    return StdJSONProvider(app)
+
+def _std_dumps(obj) -> str:
+    return json.dumps(obj, default=_std_default, ensure_ascii=False)
+
+_dumps = _std_dumps
+
+def register_json_provider(app):
+    """
+    Instala el proveedor JSON en la aplicación y lo usa también para dumps() (exportación en streaming).
+    """
+    global _dumps
+    app.json = build_json_provider(app)
+    _dumps = app.json.dumps
+    logger.info("Proveedor JSON: %s", type(app.json).__name__)
+
+def dumps(obj) -> str:
+    """
+    Serializa `obj` con el proveedor JSON de la aplicación.
+    """
+    return _dumps(obj)
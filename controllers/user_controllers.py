@@ -1,14 +1,18 @@
 import logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from services.user_service import UsersService
+from repositories.user_repository import UserConflictError
+from services.hashing import HashingSaturatedError, HashingTimeoutError
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required
 from flask_jwt_extended.exceptions import NoAuthorizationError
 from flask import current_app
 
 from config.database import get_db_session
+from controllers.pagination import get_pagination_args, paginated_body, PaginationError
+from controllers.serializers import get_serializer, serialize_many
+from models.user_model import User
 
 # ELIMINADO: service = UsersService(get_db_session())
 
@@ -20,6 +24,23 @@ def register_jwt_error_handlers(app):
         logger.warning("Intento de acceso sin autenticación JWT")
         return jsonify({'error': 'No autenticado. Debe enviar un token JWT válido en el header Authorization.'}), 401, {'Content-Type': 'application/json; charset=utf-8'}
 
+def user_conflict_response():
+    """
+    Respuesta 409 cuando el username o el email ya pertenecen a otro usuario.
+    """
+    return jsonify({'error': 'El nombre de usuario o el email ya existen'}), 409, {'Content-Type': 'application/json; charset=utf-8'}
+
+def hashing_saturated_response(e: HashingSaturatedError):
+    """
+    Respuesta 429 cuando la cola de hashing de contraseñas está llena, o 503 si el hashing no
+    respondió a tiempo (HashingTimeoutError); ambas con Retry-After.
+    """
+    status = 503 if isinstance(e, HashingTimeoutError) else 429
+    return jsonify({'error': 'Demasiadas solicitudes de autenticación. Intente de nuevo en unos segundos.'}), status, {
+        'Content-Type': 'application/json; charset=utf-8',
+        'Retry-After': str(e.retry_after)
+    }
+
 @user_bp.route('/login', methods=['POST'])
 def login_user():
     """
@@ -43,20 +64,20 @@ def login_user():
         if user:
             # CORREGIDO: identity debe ser string, no diccionario
             access_token = create_access_token(identity=str(user.id))
-            logger.info(f"Usuario autenticado: {username}")
+            logger.info("Usuario autenticado: %s", username)
             return jsonify({
                 'access_token': access_token,
                 'user_id': user.id,
                 'username': user.username,
                 'email': user.email
             }), 200, {'Content-Type': 'application/json; charset=utf-8'}
-        logger.warning(f"Login fallido para usuario: {username}")
+        logger.warning("Login fallido para usuario: %s", username)
         return jsonify({'error': 'Credenciales inválidas'}), 401, {'Content-Type': 'application/json; charset=utf-8'}
+    except HashingSaturatedError as e:
+        return hashing_saturated_response(e)
     except Exception as e:
-        logger.error(f"Error en login: {str(e)}")
+        logger.error("Error en login: %s", e)
         return jsonify({'error': 'Error interno del servidor'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
-    finally:
-        db_session.close()
 
 @user_bp.route('/users', methods=['GET'])
 @jwt_required()
@@ -65,20 +86,29 @@ def get_users():
     GET /users
     Recupera y retorna todos los usuarios registrados en el sistema.
     Utiliza la capa de servicios para obtener la lista completa de usuarios.
-    No recibe parámetros.
-    Respuesta: JSON con la lista de usuarios.
+    Parámetros opcionales (query string):
+        limit (int): Tamaño de página; activa la paginación por cursor.
+        after (int): ID del último usuario de la página anterior (cursor).
+    Respuesta: JSON con la lista de usuarios, o {'items': [...], 'next_cursor': ...} si se pagina.
     """
     db_session = get_db_session()
     service = UsersService(db_session)
     try:
+        try:
+            pagination = get_pagination_args(request.args)
+        except PaginationError as e:
+            return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+        if pagination:
+            users, next_cursor = service.get_users_page(*pagination)
+            logger.info("Consulta paginada de usuarios")
+            items = serialize_many(User, users)
+            return jsonify(paginated_body(items, next_cursor)), 200, {'Content-Type': 'application/json; charset=utf-8'}
         users = service.get_all_users()
         logger.info("Consulta de todos los usuarios")
-        return jsonify([{'id': u.id, 'username': u.username, 'email': getattr(u, 'email', None), 'full_name': getattr(u, 'full_name', None)} for u in users]), 200, {'Content-Type': 'application/json; charset=utf-8'}
+        return jsonify(serialize_many(User, users)), 200, {'Content-Type': 'application/json; charset=utf-8'}
     except Exception as e:
-        logger.error(f"Error obteniendo usuarios: {str(e)}")
+        logger.error("Error obteniendo usuarios: %s", e)
         return jsonify({'error': 'Error interno del servidor'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
-    finally:
-        db_session.close()
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 @jwt_required()
@@ -95,15 +125,13 @@ def get_user(user_id):
     try:
         user = service.get_user_by_id(user_id)
         if user:
-            logger.info(f"Consulta de usuario por ID: {user_id}")
-            return jsonify({'id': user.id, 'username': user.username, 'email': getattr(user, 'email', None), 'full_name': getattr(user, 'full_name', None)}), 200, {'Content-Type': 'application/json; charset=utf-8'}
-        logger.warning(f"Usuario no encontrado: {user_id}")
+            logger.info("Consulta de usuario por ID: %s", user_id)
+            return jsonify(get_serializer(User)(user)), 200, {'Content-Type': 'application/json; charset=utf-8'}
+        logger.warning("Usuario no encontrado: %s", user_id)
         return jsonify({'error': 'Usuario no encontrado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
     except Exception as e:
-        logger.error(f"Error obteniendo usuario {user_id}: {str(e)}")
+        logger.error("Error obteniendo usuario %s: %s", user_id, e)
         return jsonify({'error': 'Error interno del servidor'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
-    finally:
-        db_session.close()
 
 @user_bp.route('/registry', methods=['POST'])
 def create_user():
@@ -113,7 +141,7 @@ def create_user():
     Parámetros esperados (JSON):
         username (str): Nombre de usuario.
         password (str): Contraseña del usuario.
-    Respuesta: JSON con los datos del usuario creado.
+    Respuesta: JSON con los datos del usuario creado, o 409 si el username o el email ya existen.
     """
     db_session = get_db_session()
     service = UsersService(db_session)
@@ -128,14 +156,16 @@ def create_user():
             return jsonify({'error': 'El nombre de usuario, la contraseña y el email son obligatorios'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
         user = service.create_user(username, password, email, full_name)
         if not user:
-            return jsonify({'error': 'No se pudo crear el usuario. Puede que el usuario o email ya existan.'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
-        logger.info(f"Usuario creado: {username}")
-        return jsonify({'id': user.id, 'username': user.username, 'email': user.email, 'full_name': user.full_name}), 201, {'Content-Type': 'application/json; charset=utf-8'}
+            return jsonify({'error': 'No se pudo crear el usuario'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+        logger.info("Usuario creado: %s", username)
+        return jsonify(get_serializer(User)(user)), 201, {'Content-Type': 'application/json; charset=utf-8'}
+    except UserConflictError:
+        return user_conflict_response()
+    except HashingSaturatedError as e:
+        return hashing_saturated_response(e)
     except Exception as e:
-        logger.error(f"Error creando usuario: {str(e)}")
+        logger.error("Error creando usuario: %s", e)
         return jsonify({'error': 'Error interno del servidor'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
-    finally:
-        db_session.close()
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 @jwt_required()
@@ -148,7 +178,8 @@ def update_user(user_id):
     Parámetros esperados (JSON):
         username (str, opcional): Nuevo nombre de usuario.
         password (str, opcional): Nueva contraseña del usuario.
-    Respuesta: JSON con los datos del usuario actualizado o 404 si no existe.
+    Respuesta: JSON con los datos del usuario actualizado, 404 si no existe o 409 si el username
+    o el email ya pertenecen a otro usuario.
     """
     db_session = get_db_session()
     service = UsersService(db_session)
@@ -160,15 +191,17 @@ def update_user(user_id):
         full_name = data.get('full_name')
         user = service.update_user(user_id, username, password, email, full_name)
         if user:
-            logger.info(f"Usuario actualizado: {user_id}")
-            return jsonify({'id': user.id, 'username': user.username, 'email': user.email, 'full_name': user.full_name}), 200, {'Content-Type': 'application/json; charset=utf-8'}
-        logger.warning(f"Usuario no encontrado para actualizar: {user_id}")
+            logger.info("Usuario actualizado: %s", user_id)
+            return jsonify(get_serializer(User)(user)), 200, {'Content-Type': 'application/json; charset=utf-8'}
+        logger.warning("Usuario no encontrado para actualizar: %s", user_id)
         return jsonify({'error': 'Usuario no encontrado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+    except UserConflictError:
+        return user_conflict_response()
+    except HashingSaturatedError as e:
+        return hashing_saturated_response(e)
     except Exception as e:
-        logger.error(f"Error actualizando usuario {user_id}: {str(e)}")
+        logger.error("Error actualizando usuario %s: %s", user_id, e)
         return jsonify({'error': 'Error interno del servidor'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
-    finally:
-        db_session.close()
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 @jwt_required()
@@ -185,12 +218,18 @@ def delete_user(user_id):
     try:
         user = service.delete_user(user_id)
         if user:
-            logger.info(f"Usuario eliminado: {user_id}")
+            logger.info("Usuario eliminado: %s", user_id)
             return jsonify({'message': 'Usuario eliminado correctamente'}), 200, {'Content-Type': 'application/json; charset=utf-8'}
-        logger.warning(f"Usuario no encontrado para eliminar: {user_id}")
+        logger.warning("Usuario no encontrado para eliminar: %s", user_id)
         return jsonify({'error': 'Usuario no encontrado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
     except Exception as e:
-        logger.error(f"Error eliminando usuario {user_id}: {str(e)}")
+        logger.error("Error eliminando usuario %s: %s", user_id, e)
         return jsonify({'error': 'Error interno del servidor'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
-    finally:
-        db_session.close()
\ No newline at end of file
+
+def warmup():
+    """
+    Precarga el serializador de usuarios con una página del listado.
+    Debe ejecutarse dentro de un contexto de aplicación; la usa la precarga del servidor prefork (wsgi.py).
+    """
+    users, _ = UsersService(get_db_session()).get_users_page(1)
+    serialize_many(User, users)
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+
+"""
+Configuración de gunicorn para producción:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Variables de entorno:
+- WEB_BIND: dirección de escucha (por defecto 0.0.0.0:$PORT, con PORT=8000).
+- WEB_WORKERS: procesos worker (por defecto uno por CPU). Se exporta al entorno de la aplicación, que
+  reparte con él las CPUs del pool de hashing (HASH_WORKERS por defecto = CPUs / WEB_WORKERS, por worker).
+- WEB_THREADS: hilos por worker (por defecto 4); las peticiones esperan sobre todo por la base de datos.
+- WEB_PRELOAD: true|false, carga y precalienta la aplicación en el maestro antes del fork (por defecto true).
+- WEB_TIMEOUT: segundos sin respuesta antes de reiniciar un worker (por defecto 30).
+- WEB_MAX_REQUESTS: peticiones tras las que se recicla un worker, 0 = nunca (por defecto 0).
+- METRICS_MULTIPROC_DIR: directorio donde los workers escriben sus métricas para que /metrics las sume
+  (por defecto uno temporal, que se elimina al detener el servidor). Se vacía al arrancar.
+
+Con más de un worker el servidor no arranca si el estado que deben compartir los workers es local a
+cada proceso: VERSION_BACKEND=local (ETag y claves de caché distintas por worker), SEARCH_BACKEND=memory
+(índice en memoria que no ve las escrituras de otros workers), CACHE_BACKEND=memory (el usuario que un
+worker actualiza o elimina seguiría en la caché de los demás; usar redis o none) o métricas sin un
+METRICS_MULTIPROC_DIR existente (cada lectura de /metrics vería solo un worker). wsgi.py repite la
+comprobación con el índice de búsqueda resuelto por SEARCH_BACKEND=auto y la caché construida.
+"""
+
+bind = os.getenv('WEB_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_WORKERS', str(os.cpu_count() or 1)))
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_class = 'gthread'
+preload_app = os.getenv('WEB_PRELOAD', 'true').lower() == 'true'
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# La aplicación se carga después de este módulo: ve el número de workers de la configuración
+os.environ['WEB_WORKERS'] = str(workers)
+_metrics_tmpdir = None
+if not os.getenv('METRICS_MULTIPROC_DIR'):
+    _metrics_tmpdir = tempfile.mkdtemp(prefix='api-metrics-')
+    os.environ['METRICS_MULTIPROC_DIR'] = _metrics_tmpdir
+
+def on_starting(server):
+    # server.cfg.workers incluye el valor de -w/--workers en la línea de comandos
+    if server.cfg.workers > 1:
+        local = [f"{name}={value}" for name, value, default in (('VERSION_BACKEND', 'local', ''),
+                                                                 ('SEARCH_BACKEND', 'memory', ''),
+                                                                 ('CACHE_BACKEND', 'memory', 'memory'))
+                 if os.getenv(name, default).lower() == value]
+        if local:
+            raise RuntimeError(f"{', '.join(local)} guarda el estado en cada proceso; con {server.cfg.workers} workers "
+                               "usar VERSION_BACKEND=database|redis, SEARCH_BACKEND=auto|sqlite|mysql y CACHE_BACKEND=redis|none")
+        if (os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+                and not os.path.isdir(os.environ['METRICS_MULTIPROC_DIR'])):
+            raise RuntimeError(f"METRICS_MULTIPROC_DIR={os.environ['METRICS_MULTIPROC_DIR']} no existe: con "
+                               f"{server.cfg.workers} workers /metrics suma los archivos de cada worker en ese directorio")
+
+    if not os.path.isdir(os.environ['METRICS_MULTIPROC_DIR']):
+        return
+    from config.metrics import clear_process_metrics
+    clear_process_metrics(os.environ['METRICS_MULTIPROC_DIR'])
+
+def post_fork(server, worker):
+    # Con preload_app el módulo ya está cargado en el maestro; sin preload se carga aquí, en el worker
+    from wsgi import after_fork
+    after_fork()
+
+def worker_exit(server, worker):
+    # Último volcado del worker antes de salir; child_exit lo suma a los totales de workers terminados
+    from config.metrics import write_process_metrics
+    write_process_metrics(os.environ['METRICS_MULTIPROC_DIR'])
+
+def child_exit(server, worker):
+    from config.metrics import mark_process_dead
+    mark_process_dead(worker.pid, os.environ['METRICS_MULTIPROC_DIR'])
+
+def on_exit(server):
+    if _metrics_tmpdir:
+        shutil.rmtree(_metrics_tmpdir, ignore_errors=True)
@@ -1,38 +1,82 @@
+import time
+_import_start = time.perf_counter()
+
+from config.logging_config import configure_logging
+configure_logging()  # Antes del resto de imports: los módulos de config registran mensajes
+
+import os
+import sys
+import logging
 from flask import Flask
 from config.jwt import JWT_SECRET_KEY, JWT_TOKEN_LOCATION, JWT_ACCESS_TOKEN_EXPIRES, JWT_HEADER_NAME, JWT_HEADER_TYPE
-from config.database import engine
-from models.db import Base
+from config.database import get_engine_pools, migrate, register_session_teardown, start_connectivity_check
+from config.metrics import register_metrics
+from controllers.serializers import register_json_provider
 from controllers.product_controllers import product_bp
 from controllers.user_controllers import user_bp, register_jwt_error_handlers
 from flask_jwt_extended import JWTManager
-from models.product_model import Categoria, Proveedor, Descuento, Impuesto, Producto
-from models.user_model import User
+logger = logging.getLogger(__name__)
+
+IMPORT_SECONDS = time.perf_counter() - _import_start
+# Crear el esquema al arrancar (solo para desarrollo; en producción usar el comando migrate)
+DB_AUTO_MIGRATE = os.getenv('DB_AUTO_MIGRATE', 'false').lower() == 'true'
+
+def create_app():
+    """
+    Crea y configura la aplicación Flask.
+    No abre conexiones a la base de datos: los engines se crean en la primera petición y la prueba
+    de conexión a MySQL corre en segundo plano. El esquema se crea con el comando migrate.
+    """
+    start = time.perf_counter()
+    app = Flask(__name__)
+
+    # Proveedor JSON (orjson si está instalado) con soporte de Decimal
+    register_json_provider(app)
 
-app = Flask(__name__)
+    # Configuración de JWT
+    app.config['JWT_SECRET_KEY'] = JWT_SECRET_KEY  # Clave secreta para el JWT
+    app.config['JWT_TOKEN_LOCATION'] = JWT_TOKEN_LOCATION  # Ubicación del token (en los headers)
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = JWT_ACCESS_TOKEN_EXPIRES  # Tiempo de expiración del token
+    app.config['JWT_HEADER_NAME'] = JWT_HEADER_NAME  # Nombre del header donde se encuentra el token
+    app.config['JWT_HEADER_TYPE'] = JWT_HEADER_TYPE  # Tipo de encabezado del token (Bearer)
 
-# Configuración de JWT
-app.config['JWT_SECRET_KEY'] = JWT_SECRET_KEY  # Clave secreta para el JWT
-app.config['JWT_TOKEN_LOCATION'] = JWT_TOKEN_LOCATION  # Ubicación del token (en los headers)
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = JWT_ACCESS_TOKEN_EXPIRES  # Tiempo de expiración del token
-app.config['JWT_HEADER_NAME'] = JWT_HEADER_NAME  # Nombre del header donde se encuentra el token
-app.config['JWT_HEADER_TYPE'] = JWT_HEADER_TYPE  # Tipo de encabezado del token (Bearer)
+    # Inicializa el manager de JWT
+    JWTManager(app)
 
-# Inicializa el manager de JWT
-jwt = JWTManager(app)
+    # Registrar blueprints
+    app.register_blueprint(product_bp)  # Ruta de productos
+    app.register_blueprint(user_bp)  # Ruta de usuarios
 
-# Crear tablas ANTES de registrar blueprints y ejecutar la aplicación
-print("Verificando y creando tablas de base de datos si es necesario...")
-Base.metadata.create_all(engine)  # Crear todas las tablas en la base de datos si no existen
-print("Tablas listas.")
-print("Base de datos usada:", engine.url)
+    # Registrar manejadores personalizados de error JWT
+    register_jwt_error_handlers(app)
 
-# Registrar blueprints
-app.register_blueprint(product_bp)  # Ruta de productos
-app.register_blueprint(user_bp)  # Ruta de usuarios
+    # Cerrar la sesión de base de datos al final de cada petición (devuelve la conexión al pool)
+    register_session_teardown(app)
 
-# Registrar manejadores personalizados de error JWT
-register_jwt_error_handlers(app)
+    # Métricas de rendimiento: latencia por ruta, consultas SQL por petición, /metrics y Server-Timing
+    register_metrics(app, get_engine_pools)
+
+    @app.cli.command('migrate')
+    def migrate_command():
+        """Crea las tablas e índices que falten en la base de datos."""
+        migrate()
+
+    # Prueba de conexión a MySQL en segundo plano (no bloquea el arranque)
+    start_connectivity_check()
+    if DB_AUTO_MIGRATE:
+        migrate()
+
+    startup = time.perf_counter() - start
+    # Arranque del proceso = imports de la aplicación + create_app (lo que espera un worker nuevo)
+    app.config['STARTUP_SECONDS'] = {'boot': IMPORT_SECONDS + startup, 'import': IMPORT_SECONDS, 'create_app': startup}
+    logger.info("Aplicación lista en %.1f ms (imports %.1f ms, create_app %.1f ms)",
+                (IMPORT_SECONDS + startup) * 1000, IMPORT_SECONDS * 1000, startup * 1000)
+    return app
+
+app = create_app()
 
 if __name__ == "__main__":
+    migrate()  # En desarrollo, `python main.py` crea el esquema antes de arrancar
+    if sys.argv[1:] == ['migrate']:
+        sys.exit(0)
     app.run(debug=True)
-
@@ -1,8 +1,7 @@
 import logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from models.db import Base
 
@@ -59,9 +58,16 @@ class Impuesto(Base):
 La clase Producto representa un producto en el sistema.
 Cada instancia corresponde a un producto específico y está mapeada a la tabla 'productos'.
 Permite gestionar la información de los productos y establecer relaciones con categoría, proveedor, descuento e impuesto.
+Los índices compuestos respaldan los filtros de GET /productos (categoría o proveedor con rango de precio)
+y el índice sobre el nombre respalda la búsqueda por prefijo.
 """
 class Producto(Base):
     __tablename__ = 'productos'
+    __table_args__ = (
+        Index('ix_productos_categoria_precio', 'id_categoria', 'Precio'),
+        Index('ix_productos_proveedor_precio', 'id_proveedor', 'Precio'),
+        Index('ix_productos_nombre', 'nombre_producto'),
+    )
     id_producto = Column(Integer, primary_key=True, index=True)
     nombre_producto = Column(String(255), nullable=False)
     Precio = Column(Numeric(10, 2), nullable=False)
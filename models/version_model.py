@@ -0,0 +1,19 @@
+import logging
+logger = logging.getLogger(__name__)
+
+from sqlalchemy import Column, Integer, String, Float
+from models.db import Base
+
+class ResourceVersion(Base):
+    """
+    Versión de cada recurso para los GET condicionales (ETag / Last-Modified).
+    La incrementan los repositorios una vez por transacción de escritura confirmada
+    (ver repositories/versioning.py).
+    """
+    __tablename__ = 'resource_versions'
+    # Nombre del recurso, igual al de su tabla (productos, categorias, ...)
+    resource = Column(String(50), primary_key=True)
+    # Contador de transacciones de escritura sobre la tabla
+    version = Column(Integer, nullable=False, default=0)
+    # Timestamp Unix de la última escritura
+    updated_at = Column(Float, nullable=False)
@@ -0,0 +1,22 @@
+import logging
+logger = logging.getLogger(__name__)
+
+def keyset_paginate(query, key_column, limit: int, after: int = None, session=None):
+    """
+    Pagina una consulta por cursor (keyset) sobre una columna de clave primaria.
+    En lugar de OFFSET filtra por `key_column > after`, de modo que cualquier página
+    cuesta lo mismo que la primera (el índice de la clave primaria resuelve el salto).
+    `query` puede ser una Query del ORM o un select() de Core; en ese caso `session` lo ejecuta.
+    Retorna una tupla (items, next_cursor); next_cursor es None en la última página.
+    """
+    if after is not None:
+        query = query.filter(key_column > after)
+    # Se pide un elemento extra para saber si existe una página siguiente
+    query = query.order_by(key_column).limit(limit + 1)
+    rows = session.execute(query).all() if session is not None else query.all()
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = None
+    if has_more and items:
+        next_cursor = getattr(items[-1], key_column.key)
+    return items, next_cursor
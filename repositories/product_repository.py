@@ -1,9 +1,15 @@
 import logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from models.product_model import Categoria, Proveedor, Descuento, Impuesto, Producto
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session, Query, joinedload
+from sqlalchemy.exc import SQLAlchemyError
+from repositories.pagination import keyset_paginate
+from repositories.search_index import SearchIndex, get_search_index
+from repositories.versioning import bump_version
+from repositories.readonly import select_rows, fetch_all, fetch_first
+from repositories.writes import insert_row, update_row, delete_row
 
 class CategoriaRepository:
     """
@@ -16,14 +22,17 @@ class CategoriaRepository:
 
     def get_all_categorias(self):
         logger.info("Obteniendo todas las categorías desde el repositorio")
-        return self.db.query(Categoria).all()
+        return fetch_all(self.db, select_rows(Categoria))
+
+    def get_categorias_page(self, limit: int, after: int = None):
+        logger.info("Obteniendo página de categorías (limit=%s, after=%s)", limit, after)
+        return keyset_paginate(select_rows(Categoria), Categoria.id_categoria, limit, after, session=self.db)
 
     def create_categoria(self, nombre_categoria: str):
-        logger.info(f"Creando categoría: {nombre_categoria}")
-        new_categoria = Categoria(nombre_categoria=nombre_categoria)
-        self.db.add(new_categoria)
+        logger.info("Creando categoría: %s", nombre_categoria)
+        new_categoria = insert_row(self.db, Categoria, {'nombre_categoria': nombre_categoria})
         self.db.commit()
-        self.db.refresh(new_categoria)
+        bump_version('categorias', self.db)
         return new_categoria
 
 class ProveedorRepository:
@@ -37,19 +46,22 @@ class ProveedorRepository:
 
     def get_all_proveedores(self):
         logger.info("Obteniendo todos los proveedores desde el repositorio")
-        return self.db.query(Proveedor).all()
+        return fetch_all(self.db, select_rows(Proveedor))
+
+    def get_proveedores_page(self, limit: int, after: int = None):
+        logger.info("Obteniendo página de proveedores (limit=%s, after=%s)", limit, after)
+        return keyset_paginate(select_rows(Proveedor), Proveedor.id_proveedor, limit, after, session=self.db)
 
     def create_proveedor(self, nombre: str, telefono: str = None, email: str = None, direccion: str = None):
-        logger.info(f"Creando proveedor: {nombre}")
-        new_proveedor = Proveedor(
-            nombre=nombre,
-            telefono=telefono,
-            email=email,
-            direccion=direccion
-        )
-        self.db.add(new_proveedor)
+        logger.info("Creando proveedor: %s", nombre)
+        new_proveedor = insert_row(self.db, Proveedor, {
+            'nombre': nombre,
+            'telefono': telefono,
+            'email': email,
+            'direccion': direccion
+        })
         self.db.commit()
-        self.db.refresh(new_proveedor)
+        bump_version('proveedores', self.db)
         return new_proveedor
 
 class DescuentoRepository:
@@ -63,14 +75,13 @@ class DescuentoRepository:
 
     def get_all_descuentos(self):
         logger.info("Obteniendo todos los descuentos desde el repositorio")
-        return self.db.query(Descuento).all()
+        return fetch_all(self.db, select_rows(Descuento))
 
     def create_descuento(self, nombre: str, porcentaje: float):
-        logger.info(f"Creando descuento: {nombre}")
-        new_descuento = Descuento(nombre=nombre, porcentaje=porcentaje)
-        self.db.add(new_descuento)
+        logger.info("Creando descuento: %s", nombre)
+        new_descuento = insert_row(self.db, Descuento, {'nombre': nombre, 'porcentaje': porcentaje})
         self.db.commit()
-        self.db.refresh(new_descuento)
+        bump_version('descuentos', self.db)
         return new_descuento
 
 class ImpuestoRepository:
@@ -84,84 +95,351 @@ class ImpuestoRepository:
 
     def get_all_impuestos(self):
         logger.info("Obteniendo todos los impuestos desde el repositorio")
-        return self.db.query(Impuesto).all()
+        return fetch_all(self.db, select_rows(Impuesto))
 
     def create_impuesto(self, nombre: str, porcentaje: float):
-        logger.info(f"Creando impuesto: {nombre}")
-        new_impuesto = Impuesto(nombre=nombre, porcentaje=porcentaje)
-        self.db.add(new_impuesto)
+        logger.info("Creando impuesto: %s", nombre)
+        new_impuesto = insert_row(self.db, Impuesto, {'nombre': nombre, 'porcentaje': porcentaje})
         self.db.commit()
-        self.db.refresh(new_impuesto)
+        bump_version('impuestos', self.db)
         return new_impuesto
 
+def _prefix_upper_bound(prefix: str):
+    """
+    Menor texto mayor que todos los que empiezan por `prefix`, o None si no existe.
+    Los U+10FFFF finales no se pueden incrementar y se descartan: con `nombre >= prefix` el rango
+    sigue conteniendo solo los nombres con el prefijo. Se salta el rango de surrogates, que los
+    drivers no pueden codificar.
+    """
+    stem = prefix.rstrip('\U0010ffff')
+    if not stem:
+        return None
+    following = ord(stem[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000
+    return stem[:-1] + chr(following)
+
 class ProductoRepository:
     """
     Repositorio para la gestión de productos en la base de datos.
     Proporciona métodos para crear, consultar, actualizar y eliminar productos.
     """
 
-    def __init__(self, db_session: Session):
+    # Relaciones que pueden cargarse junto con el producto (?expand=...)
+    EXPANDABLE = {
+        'categoria': Producto.categoria,
+        'proveedor': Producto.proveedor,
+        'descuento': Producto.descuento,
+        'impuesto': Producto.impuesto,
+    }
+
+    def __init__(self, db_session: Session, search_index: SearchIndex = None):
         self.db = db_session
+        self._search_index = search_index
 
-    def get_all_productos(self):
+    @property
+    def search_index(self) -> SearchIndex:
+        """
+        Índice de búsqueda de nombres, resuelto al primer uso según el engine de la sesión.
+        """
+        if self._search_index is None:
+            self._search_index = get_search_index(self.db.get_bind())
+        return self._search_index
+
+    def search_productos(self, query: str, limit: int, offset: int = 0):
+        """
+        Busca productos por nombre en el índice de texto completo.
+        Retorna una lista de tuplas (fila del producto, puntuación) en orden de relevancia.
+        """
+        logger.info("Buscando productos: %r (limit=%s, offset=%s)", query, limit, offset)
+        ranked = self.search_index.search(self.db, query, limit, offset)
+        if not ranked:
+            return []
+        ids = [producto_id for producto_id, _ in ranked]
+        rows = fetch_all(self.db, select_rows(Producto).filter(Producto.id_producto.in_(ids)))
+        productos = {p.id_producto: p for p in rows}
+        # Se conserva el orden del ranking; ids ya eliminados se descartan
+        return [(productos[pid], score) for pid, score in ranked if pid in productos]
+
+    def _query_productos(self, expand=(), filters=None, columns=None):
+        """
+        Construye la consulta base de productos cargando de forma anticipada (JOIN) las
+        relaciones indicadas en `expand`, para que una página expandida cueste una sola consulta
+        en lugar de una consulta adicional por producto y relación.
+        Sin `expand` es una lectura de solo lectura: un select() de Core que retorna filas (Row)
+        sin mapa de identidad ni construcción de instancias, limitado a `columns` si se indican.
+        Con `expand` se usa el ORM, que es quien resuelve las relaciones.
+        """
+        if expand:
+            query = self.db.query(Producto)
+            for name in expand:
+                query = query.options(joinedload(self.EXPANDABLE[name]))
+        else:
+            query = select_rows(Producto, columns)
+        if filters:
+            query = self._apply_filters(query, filters)
+        return query
+
+    def _fetch_all(self, query):
+        return query.all() if isinstance(query, Query) else fetch_all(self.db, query)
+
+    @staticmethod
+    def _apply_filters(query, filters: dict):
+        """
+        Aplica los filtros de búsqueda de productos. Todos usan predicados indexables:
+        - id_categoria / id_proveedor con precio_min / precio_max: índices compuestos (id, Precio).
+        - nombre: prefijo como rango `nombre >= prefijo AND nombre < siguiente`, que usa el índice
+          del nombre tanto en SQLite como en MySQL (a diferencia de LIKE en SQLite). Sin cota
+          superior si el prefijo es solo U+10FFFF (ver _prefix_upper_bound).
+          La comparación sigue la collation de la base: sensible a mayúsculas en SQLite, no en MySQL.
+        - en_stock: Stock > 0 (o Stock = 0 si es False).
+        """
+        if filters.get('id_categoria') is not None:
+            query = query.filter(Producto.id_categoria == filters['id_categoria'])
+        if filters.get('id_proveedor') is not None:
+            query = query.filter(Producto.id_proveedor == filters['id_proveedor'])
+        if filters.get('precio_min') is not None:
+            query = query.filter(Producto.Precio >= filters['precio_min'])
+        if filters.get('precio_max') is not None:
+            query = query.filter(Producto.Precio <= filters['precio_max'])
+        if filters.get('en_stock') is not None:
+            query = query.filter(Producto.Stock > 0 if filters['en_stock'] else Producto.Stock <= 0)
+        prefix = filters.get('nombre')
+        if prefix:
+            query = query.filter(Producto.nombre_producto >= prefix)
+            upper = _prefix_upper_bound(prefix)
+            if upper is not None:
+                query = query.filter(Producto.nombre_producto < upper)
+        return query
+
+    def get_all_productos(self, expand=(), filters=None, columns=None):
         logger.info("Obteniendo todos los productos desde el repositorio")
-        return self.db.query(Producto).all()
+        return self._fetch_all(self._query_productos(expand, filters, columns))
+
+    def get_productos_page(self, limit: int, after: int = None, expand=(), filters=None, columns=None):
+        """
+        Con `columns` la proyección debe incluir id_producto, que es la clave del cursor.
+        """
+        logger.info("Obteniendo página de productos (limit=%s, after=%s)", limit, after)
+        query = self._query_productos(expand, filters, columns)
+        return keyset_paginate(query, Producto.id_producto, limit, after, session=None if expand else self.db)
+
+    def iter_productos(self, batch_size: int = 1000):
+        """
+        Itera todos los productos en lotes de `batch_size` filas sin cargar la tabla completa.
+        Usa yield_per, que en MySQL activa un cursor del lado del servidor (stream_results).
+        Retorna filas de solo lectura.
+        """
+        logger.info("Iterando productos en lotes de %s", batch_size)
+        statement = select_rows(Producto).order_by(Producto.id_producto).execution_options(yield_per=batch_size)
+        return self.db.execute(statement)
 
-    def get_producto_by_id(self, producto_id: int):
-        logger.info(f"Buscando producto por ID: {producto_id}")
-        return self.db.query(Producto).filter(Producto.id_producto == producto_id).first()
+    def get_producto_by_id(self, producto_id: int, expand=(), read_only: bool = False):
+        """
+        Con read_only=True retorna una fila de solo lectura (o la instancia ORM si hay `expand`);
+        con read_only=False retorna la instancia ORM, rastreada por la sesión.
+        """
+        logger.info("Buscando producto por ID: %s", producto_id)
+        if not read_only:
+            return self.db.query(Producto).filter(Producto.id_producto == producto_id).first()
+        query = self._query_productos(expand).filter(Producto.id_producto == producto_id)
+        return query.first() if expand else fetch_first(self.db, query)
+
+    def get_productos_by_ids(self, ids: list, expand=()):
+        """
+        Recupera varios productos con una sola consulta `IN`.
+        Retorna un diccionario {id_producto: producto} con los que existen.
+        """
+        logger.info("Buscando %s productos por ID", len(ids))
+        if not ids:
+            return {}
+        productos = self._fetch_all(self._query_productos(expand).filter(Producto.id_producto.in_(ids)))
+        return {p.id_producto: p for p in productos}
 
     def create_producto(self, nombre_producto: str, precio: float, stock: int,
                         id_categoria: int, id_descuento: int = None,
                         id_iva: int = None, id_proveedor: int = None):
-        logger.info(f"Creando producto: {nombre_producto}")
-        new_producto = Producto(
-            nombre_producto=nombre_producto,
-            Precio=precio,
-            Stock=stock,
-            id_categoria=id_categoria,
-            id_descuento=id_descuento,
-            id_iva=id_iva,
-            id_proveedor=id_proveedor
-        )
-        self.db.add(new_producto)
-        self.db.commit()
-        self.db.refresh(new_producto)
+        logger.info("Creando producto: %s", nombre_producto)
+        try:
+            new_producto = insert_row(self.db, Producto, {
+                'nombre_producto': nombre_producto,
+                'Precio': precio,
+                'Stock': stock,
+                'id_categoria': id_categoria,
+                'id_descuento': id_descuento,
+                'id_iva': id_iva,
+                'id_proveedor': id_proveedor
+            })
+            self.search_index.add(self.db, new_producto.id_producto, new_producto.nombre_producto)
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        bump_version('productos', self.db)
         return new_producto
 
+    def bulk_create_productos(self, rows: list):
+        """
+        Inserta un lote de productos en una sola transacción usando un INSERT con executemany.
+        Cada elemento de `rows` es un diccionario con las columnas de Producto.
+        Si el lote falla se revierte completo y se relanza la excepción.
+        Los ids generados para el índice de búsqueda se obtienen de las propias sentencias INSERT
+        (RETURNING o la clave insertada de cada fila), nunca de lecturas posteriores de la tabla.
+        """
+        logger.info("Insertando lote de %s productos", len(rows))
+        statement = insert(Producto.__table__)
+        try:
+            if not self.search_index.needs_rows:
+                # El índice lo mantiene la base de datos: un único executemany sin recoger ids
+                self.db.execute(statement, rows)
+                self.search_index.add_many(self.db, [(None, row['nombre_producto']) for row in rows])
+            elif self.db.get_bind().dialect.insert_returning:
+                # executemany con RETURNING (insertmanyvalues): ids y nombres en el mismo viaje
+                nuevos = self.db.execute(
+                    statement.returning(Producto.id_producto, Producto.nombre_producto), rows
+                ).all()
+                self.search_index.add_many(self.db, nuevos)
+            else:
+                nuevos = [
+                    (self.db.execute(statement, row).inserted_primary_key[0], row['nombre_producto'])
+                    for row in rows
+                ]
+                self.search_index.add_many(self.db, nuevos)
+            self.db.commit()
+            bump_version('productos', self.db)
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        return len(rows)
+
     def update_producto(self, producto_id: int, nombre_producto: str = None,
                         precio: float = None, stock: int = None,
                         id_categoria: int = None, id_descuento: int = None,
                         id_iva: int = None, id_proveedor: int = None):
-        producto = self.get_producto_by_id(producto_id)
-        if producto:
-            logger.info(f"Actualizando producto: {producto_id}")
+        """
+        Actualiza el producto con un único UPDATE ... RETURNING, sin leer la fila antes.
+        Retorna la fila actualizada o None si el producto no existe.
+        """
+        values = {
+            'nombre_producto': nombre_producto or None,
+            'Precio': precio,
+            'Stock': stock,
+            'id_categoria': id_categoria,
+            'id_descuento': id_descuento,
+            'id_iva': id_iva,
+            'id_proveedor': id_proveedor
+        }
+        values = {column: value for column, value in values.items() if value is not None}
+        if not values:
+            return self.get_producto_by_id(producto_id, read_only=True)
+        try:
+            producto = update_row(self.db, Producto, Producto.id_producto, producto_id, values)
+            if producto is None:
+                self.db.rollback()
+                logger.warning("Producto no encontrado para actualizar: %s", producto_id)
+                return None
+            logger.info("Actualizando producto: %s", producto_id)
             if nombre_producto:
-                producto.nombre_producto = nombre_producto
-            if precio is not None:
-                producto.Precio = precio
-            if stock is not None:
-                producto.Stock = stock
-            if id_categoria is not None:
-                producto.id_categoria = id_categoria
-            if id_descuento is not None:
-                producto.id_descuento = id_descuento
-            if id_iva is not None:
-                producto.id_iva = id_iva
-            if id_proveedor is not None:
-                producto.id_proveedor = id_proveedor
+                self.search_index.add(self.db, producto_id, nombre_producto)
             self.db.commit()
-            self.db.refresh(producto)
-        else:
-            logger.warning(f"Producto no encontrado para actualizar: {producto_id}")
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        bump_version('productos', self.db)
         return producto
 
-    def delete_producto(self, producto_id: int):
-        producto = self.get_producto_by_id(producto_id)
-        if producto:
-            logger.info(f"Eliminando producto: {producto_id}")
-            self.db.delete(producto)
+    def _decrement_stock(self, producto_id: int, cantidad: int):
+        """
+        Ejecuta `UPDATE productos SET Stock = Stock - cantidad WHERE id = ? AND Stock >= cantidad`
+        dentro de la transacción actual, sin leer la fila antes (sin read-modify-write).
+        Una cantidad negativa repone stock. Retorna una tupla (stock resultante, error).
+        """
+        stmt = (
+            update(Producto)
+            .where(Producto.id_producto == producto_id, Producto.Stock >= cantidad)
+            .values(Stock=Producto.Stock - cantidad)
+            .execution_options(synchronize_session=False)
+        )
+        if self.db.get_bind().dialect.update_returning:
+            nuevo_stock = self.db.execute(stmt.returning(Producto.Stock)).scalar()
+        else:
+            result = self.db.execute(stmt)
+            nuevo_stock = None
+            if result.rowcount:
+                # La fila ya quedó bloqueada por el UPDATE dentro de esta transacción
+                nuevo_stock = self.db.execute(
+                    select(Producto.Stock).where(Producto.id_producto == producto_id)
+                ).scalar()
+        if nuevo_stock is not None:
+            return nuevo_stock, None
+        # La condición falló: distinguir producto inexistente de stock insuficiente
+        existe = self.db.execute(select(Producto.id_producto).where(Producto.id_producto == producto_id)).first()
+        return None, 'stock_insuficiente' if existe else 'no_encontrado'
+
+    def adjust_stock(self, producto_id: int, cantidad: int):
+        """
+        Descuenta (o repone, con cantidad negativa) el stock de un producto de forma atómica.
+        Retorna una tupla (stock resultante, error); error es 'no_encontrado' o 'stock_insuficiente'.
+        """
+        logger.info("Ajustando stock del producto %s: -%s", producto_id, cantidad)
+        try:
+            nuevo_stock, error = self._decrement_stock(producto_id, cantidad)
+            if error:
+                self.db.rollback()
+                return None, error
             self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        bump_version('productos', self.db)
+        return nuevo_stock, None
+
+    def adjust_stock_batch(self, lineas: list, atomic: bool = True):
+        """
+        Aplica varios ajustes de stock (tuplas (id_producto, cantidad)) en una sola transacción.
+        Con atomic=True, si alguna línea falla no se aplica ninguna; con atomic=False se aplican
+        las líneas válidas (una línea fallida no modifica nada, su UPDATE no afecta filas).
+        Los UPDATE se ejecutan en orden de id_producto, no en el de la petición: dos lotes concurrentes
+        bloquean las filas en el mismo orden y no pueden quedar en deadlock (InnoDB).
+        Retorna una lista de resultados por línea, en el orden de `lineas`, y si se confirmaron los cambios.
+        """
+        logger.info("Ajustando stock en lote: %s líneas (atomic=%s)", len(lineas), atomic)
+        resultados = [None] * len(lineas)
+        try:
+            for index, (producto_id, cantidad) in sorted(enumerate(lineas), key=lambda linea: linea[1][0]):
+                nuevo_stock, error = self._decrement_stock(producto_id, cantidad)
+                resultados[index] = {'id_producto': producto_id, 'cantidad': cantidad, 'stock': nuevo_stock, 'error': error}
+            fallidas = any(r['error'] for r in resultados)
+            aplicado = not (atomic and fallidas) and any(not r['error'] for r in resultados)
+            if aplicado:
+                self.db.commit()
+            else:
+                self.db.rollback()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        if aplicado:
+            bump_version('productos', self.db)
         else:
-            logger.warning(f"Producto no encontrado para eliminar: {producto_id}")
+            for r in resultados:
+                r['stock'] = None
+        return resultados, aplicado
+
+    def delete_producto(self, producto_id: int):
+        """
+        Elimina el producto con un único DELETE ... RETURNING. Retorna la fila eliminada o None.
+        """
+        try:
+            producto = delete_row(self.db, Producto, Producto.id_producto, producto_id)
+            if producto is None:
+                self.db.rollback()
+                logger.warning("Producto no encontrado para eliminar: %s", producto_id)
+                return None
+            logger.info("Eliminando producto: %s", producto_id)
+            self.search_index.remove(self.db, producto_id)
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        bump_version('productos', self.db)
         return producto
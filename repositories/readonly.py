@@ -0,0 +1,33 @@
+import logging
+from sqlalchemy import select
+logger = logging.getLogger(__name__)
+
+"""
+Lecturas de solo lectura.
+Los GET solo leen los datos, por lo que no necesitan instancias ORM rastreadas por la sesión
+(mapa de identidad, estado de cambios, carga perezosa). Estas funciones ejecutan un select() de
+Core sobre las columnas de la tabla y retornan filas (Row): tuplas con acceso por nombre de
+columna (fila.id_producto), que en estos modelos coincide con el nombre del atributo.
+"""
+
+def select_rows(model, columns=None, exclude=()):
+    """
+    select() de Core sobre las columnas de la tabla de `model`.
+    `columns` limita la consulta a esos nombres de columna; `exclude` omite columnas (ej. contraseñas).
+    """
+    table = model.__table__
+    if columns:
+        return select(*[table.c[name] for name in columns])
+    return select(*[column for column in table.columns if column.key not in exclude])
+
+def fetch_all(db, statement):
+    """
+    Ejecuta la consulta y retorna todas las filas.
+    """
+    return db.execute(statement).all()
+
+def fetch_first(db, statement):
+    """
+    Ejecuta la consulta y retorna la primera fila o None.
+    """
+    return db.execute(statement.limit(1)).first()
@@ -0,0 +1,434 @@
+import os
+import re
+import abc
+import bisect
+import logging
+import threading
+import unicodedata
+from collections import defaultdict
+from sqlalchemy import text, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+logger = logging.getLogger(__name__)
+
+"""
+Índice de búsqueda de texto completo sobre el nombre de los productos.
+El backend se elige según la base de datos en uso (variable SEARCH_BACKEND=auto|memory):
+- SQLite: tabla virtual FTS5 (productos_fts), ranking bm25 y búsqueda por prefijo.
+- MySQL: índice FULLTEXT sobre productos.nombre_producto en modo booleano con prefijos.
+- Memoria: índice invertido en Python con coincidencia exacta, por prefijo y difusa.
+  Se usa si la base no ofrece un motor de texto completo; cada proceso mantiene su propia copia.
+
+Los tres toleran errores de escritura con la misma regla: un término de la consulta de
+FUZZY_MIN_LENGTH letras o más coincide también con los términos indexados que empiezan por la misma
+letra y están a distancia de edición 1. Los backends SQL leen esos términos del vocabulario del
+índice (tabla fts5vocab productos_fts_vocab en SQLite, tabla productos_terms en MySQL) y los agregan
+a la consulta como alternativas del término escrito. productos_terms solo crece: un término que ya
+no está en ningún producto es una alternativa que no coincide con nada.
+
+Las tablas e índices de texto completo se crean con el comando migrate (create_search_schema),
+nunca desde una petición. ProductoRepository mantiene el índice sincronizado en sus rutas de
+creación, actualización y eliminación.
+"""
+
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Longitud mínima de un término de la consulta para buscar coincidencias difusas
+FUZZY_MIN_LENGTH = 4
+
+def tokenize(value: str):
+    """
+    Normaliza un texto (minúsculas, sin tildes) y lo divide en términos.
+    """
+    normalized = unicodedata.normalize('NFKD', value or '')
+    normalized = ''.join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
+    return _TOKEN_RE.findall(normalized)
+
+class SearchIndex(abc.ABC):
+    """
+    Interfaz común de los índices de búsqueda. Las operaciones de escritura reciben la sesión
+    del repositorio para ejecutarse dentro de la misma transacción que el cambio del producto.
+    """
+
+    # Si add/add_many necesitan los ids de las filas escritas (False cuando el índice lo mantiene la
+    # propia base de datos: add_many recibe entonces tuplas (None, nombre_producto))
+    needs_rows = True
+
+    def ensure_ready(self, db):
+        """
+        Prepara el estado en proceso que necesite el índice (solo lecturas, nunca DDL ni commit).
+        """
+
+    @abc.abstractmethod
+    def add(self, db, producto_id: int, nombre: str):
+        pass
+
+    def add_many(self, db, rows):
+        """
+        Indexa varios productos; `rows` son tuplas (id_producto, nombre_producto).
+        """
+        for producto_id, nombre in rows:
+            self.add(db, producto_id, nombre)
+
+    @abc.abstractmethod
+    def remove(self, db, producto_id: int):
+        pass
+
+    @abc.abstractmethod
+    def search(self, db, query: str, limit: int, offset: int = 0):
+        """
+        Retorna una lista de tuplas (id_producto, puntuación) ordenada por relevancia.
+        """
+
+class SQLiteFTSIndex(SearchIndex):
+    """
+    Índice sobre una tabla virtual FTS5 cuyo rowid es el id del producto.
+    """
+
+    def add(self, db, producto_id: int, nombre: str):
+        db.execute(text("DELETE FROM productos_fts WHERE rowid = :id"), {'id': producto_id})
+        db.execute(text("INSERT INTO productos_fts (rowid, nombre_producto) VALUES (:id, :nombre)"),
+                   {'id': producto_id, 'nombre': nombre})
+
+    def add_many(self, db, rows):
+        params = [{'id': producto_id, 'nombre': nombre} for producto_id, nombre in rows]
+        if params:
+            db.execute(text("DELETE FROM productos_fts WHERE rowid = :id"), params)
+            db.execute(text("INSERT INTO productos_fts (rowid, nombre_producto) VALUES (:id, :nombre)"), params)
+
+    def remove(self, db, producto_id: int):
+        db.execute(text("DELETE FROM productos_fts WHERE rowid = :id"), {'id': producto_id})
+
+    VOCABULARY_QUERY = text(
+        "SELECT term FROM productos_fts_vocab WHERE term >= :first AND term < :after "
+        "AND length(term) BETWEEN :shortest AND :longest"
+    )
+
+    def search(self, db, query: str, limit: int, offset: int = 0):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Cada término se cita (sin operadores del usuario) y se busca por prefijo o por sus variantes
+        groups = []
+        for term in terms:
+            alternatives = [_fts_quote(term) + '*'] + [_fts_quote(c) for c in _fuzzy_terms(db, self.VOCABULARY_QUERY, term)]
+            groups.append(alternatives[0] if len(alternatives) == 1 else '(' + ' OR '.join(alternatives) + ')')
+        match = ' AND '.join(groups)
+        rows = db.execute(text(
+            "SELECT rowid, bm25(productos_fts) AS score FROM productos_fts "
+            "WHERE productos_fts MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+        ), {'match': match, 'limit': limit, 'offset': offset})
+        # bm25 es menor cuanto más relevante; se invierte el signo para exponerla como puntuación
+        return [(row[0], -row[1]) for row in rows]
+
+class MySQLFullTextIndex(SearchIndex):
+    """
+    Índice FULLTEXT de MySQL. MySQL lo mantiene al modificar la tabla; add/add_many solo
+    registran los términos de los nombres en productos_terms, el vocabulario de la búsqueda difusa.
+    """
+
+    needs_rows = False
+
+    VOCABULARY_QUERY = text(
+        "SELECT term FROM productos_terms WHERE term >= :first AND term < :after "
+        "AND CHAR_LENGTH(term) BETWEEN :shortest AND :longest"
+    )
+
+    def add(self, db, producto_id: int, nombre: str):
+        _insert_terms(db, [nombre])
+
+    def add_many(self, db, rows):
+        _insert_terms(db, [nombre for _, nombre in rows])
+
+    def remove(self, db, producto_id: int):
+        pass
+
+    def search(self, db, query: str, limit: int, offset: int = 0):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # +(a* b c): el producto debe contener el prefijo escrito o alguna de sus variantes
+        groups = []
+        for term in terms:
+            fuzzy = _fuzzy_terms(db, self.VOCABULARY_QUERY, term)
+            groups.append('+(' + ' '.join([term + '*'] + fuzzy) + ')' if fuzzy else '+' + term + '*')
+        match = ' '.join(groups)
+        rows = db.execute(text(
+            "SELECT id_producto, MATCH(nombre_producto) AGAINST (:match IN BOOLEAN MODE) AS score "
+            "FROM productos WHERE MATCH(nombre_producto) AGAINST (:match IN BOOLEAN MODE) "
+            "ORDER BY score DESC, id_producto LIMIT :limit OFFSET :offset"
+        ), {'match': match, 'limit': limit, 'offset': offset})
+        return [(row[0], float(row[1])) for row in rows]
+
+class InMemoryInvertedIndex(SearchIndex):
+    """
+    Índice invertido en memoria: término -> conjunto de ids de producto.
+    Cada término de la consulta puntúa 1.0 por coincidencia exacta, 0.5 por prefijo y
+    0.25 por coincidencia difusa (distancia de edición 1, términos de FUZZY_MIN_LENGTH letras o más).
+    Solo se retornan productos que coinciden con todos los términos de la consulta.
+    Los cambios de add/remove se aplican cuando la sesión confirma la transacción (after_commit)
+    y se descartan si se revierte, para no exponer productos que no llegaron a la base de datos.
+    Los que se confirman mientras se construye el índice se guardan y se aplican al terminar.
+    """
+
+    EXACT_SCORE = 1.0
+    PREFIX_SCORE = 0.5
+    FUZZY_SCORE = 0.25
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._docs = {}
+        self._terms = []  # Términos ordenados para la búsqueda por prefijo (bisect)
+        self._ready = False
+        self._backlog = None  # Cambios confirmados durante la construcción, en orden
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+
+    def ensure_ready(self, db):
+        if self._ready:
+            return
+        with self._build_lock:
+            if self._ready:
+                return
+            logger.info("Construyendo índice invertido de productos en memoria")
+            with self._lock:
+                self._backlog = []
+            # Conexión propia: su lectura empieza después de activar el backlog, así que cada cambio
+            # confirmado está en la lectura, en el backlog o en ambos (aplicarlo dos veces es inocuo).
+            # Las escrituras no esperan a la construcción: solo se anotan.
+            statement = text("SELECT id_producto, nombre_producto FROM productos")
+            try:
+                with db.get_bind(clause=statement).connect() as conn:
+                    rows = conn.execute(statement).all()
+            except Exception:
+                with self._lock:
+                    self._backlog = None
+                raise
+            with self._lock:
+                for producto_id, nombre in rows:
+                    self._index(producto_id, nombre)
+                for apply, *args in self._backlog:
+                    apply(*args)
+                self._backlog = None
+                self._ready = True
+
+    def _index(self, producto_id: int, nombre: str):
+        terms = set(tokenize(nombre))
+        self._docs[producto_id] = terms
+        for term in terms:
+            if term not in self._postings:
+                bisect.insort(self._terms, term)
+            self._postings[term].add(producto_id)
+
+    def _unindex(self, producto_id: int):
+        for term in self._docs.pop(producto_id, ()):
+            ids = self._postings.get(term)
+            if ids is None:
+                continue
+            ids.discard(producto_id)
+            if not ids:
+                del self._postings[term]
+                pos = bisect.bisect_left(self._terms, term)
+                if pos < len(self._terms) and self._terms[pos] == term:
+                    del self._terms[pos]
+
+    def add(self, db, producto_id: int, nombre: str):
+        _pending(db).append((self._apply_add, producto_id, nombre))
+
+    def remove(self, db, producto_id: int):
+        _pending(db).append((self._apply_remove, producto_id))
+
+    def _apply_add(self, producto_id: int, nombre: str):
+        self._apply(self._reindex, producto_id, nombre)
+
+    def _apply_remove(self, producto_id: int):
+        self._apply(self._unindex, producto_id)
+
+    def _apply(self, change, *args):
+        with self._lock:
+            if self._ready:
+                change(*args)
+            elif self._backlog is not None:
+                self._backlog.append((change, *args))
+            # Sin construir ni construyéndose: la lectura de la construcción ya incluirá el cambio
+
+    def _reindex(self, producto_id: int, nombre: str):
+        self._unindex(producto_id)
+        self._index(producto_id, nombre)
+
+    def search(self, db, query: str, limit: int, offset: int = 0):
+        self.ensure_ready(db)
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            scores = None
+            for term in terms:
+                matches = self._match_term(term)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {pid: scores[pid] + s for pid, s in matches.items() if pid in scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit]
+
+    def _match_term(self, term: str):
+        matches = {}
+        for pid in self._postings.get(term, ()):
+            matches[pid] = self.EXACT_SCORE
+        # Prefijo: términos indexados que empiezan por `term`
+        pos = bisect.bisect_left(self._terms, term)
+        while pos < len(self._terms) and self._terms[pos].startswith(term):
+            for pid in self._postings[self._terms[pos]]:
+                matches.setdefault(pid, self.PREFIX_SCORE)
+            pos += 1
+        # Difusa: términos con la misma inicial a distancia de edición 1
+        if len(term) >= FUZZY_MIN_LENGTH:
+            pos = bisect.bisect_left(self._terms, term[0])
+            while pos < len(self._terms) and self._terms[pos][0] == term[0]:
+                candidate = self._terms[pos]
+                if abs(len(candidate) - len(term)) <= 1 and _within_one_edit(term, candidate):
+                    for pid in self._postings[candidate]:
+                        matches.setdefault(pid, self.FUZZY_SCORE)
+                pos += 1
+        return matches
+
+_PENDING_KEY = 'search_index_pending'
+
+def _pending(db) -> list:
+    """
+    Cambios del índice en memoria pendientes de la transacción en curso de `db`.
+    """
+    return db.info.setdefault(_PENDING_KEY, [])
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending(session):
+    for apply, *args in session.info.pop(_PENDING_KEY, ()):
+        apply(*args)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+def _fts_quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def _fuzzy_terms(db, vocabulary_query, term: str) -> list:
+    """
+    Términos del vocabulario del índice (`vocabulary_query`) con la misma inicial que `term` y a
+    distancia de edición 1, sin los que ya coinciden por prefijo. Vacío para términos cortos.
+    """
+    if len(term) < FUZZY_MIN_LENGTH:
+        return []
+    rows = db.execute(vocabulary_query, {
+        'first': term[0], 'after': chr(ord(term[0]) + 1), 'shortest': len(term) - 1, 'longest': len(term) + 1,
+    })
+    return [candidate for (candidate,) in rows
+            if not candidate.startswith(term) and _within_one_edit(term, candidate)]
+
+def _insert_terms(db, nombres):
+    """
+    Registra en productos_terms (MySQL) los términos de los nombres indicados.
+    """
+    terms = sorted({term for nombre in nombres for term in tokenize(nombre)})
+    if terms:
+        db.execute(text("INSERT IGNORE INTO productos_terms (term) VALUES (:term)"), [{'term': term} for term in terms])
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """
+    Indica si dos términos están a distancia de edición (Levenshtein) menor o igual a 1.
+    """
+    if a == b:
+        return True
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_search_index(bind) -> SearchIndex:
+    """
+    Retorna el índice de búsqueda para el engine indicado (uno por URL de base de datos).
+    """
+    key = str(bind.url)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = _build_index(bind.dialect.name)
+                _indexes[key] = index
+                logger.info("Índice de búsqueda: %s", type(index).__name__)
+    return index
+
+def create_search_schema(bind):
+    """
+    Crea la estructura de texto completo del motor en uso y la rellena con los productos existentes:
+    la tabla virtual FTS5 en SQLite o el índice FULLTEXT en MySQL. Es idempotente; la ejecuta migrate.
+    """
+    index = _build_index(bind.dialect.name)
+    with bind.begin() as conn:
+        if isinstance(index, SQLiteFTSIndex):
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5("
+                "nombre_producto, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            ))
+            # Solo las filas que falten: repetir migrate (o ejecutarlo a la vez) no duplica entradas
+            backfill = conn.execute(text(
+                "INSERT INTO productos_fts (rowid, nombre_producto) "
+                "SELECT id_producto, nombre_producto FROM productos "
+                "WHERE id_producto NOT IN (SELECT rowid FROM productos_fts)"
+            ))
+            if backfill.rowcount:
+                logger.info("Índice FTS5 de productos: %s filas indexadas", backfill.rowcount)
+            # Vocabulario del índice (término, documentos, apariciones) para la búsqueda difusa
+            conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts_vocab USING fts5vocab(productos_fts, 'row')"))
+        elif isinstance(index, MySQLFullTextIndex):
+            exists = conn.execute(text(
+                "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                "AND table_name = 'productos' AND index_name = 'ft_productos_nombre'"
+            )).first()
+            if not exists:
+                logger.info("Creando índice FULLTEXT de productos")
+                try:
+                    conn.execute(text("ALTER TABLE productos ADD FULLTEXT INDEX ft_productos_nombre (nombre_producto)"))
+                except DBAPIError as e:
+                    # 1061 (nombre de índice duplicado): otro proceso lo creó entre la consulta y el ALTER
+                    if getattr(e.orig, 'args', (None,))[0] != 1061:
+                        raise
+            # Vocabulario de la búsqueda difusa; utf8mb4_bin ordena y compara como Python
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS productos_terms "
+                "(term VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL PRIMARY KEY)"
+            ))
+            _insert_terms(conn, conn.execute(text("SELECT nombre_producto FROM productos")).scalars())
+
+def _build_index(dialect: str) -> SearchIndex:
+    if SEARCH_BACKEND == 'memory':
+        return InMemoryInvertedIndex()
+    if dialect == 'sqlite' and _sqlite_has_fts5():
+        return SQLiteFTSIndex()
+    if dialect == 'mysql':
+        return MySQLFullTextIndex()
+    return InMemoryInvertedIndex()
+
+def _sqlite_has_fts5() -> bool:
+    import sqlite3
+    conn = sqlite3.connect(':memory:')
+    try:
+        conn.execute("CREATE VIRTUAL TABLE fts5_probe USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
@@ -1,10 +1,20 @@
 import logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from models.user_model import User
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from repositories.pagination import keyset_paginate
+from repositories.readonly import select_rows, fetch_all, fetch_first
+from repositories.writes import insert_row, update_row, delete_row
+
+# Las lecturas de solo lectura nunca incluyen el hash de la contraseña
+READ_EXCLUDE = ('password',)
+
+class UserConflictError(Exception):
+    """
+    El username o el email ya pertenecen a otro usuario (restricción UNIQUE).
+    """
 
 class UserRepository:
     """
@@ -18,26 +28,40 @@ class UserRepository:
     def get_all_users(self):
         """
         Recupera todos los usuarios almacenados en la base de datos.
-        Utiliza una consulta ORM para obtener todas las instancias de la clase User,
-        permitiendo así listar todos los usuarios registrados en el sistema.
+        Es una lectura de solo lectura: retorna filas (sin la contraseña) en lugar de instancias ORM.
         """
         try:
             logger.info("Obteniendo todos los usuarios desde el repositorio")
-            return self.db.query(User).all()
+            return fetch_all(self.db, select_rows(User, exclude=READ_EXCLUDE))
         except SQLAlchemyError as e:
-            logger.error(f"Error al obtener todos los usuarios: {str(e)}")
+            logger.error("Error al obtener todos los usuarios: %s", e)
             return []
 
-    def get_user_by_id(self, user_id: int):
+    def get_users_page(self, limit: int, after: int = None):
+        """
+        Recupera una página de usuarios ordenada por ID, a partir del cursor `after`.
+        Retorna una tupla (usuarios, next_cursor); next_cursor es None en la última página.
+        """
+        try:
+            logger.info("Obteniendo página de usuarios (limit=%s, after=%s)", limit, after)
+            return keyset_paginate(select_rows(User, exclude=READ_EXCLUDE), User.id, limit, after, session=self.db)
+        except SQLAlchemyError as e:
+            logger.error("Error al obtener página de usuarios: %s", e)
+            return [], None
+
+    def get_user_by_id(self, user_id: int, read_only: bool = False):
         """
         Busca y retorna un usuario específico según su identificador único (ID).
         Devuelve la instancia de User si existe, o None si no se encuentra.
+        Con read_only=True retorna una fila de solo lectura sin la contraseña.
         """
         try:
-            logger.info(f"Buscando usuario por ID: {user_id}")
+            logger.info("Buscando usuario por ID: %s", user_id)
+            if read_only:
+                return fetch_first(self.db, select_rows(User, exclude=READ_EXCLUDE).filter(User.id == user_id))
             return self.db.query(User).filter(User.id == user_id).first()
         except SQLAlchemyError as e:
-            logger.error(f"Error al obtener usuario por ID {user_id}: {str(e)}")
+            logger.error("Error al obtener usuario por ID %s: %s", user_id, e)
             return None
 
     def get_user_by_username(self, username: str):
@@ -45,10 +69,10 @@ class UserRepository:
         Busca y retorna un usuario por su nombre de usuario.
         """
         try:
-            logger.info(f"Buscando usuario por username: {username}")
+            logger.info("Buscando usuario por username: %s", username)
             return self.db.query(User).filter(User.username == username).first()
         except SQLAlchemyError as e:
-            logger.error(f"Error al obtener usuario por username {username}: {str(e)}")
+            logger.error("Error al obtener usuario por username %s: %s", username, e)
             return None
 
     def get_user_by_email(self, email: str):
@@ -56,127 +80,94 @@ class UserRepository:
         Busca y retorna un usuario por su email.
         """
         try:
-            logger.info(f"Buscando usuario por email: {email}")
+            logger.info("Buscando usuario por email: %s", email)
             return self.db.query(User).filter(User.email == email).first()
         except SQLAlchemyError as e:
-            logger.error(f"Error al obtener usuario por email {email}: {str(e)}")
+            logger.error("Error al obtener usuario por email %s: %s", email, e)
             return None
 
     def create_user(self, username: str, password: str, email: str, full_name: str = None):
         """
         Crea y almacena un nuevo usuario en la base de datos.
-        Recibe el nombre de usuario, contraseña, correo electrónico y nombre completo como parámetros,
-        instancia un nuevo objeto User y lo agrega a la sesión de la base de datos.
-        Tras confirmar la transacción, retorna el nuevo usuario creado.
+        Recibe el nombre de usuario, contraseña, correo electrónico y nombre completo como parámetros
+        y lo inserta con un único INSERT ... RETURNING.
+        La unicidad de username y email la garantizan las restricciones UNIQUE de la tabla: un duplicado
+        produce un IntegrityError y se lanza UserConflictError, sin consultas previas de comprobación.
+        Retorna el nuevo usuario (fila de solo lectura, sin la contraseña), o None ante otros errores.
         """
         try:
-            # Verificar si el usuario o email ya existen
-            existing_user = self.get_user_by_username(username)
-            if existing_user:
-                logger.warning(f"Intento de crear usuario con username existente: {username}")
-                return None
-            
-            existing_email = self.get_user_by_email(email)
-            if existing_email:
-                logger.warning(f"Intento de crear usuario con email existente: {email}")
-                return None
-
-            # Crear una instancia de usuario con los datos proporcionados
-            logger.info(f"Creando usuario: {username}")
-            new_user = User(username=username, password=password, email=email, full_name=full_name)
-            
-            # Agregar el nuevo usuario a la base de datos y confirmar la transacción
-            self.db.add(new_user)
+            logger.info("Creando usuario: %s", username)
+            new_user = insert_row(self.db, User, {
+                'username': username,
+                'password': password,
+                'email': email,
+                'full_name': full_name
+            }, exclude=READ_EXCLUDE)
             self.db.commit()
-            self.db.refresh(new_user)  # Refresca la instancia del objeto para obtener los datos actualizados
 
-            logger.info(f"Usuario creado con éxito: {username}")
+            logger.info("Usuario creado con éxito: %s", username)
             return new_user
             
         except IntegrityError as e:
             self.db.rollback()
-            logger.error(f"Error de integridad al crear usuario {username}: {str(e)}")
-            return None
+            logger.warning("Usuario o email ya existentes al crear usuario %s: %s", username, e.orig)
+            raise UserConflictError(username) from e
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error de base de datos al crear usuario {username}: {str(e)}")
+            logger.error("Error de base de datos al crear usuario %s: %s", username, e)
             return None
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error inesperado al crear usuario {username}: {str(e)}")
+            logger.error("Error inesperado al crear usuario %s: %s", username, e)
             return None
 
     def update_user(self, user_id: int, username: str = None, password: str = None, email: str = None, full_name: str = None):
         """
         Actualiza la información de un usuario existente en la base de datos.
         Permite modificar el nombre de usuario, contraseña, correo electrónico y nombre completo del usuario identificado por su ID.
-        Devuelve el usuario actualizado o None si no existe.
+        Usa un único UPDATE ... RETURNING; un username o email duplicado lanza UserConflictError.
+        Devuelve el usuario actualizado (fila de solo lectura, sin la contraseña) o None si no existe.
         """
+        values = {'username': username, 'password': password, 'email': email, 'full_name': full_name}
+        values = {column: value for column, value in values.items() if value is not None}
         try:
-            user = self.get_user_by_id(user_id)
-            if user:
-                logger.info(f"Actualizando usuario: {user_id}")
-                
-                # Verificar unicidad si se está cambiando username
-                if username is not None and username != user.username:
-                    existing_user = self.get_user_by_username(username)
-                    if existing_user:
-                        logger.warning(f"Username ya existe: {username}")
-                        return None
-                
-                # Verificar unicidad si se está cambiando email
-                if email is not None and email != user.email:
-                    existing_email = self.get_user_by_email(email)
-                    if existing_email:
-                        logger.warning(f"Email ya existe: {email}")
-                        return None
-                
-                # Actualizar campos
-                if username is not None:
-                    user.username = username
-                if password is not None:
-                    user.password = password
-                if email is not None:
-                    user.email = email
-                if full_name is not None:
-                    user.full_name = full_name
-                    
-                self.db.commit()
-                self.db.refresh(user)
-                logger.info(f"Usuario actualizado: {user_id}")
-                return user
-                
-            logger.warning(f"Usuario no encontrado para actualizar: {user_id}")
-            return None
+            if not values:
+                return self.get_user_by_id(user_id, read_only=True)
+            user = update_row(self.db, User, User.id, user_id, values, exclude=READ_EXCLUDE)
+            if user is None:
+                self.db.rollback()
+                logger.warning("Usuario no encontrado para actualizar: %s", user_id)
+                return None
+            self.db.commit()
+            logger.info("Usuario actualizado: %s", user_id)
+            return user
             
         except IntegrityError as e:
             self.db.rollback()
-            logger.error(f"Error de integridad al actualizar usuario {user_id}: {str(e)}")
-            return None
+            logger.warning("Username o email ya existentes al actualizar usuario %s: %s", user_id, e.orig)
+            raise UserConflictError(user_id) from e
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error de base de datos al actualizar usuario {user_id}: {str(e)}")
+            logger.error("Error de base de datos al actualizar usuario %s: %s", user_id, e)
             return None
 
     def delete_user(self, user_id: int):
         """
-        Elimina un usuario de la base de datos según su identificador único (ID).
-        Busca el usuario correspondiente y, si existe, lo elimina de la base de datos y
-        confirma la transacción. Devuelve la instancia del usuario eliminado o None si
-        no se encuentra el usuario.
+        Elimina un usuario de la base de datos según su identificador único (ID)
+        con un único DELETE ... RETURNING y confirma la transacción.
+        Devuelve el usuario eliminado o None si no se encuentra el usuario.
         """
         try:
-            user = self.get_user_by_id(user_id)
+            user = delete_row(self.db, User, User.id, user_id)
             if user:
-                logger.info(f"Eliminando usuario: {user_id}")
-                self.db.delete(user)
                 self.db.commit()
-                logger.info(f"Usuario eliminado: {user_id}")
+                logger.info("Usuario eliminado: %s", user_id)
                 return user
-            logger.warning(f"Usuario no encontrado para eliminar: {user_id}")
+            self.db.rollback()
+            logger.warning("Usuario no encontrado para eliminar: %s", user_id)
             return None
             
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error de base de datos al eliminar usuario {user_id}: {str(e)}")
+            logger.error("Error de base de datos al eliminar usuario %s: %s", user_id, e)
             return None
@@ -0,0 +1,181 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from sqlalchemy import select, insert, update, text, event
+from sqlalchemy.orm import Session
+from models.version_model import ResourceVersion
+logger = logging.getLogger(__name__)
+
+"""
+Versiones por recurso (productos, categorias, descuentos, impuestos, proveedores).
+Los controladores derivan de ellas los ETag / Last-Modified de los GET condicionales sin
+ejecutar la consulta del recurso.
+
+Backends (variable VERSION_BACKEND):
+- database: tabla resource_versions (por defecto). Ve las escrituras de cualquier proceso o
+  servidor de la aplicación, funciona con cualquier dialecto y cuesta una lectura por clave
+  primaria por GET condicional. Las filas las crea migrate.
+- redis: contadores compartidos en Redis (REDIS_URL).
+- local: contadores en memoria del proceso. Solo ve las escrituras del propio proceso: válido
+  únicamente con un solo proceso.
+
+En todos los backends las rutas de escritura de los repositorios llaman a bump_version una vez por
+transacción confirmada (no por fila): un lote de 50.000 productos incrementa la versión en uno.
+El incremento va en su propia transacción corta, después del commit, de modo que la fila caliente
+de resource_versions no queda bloqueada durante las transacciones de escritura. Las escrituras
+hechas fuera de la aplicación (SQL directo) no cambian la versión.
+"""
+
+VERSION_BACKEND = os.getenv('VERSION_BACKEND', 'database')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+class LocalVersionStore:
+    """
+    Contadores de versión en memoria. El identificador de arranque forma parte del ETag,
+    de modo que al reiniciar el proceso los ETag anteriores dejan de coincidir.
+    """
+
+    def __init__(self):
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._started = time.time()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def bump(self, resource: str, db=None):
+        with self._lock:
+            version, _ = self._versions.get(resource, (0, self._started))
+            self._versions[resource] = (version + 1, time.time())
+
+    def get(self, resource: str):
+        """
+        Retorna una tupla (versión, timestamp de la última modificación).
+        """
+        return self._versions.get(resource, (0, self._started))
+
+    def get_many(self, resources, db=None):
+        return [self.get(resource) for resource in resources]
+
+class RedisVersionStore:
+    """
+    Contadores de versión compartidos en Redis: cada escritura incrementa `version:<recurso>`.
+    """
+
+    def __init__(self, client=None, url: str = REDIS_URL, prefix: str = 'api:version:'):
+        if client is None:
+            import redis  # Dependencia opcional, solo necesaria con VERSION_BACKEND=redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.boot_id = 'shared'
+
+    def bump(self, resource: str, db=None):
+        self.client.incr(self.prefix + resource)
+        self.client.set(self.prefix + resource + ':ts', str(time.time()))
+
+    def get(self, resource: str):
+        version = self.client.get(self.prefix + resource)
+        ts = self.client.get(self.prefix + resource + ':ts')
+        return int(version or 0), float(ts) if ts else 0.0
+
+    def get_many(self, resources, db=None):
+        return [self.get(resource) for resource in resources]
+
+class DatabaseVersionStore:
+    """
+    Versiones leídas de la tabla resource_versions. La lectura usa la sesión de la petición (y por
+    tanto la misma réplica que servirá los datos), de modo que el ETag corresponde al estado que ve
+    esa petición. El incremento usa una conexión propia del engine principal de la sesión.
+    """
+
+    boot_id = 'db'  # Igual en todos los procesos: el ETag solo depende del estado de la base
+
+    def bump(self, resource: str, db=None):
+        # Transacción de una sola sentencia: el bloqueo de la fila dura solo este UPDATE
+        with db.get_bind().begin() as conn:
+            conn.execute(
+                update(ResourceVersion.__table__)
+                .where(ResourceVersion.resource == resource)
+                .values(version=ResourceVersion.version + 1, updated_at=time.time())
+            )
+
+    def get_many(self, resources, db=None):
+        rows = {resource: (version, updated_at) for resource, version, updated_at in db.execute(
+            select(ResourceVersion.resource, ResourceVersion.version, ResourceVersion.updated_at)
+            .where(ResourceVersion.resource.in_(resources))
+        )}
+        return [rows.get(resource, (0, 0.0)) for resource in resources]
+
+# Tablas cuyas escrituras cambian la versión del recurso del mismo nombre
+VERSIONED_RESOURCES = ('productos', 'categorias', 'proveedores', 'descuentos', 'impuestos')
+
+def install_version_tracking(bind):
+    """
+    Crea las filas de resource_versions que falten. Elimina los triggers por fila de versiones
+    anteriores, que incrementaban la versión en cada fila escrita. Es idempotente; la ejecuta migrate.
+    """
+    with bind.begin() as conn:
+        existing = set(conn.execute(select(ResourceVersion.resource)).scalars())
+        missing = [r for r in VERSIONED_RESOURCES if r not in existing]
+        if missing:
+            conn.execute(insert(ResourceVersion.__table__),
+                         [{'resource': r, 'version': 0, 'updated_at': time.time()} for r in missing])
+        if bind.dialect.name in ('sqlite', 'mysql'):
+            for table in VERSIONED_RESOURCES:
+                for operation in ('insert', 'update', 'delete'):
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{table}_version_{operation}"))
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_version_store():
+    """
+    Retorna el almacén de versiones del proceso.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if VERSION_BACKEND == 'redis':
+                    _store = RedisVersionStore()
+                elif VERSION_BACKEND == 'local':
+                    _store = LocalVersionStore()
+                else:
+                    _store = DatabaseVersionStore()
+                logger.info("Almacén de versiones: %s", type(_store).__name__)
+    return _store
+
+def bump_version(resource: str, db=None):
+    """
+    Marca el recurso como modificado. Se llama una vez después de confirmar cada transacción de
+    escritura; `db` es la sesión que escribió (el backend database usa su engine principal).
+    """
+    get_version_store().bump(resource, db)
+
+_MEMO_KEY = 'resource_versions'
+
+def get_versions(db, *resources):
+    """
+    Retorna la versión y fecha de modificación de cada recurso indicado; `db` es la sesión
+    de la petición (la usa el backend database). Las versiones leídas se recuerdan en la sesión
+    hasta su próximo commit o rollback, de modo que el GET condicional y las cachés de la misma
+    petición comparten una sola lectura.
+    """
+    store = get_version_store()
+    memo = db.info.setdefault(_MEMO_KEY, {})
+    missing = [resource for resource in resources if resource not in memo]
+    if missing:
+        memo.update(zip(missing, store.get_many(missing, db)))
+    return store.boot_id, [(resource,) + tuple(memo[resource]) for resource in resources]
+
+def resource_version(db, resource: str) -> int:
+    """
+    Retorna el número de versión actual de un recurso.
+    """
+    return get_versions(db, resource)[1][0][1]
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _forget_versions(session):
+    session.info.pop(_MEMO_KEY, None)
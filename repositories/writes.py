@@ -0,0 +1,56 @@
+import logging
+from types import SimpleNamespace
+from sqlalchemy import insert, update, delete, select
+logger = logging.getLogger(__name__)
+
+"""
+Escrituras en una sola sentencia.
+INSERT / UPDATE / DELETE con RETURNING devuelven la fila escrita en el mismo viaje a la base de datos,
+sin el SELECT posterior de session.refresh() ni el SELECT previo para comprobar que la fila existe.
+Si el dialecto no soporta RETURNING (MySQL) se usa el id autoincremental (lastrowid) o el número
+de filas afectadas. Las filas retornadas son de solo lectura, como las de repositories/readonly.py.
+"""
+
+def _columns(model, exclude=()):
+    return [column for column in model.__table__.columns if column.key not in exclude]
+
+def insert_row(db, model, values: dict, exclude=()):
+    """
+    Inserta una fila de `model` y la retorna (sin las columnas de `exclude`).
+    Los errores de restricciones (IntegrityError) se propagan al llamador.
+    """
+    columns = _columns(model, exclude)
+    statement = insert(model.__table__).values(**values)
+    if db.get_bind().dialect.insert_returning:
+        return db.execute(statement.returning(*columns)).one()
+    result = db.execute(statement)
+    # Sin RETURNING la fila se compone con los valores insertados y el id generado (lastrowid)
+    data = {column.key: values.get(column.key) for column in columns}
+    for column, value in zip(model.__table__.primary_key.columns, result.inserted_primary_key):
+        data[column.key] = value
+    return SimpleNamespace(**data)
+
+def update_row(db, model, key_column, key, values: dict, exclude=()):
+    """
+    Actualiza la fila `key_column == key` con `values` y retorna la fila resultante, o None si no existe.
+    """
+    columns = _columns(model, exclude)
+    statement = update(model.__table__).where(key_column == key).values(**values)
+    if db.get_bind().dialect.update_returning:
+        return db.execute(statement.returning(*columns)).first()
+    if not db.execute(statement).rowcount:
+        return None
+    # Sin RETURNING se lee la fila ya bloqueada por el UPDATE dentro de la transacción
+    return db.execute(select(*columns).where(key_column == key)).first()
+
+def delete_row(db, model, key_column, key):
+    """
+    Elimina la fila `key_column == key`. Retorna la fila eliminada (o solo su clave si el dialecto
+    no soporta RETURNING), o None si no existía.
+    """
+    statement = delete(model.__table__).where(key_column == key)
+    if db.get_bind().dialect.delete_returning:
+        return db.execute(statement.returning(*model.__table__.columns)).first()
+    if not db.execute(statement).rowcount:
+        return None
+    return SimpleNamespace(**{key_column.key: key})
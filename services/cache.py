@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import logging
+import threading
+from decimal import Decimal
+from collections import OrderedDict
+from types import SimpleNamespace
+from sqlalchemy import inspect
+logger = logging.getLogger(__name__)
+
+"""
+Capa de caché para los servicios.
+Las tablas de referencia (categorías, proveedores, descuentos, impuestos) casi nunca cambian,
+por lo que sus listados se sirven desde caché (read-through). Cada entrada se guarda bajo la
+versión actual del recurso (repositories/versioning.py): cualquier escritura, hecha por este u
+otro proceso, cambia la versión y la lectura siguiente carga el listado nuevo; las entradas de
+versiones viejas expiran por TTL. Los usuarios por ID (services/user_service.py) no llevan versión: su
+escritura borra la entrada, cosa que solo ven los demás procesos si la caché es compartida.
+
+Backends disponibles (variable de entorno CACHE_BACKEND):
+- memory: caché en proceso con TTL y expulsión LRU (por defecto). Solo con un worker: gunicorn.conf.py
+  no arranca varios workers con este backend.
+- redis: caché compartida entre procesos/servidores (requiere el paquete redis y REDIS_URL).
+- none: sin caché.
+"""
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_TTL = int(os.getenv('CACHE_TTL', '300'))  # Segundos que vive una entrada
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))  # Entradas máximas en memoria
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+class CacheBackend:
+    """
+    Interfaz común de los backends de caché.
+    """
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: int = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+class NullCache(CacheBackend):
+    """
+    Backend que no almacena nada: todas las lecturas van a la base de datos.
+    """
+
+    def get(self, key: str):
+        return None
+
+    def set(self, key: str, value, ttl: int = None):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+    def clear(self):
+        pass
+
+class TTLCache(CacheBackend):
+    """
+    Caché en proceso con expiración por tiempo (TTL) y expulsión LRU al superar max_entries.
+    Es segura para múltiples hilos.
+    """
+
+    def __init__(self, ttl: int = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: int = None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+def _json_encode(value):
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    raise TypeError(f"Tipo no serializable en caché: {type(value).__name__}")
+
+def _json_decode(obj: dict):
+    if len(obj) == 1 and '__decimal__' in obj:
+        return Decimal(obj['__decimal__'])
+    return obj
+
+class RedisCache(CacheBackend):
+    """
+    Caché compartida sobre Redis. Los valores se serializan con JSON (nunca con pickle: leer una
+    entrada no debe poder ejecutar código); los Decimal se guardan como texto exacto.
+    Se acepta un cliente ya construido (por ejemplo un cliente falso en las pruebas).
+    """
+
+    def __init__(self, client=None, url: str = REDIS_URL, ttl: int = CACHE_TTL, prefix: str = 'api:'):
+        if client is None:
+            import redis  # Dependencia opcional, solo necesaria con CACHE_BACKEND=redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw, object_hook=_json_decode) if raw is not None else None
+
+    def set(self, key: str, value, ttl: int = None):
+        raw = json.dumps(value, default=_json_encode, separators=(',', ':'))
+        self.client.set(self.prefix + key, raw, ex=ttl if ttl is not None else self.ttl)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+def snapshot(instances):
+    """
+    Convierte instancias ORM o filas (Row) en diccionarios con los valores de sus columnas.
+    Se guardan copias planas (y no las instancias) para no retener objetos ligados a una sesión.
+    """
+    return [
+        obj._asdict() if hasattr(obj, '_asdict')
+        else {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+        for obj in instances
+    ]
+
+def restore(rows):
+    """
+    Reconstruye objetos de solo lectura con los mismos atributos que las instancias originales.
+    """
+    return [SimpleNamespace(**row) for row in rows]
+
+def cached_list(cache: CacheBackend, key: str, loader, version: int = None):
+    """
+    Lectura read-through: retorna el listado desde la caché o lo carga con `loader` y lo almacena.
+    Con `version` la entrada se guarda como `key:v<version>`, por lo que un cambio de versión la invalida.
+    """
+    if version is not None:
+        key = f"{key}:v{version}"
+    rows = cache.get(key)
+    if rows is None:
+        logger.info("Caché sin entrada para %s, consultando base de datos", key)
+        rows = snapshot(loader())
+        cache.set(key, rows)
+    return restore(rows)
+
+def build_cache(backend: str = CACHE_BACKEND) -> CacheBackend:
+    """
+    Construye el backend de caché indicado por nombre.
+    """
+    if backend == 'redis':
+        return RedisCache()
+    if backend == 'none':
+        return NullCache()
+    return TTLCache()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> CacheBackend:
+    """
+    Retorna la instancia de caché compartida por los servicios del proceso.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = build_cache()
+                logger.info("Caché inicializada: %s", type(_cache).__name__)
+    return _cache
@@ -0,0 +1,157 @@
+import os
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+logger = logging.getLogger(__name__)
+
+"""
+Ejecutor de hashing de contraseñas.
+Las funciones de derivación de claves (scrypt, pbkdf2) consumen CPU a propósito; ejecutarlas en el
+hilo de la petición hace que una ráfaga de logins bloquee al resto de endpoints. Este módulo las
+ejecuta en un pool de procesos con una cola acotada: si la cola está llena la petición se rechaza
+de inmediato (HashingSaturatedError -> 429 con Retry-After) en lugar de esperar; si el resultado
+no llega en HASH_TIMEOUT segundos se responde igual, con HashingTimeoutError -> 503 con Retry-After.
+
+Los procesos del pool se crean con fork solo si el proceso tiene un único hilo (un worker prefork
+en post_fork, ver PasswordHasher.start): un fork desde un proceso con hilos copia en el hijo los
+locks que otros hilos tuvieran tomados (cola de logging, pool de SQLAlchemy). En otro caso se usa
+forkserver o spawn.
+
+Variables de entorno:
+- HASH_WORKERS: procesos del pool de cada proceso de la aplicación (por defecto, número de CPUs dividido
+  entre WEB_WORKERS, mínimo 1; 0 ejecuta el hashing en el hilo actual). Con gunicorn cada worker tiene su
+  propio pool, así que el total es WEB_WORKERS * HASH_WORKERS.
+- HASH_QUEUE_SIZE: operaciones de hashing en curso o en espera permitidas (por defecto HASH_WORKERS * 4).
+- HASH_METHOD: método y coste de werkzeug, por ejemplo 'scrypt' o 'pbkdf2:sha256:600000' (por defecto scrypt).
+- HASH_TIMEOUT: segundos máximos de espera por un resultado (por defecto 10).
+- HASH_RETRY_AFTER: segundos sugeridos al cliente en el encabezado Retry-After (por defecto 1).
+"""
+
+# Workers del servidor prefork que reparten las CPUs (gunicorn.conf.py exporta WEB_WORKERS)
+WEB_WORKERS = max(int(os.getenv('WEB_WORKERS', '1')), 1)
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(max((os.cpu_count() or 1) // WEB_WORKERS, 1))))
+HASH_QUEUE_SIZE = int(os.getenv('HASH_QUEUE_SIZE', str(max(HASH_WORKERS, 1) * 4)))
+HASH_METHOD = os.getenv('HASH_METHOD', 'scrypt')
+HASH_TIMEOUT = float(os.getenv('HASH_TIMEOUT', '10'))
+HASH_RETRY_AFTER = int(os.getenv('HASH_RETRY_AFTER', '1'))
+
+class HashingSaturatedError(Exception):
+    """
+    Se lanza cuando la cola de hashing está llena y la operación se rechaza sin esperar.
+    """
+
+    def __init__(self, retry_after: int = HASH_RETRY_AFTER, message: str = 'La cola de hashing de contraseñas está llena'):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class HashingTimeoutError(HashingSaturatedError):
+    """
+    Se lanza cuando el resultado del hashing no llega en HASH_TIMEOUT segundos (pool sobrecargado).
+    """
+
+    def __init__(self, retry_after: int = HASH_RETRY_AFTER):
+        super().__init__(retry_after, 'El hashing de contraseñas no respondió a tiempo')
+
+def _hash_worker(password: str, method: str) -> str:
+    return generate_password_hash(password, method=method)
+
+def _verify_worker(password_hash: str, password: str) -> bool:
+    return check_password_hash(password_hash, password)
+
+class PasswordHasher:
+    """
+    Pool de procesos acotado para generar y verificar hashes de contraseñas.
+    El pool se crea al primer uso en cada proceso (también tras un fork de un servidor prefork).
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_size: int = HASH_QUEUE_SIZE,
+                 method: str = HASH_METHOD, timeout: float = HASH_TIMEOUT):
+        self.workers = workers
+        self.method = method
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    # multiprocessing se importa al crear el pool, no al arrancar el proceso
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+                    self._pid = os.getpid()
+                    logger.info("Pool de hashing iniciado con %s procesos", self.workers)
+        return self._executor
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        # Rechazo inmediato si no hay cupo en la cola
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Cola de hashing saturada, rechazando petición")
+            raise HashingSaturatedError()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()  # Si aún no empezó, libera su lugar en la cola
+            logger.warning("Hashing sin respuesta en %s s, rechazando petición", self.timeout)
+            raise HashingTimeoutError() from None
+
+    def start(self):
+        """
+        Crea el pool y sus procesos de inmediato en lugar de al primer uso. Un worker prefork lo llama
+        en post_fork, cuando todavía tiene un solo hilo, para que los procesos se creen con fork sin
+        heredar locks de otros hilos.
+        """
+        if self.workers > 0:
+            # Con fork, el primer submit crea todos los procesos antes de iniciar el hilo del pool
+            self._get_executor().submit(int).result()
+
+    def hash_password(self, password: str) -> str:
+        return self._run(_hash_worker, password, self.method)
+
+    def verify_password(self, password_hash: str, password: str) -> bool:
+        return self._run(_verify_worker, password_hash, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def _mp_context():
+    """
+    Usa fork si está disponible y el proceso tiene un único hilo: los procesos del pool arrancan sin
+    volver a importar el módulo principal de la aplicación. Los procesos hijos solo ejecutan el hashing
+    y terminan con os._exit, sin tocar las conexiones heredadas.
+    Con otros hilos en marcha (servidor de desarrollo, pool creado durante una petición) usa forkserver
+    o spawn, que arrancan procesos limpios a cambio de importar de nuevo el módulo principal.
+    """
+    import multiprocessing
+    methods = multiprocessing.get_all_start_methods()
+    if 'fork' in methods and threading.active_count() == 1:
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Retorna el ejecutor de hashing compartido por el proceso.
+    """
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
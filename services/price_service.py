@@ -0,0 +1,66 @@
+import logging
+logger = logging.getLogger(__name__)
+
+from decimal import Decimal, ROUND_HALF_UP
+from services.product_service import DescuentoService, ImpuestoService
+from services.cache import CacheBackend
+from sqlalchemy.orm import Session
+
+"""
+Librerías utilizadas:
+- decimal: Aritmética decimal exacta para importes monetarios (sin pasar por float).
+- services.product_service: Servicios de descuentos e impuestos, cuyos listados (en caché) forman las tablas de tasas.
+"""
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0')
+
+def _money(value: Decimal) -> Decimal:
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+class PrecioService:
+    """
+    Capa de servicios para el cálculo del precio final de los productos.
+    Para cada producto calcula el precio neto, el valor del descuento, el valor del IVA
+    (sobre el precio ya descontado) y el precio final, usando tablas de tasas precargadas
+    de descuentos e impuestos, de modo que un lote completo se calcula sin consultas por producto.
+    """
+    def __init__(self, db_session: Session, cache: CacheBackend = None):
+        self.descuento_service = DescuentoService(db_session, cache)
+        self.impuesto_service = ImpuestoService(db_session, cache)
+        logger.info("Servicio de precios inicializado")
+
+    def cargar_tasas(self):
+        """
+        Retorna las tablas de tasas {id: porcentaje} de descuentos e impuestos.
+        Los listados vienen de la caché de tablas de referencia, por lo que normalmente no consultan la base de datos.
+        """
+        descuentos = {d.id_descuento: Decimal(d.porcentaje) for d in self.descuento_service.listar_descuentos()}
+        impuestos = {i.id_iva: Decimal(i.porcentaje) for i in self.impuesto_service.listar_impuestos()}
+        return descuentos, impuestos
+
+    def calcular_precio(self, producto):
+        """
+        Calcula los importes de un solo producto.
+        """
+        return self.calcular_lote([producto])[0]
+
+    def calcular_lote(self, productos):
+        """
+        Calcula los importes de un lote de productos en una sola pasada.
+        Retorna una lista de diccionarios {neto, descuento, iva, final} alineada con `productos`.
+        Redondeo a centavos, mitad hacia arriba.
+        """
+        productos = list(productos)
+        if not productos:
+            return []
+        descuentos, impuestos = self.cargar_tasas()
+        return [self._calcular(p, descuentos, impuestos) for p in productos]
+
+    @staticmethod
+    def _calcular(producto, descuentos, impuestos):
+        neto = _money(Decimal(producto.Precio))
+        descuento = _money(neto * descuentos.get(producto.id_descuento, ZERO) / 100)
+        base = neto - descuento
+        iva = _money(base * impuestos.get(producto.id_iva, ZERO) / 100)
+        return {'neto': neto, 'descuento': descuento, 'iva': iva, 'final': base + iva}
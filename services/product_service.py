@@ -1,5 +1,5 @@
+import os
 import logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from repositories.product_repository import (
@@ -9,81 +9,125 @@ from repositories.product_repository import (
     ImpuestoRepository,
     ProductoRepository
 )
+from repositories.versioning import resource_version
+from services.cache import CacheBackend, get_cache, cached_list
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
 
 """
 Librerías utilizadas:
 - repositories.product_repository: Proporciona las clases de repositorio para la gestión de productos y sus entidades relacionadas.
+- repositories.versioning: Versión actual de cada recurso, que forma parte de la clave de caché.
+- services.cache: Caché read-through para los listados de tablas de referencia.
 - sqlalchemy.orm.Session: Permite manejar la sesión de la base de datos para realizar operaciones transaccionales.
 """
 
+# Filas por transacción en la creación masiva de productos
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '1000'))
+
 class CategoriaService:
     """
     Capa de servicios para la gestión de categorías.
     Orquesta la lógica de negocio relacionada con las categorías, utilizando el repositorio para acceder a los datos.
     """
-    def __init__(self, db_session: Session):
+    CACHE_KEY = 'categorias:all'
+    RESOURCE = 'categorias'
+
+    def __init__(self, db_session: Session, cache: CacheBackend = None):
         self.repository = CategoriaRepository(db_session)
+        self.cache = cache if cache is not None else get_cache()
         logger.info("Servicio de categorías inicializado")
 
     def listar_categorias(self):
         logger.info("Listando todas las categorías")
-        return self.repository.get_all_categorias()
+        return cached_list(self.cache, self.CACHE_KEY, self.repository.get_all_categorias,
+                           resource_version(self.repository.db, self.RESOURCE))
+
+    def listar_categorias_paginado(self, limit: int, after: int = None):
+        logger.info("Listando categorías paginadas (limit=%s, after=%s)", limit, after)
+        return self.repository.get_categorias_page(limit, after)
 
     def crear_categoria(self, nombre_categoria: str):
-        logger.info(f"Creando categoría: {nombre_categoria}")
-        return self.repository.create_categoria(nombre_categoria)
+        logger.info("Creando categoría: %s", nombre_categoria)
+        categoria = self.repository.create_categoria(nombre_categoria)
+        # El repositorio ya incrementó la versión, que forma parte de la clave de caché
+        return categoria
 
 class ProveedorService:
     """
     Capa de servicios para la gestión de proveedores.
     Orquesta la lógica de negocio relacionada con los proveedores, utilizando el repositorio para acceder a los datos.
     """
-    def __init__(self, db_session: Session):
+    CACHE_KEY = 'proveedores:all'
+    RESOURCE = 'proveedores'
+
+    def __init__(self, db_session: Session, cache: CacheBackend = None):
         self.repository = ProveedorRepository(db_session)
+        self.cache = cache if cache is not None else get_cache()
         logger.info("Servicio de proveedores inicializado")
 
     def listar_proveedores(self):
         logger.info("Listando todos los proveedores")
-        return self.repository.get_all_proveedores()
+        return cached_list(self.cache, self.CACHE_KEY, self.repository.get_all_proveedores,
+                           resource_version(self.repository.db, self.RESOURCE))
+
+    def listar_proveedores_paginado(self, limit: int, after: int = None):
+        logger.info("Listando proveedores paginados (limit=%s, after=%s)", limit, after)
+        return self.repository.get_proveedores_page(limit, after)
 
     def crear_proveedor(self, nombre: str, telefono: str = None, email: str = None, direccion: str = None):
-        logger.info(f"Creando proveedor: {nombre}")
-        return self.repository.create_proveedor(nombre, telefono, email, direccion)
+        logger.info("Creando proveedor: %s", nombre)
+        proveedor = self.repository.create_proveedor(nombre, telefono, email, direccion)
+        # El repositorio ya incrementó la versión, que forma parte de la clave de caché
+        return proveedor
 
 class DescuentoService:
     """
     Capa de servicios para la gestión de descuentos.
     Orquesta la lógica de negocio relacionada con los descuentos, utilizando el repositorio para acceder a los datos.
     """
-    def __init__(self, db_session: Session):
+    CACHE_KEY = 'descuentos:all'
+    RESOURCE = 'descuentos'
+
+    def __init__(self, db_session: Session, cache: CacheBackend = None):
         self.repository = DescuentoRepository(db_session)
+        self.cache = cache if cache is not None else get_cache()
         logger.info("Servicio de descuentos inicializado")
 
     def listar_descuentos(self):
         logger.info("Listando todos los descuentos")
-        return self.repository.get_all_descuentos()
+        return cached_list(self.cache, self.CACHE_KEY, self.repository.get_all_descuentos,
+                           resource_version(self.repository.db, self.RESOURCE))
 
     def crear_descuento(self, nombre: str, porcentaje: float):
-        logger.info(f"Creando descuento: {nombre}")
-        return self.repository.create_descuento(nombre, porcentaje)
+        logger.info("Creando descuento: %s", nombre)
+        descuento = self.repository.create_descuento(nombre, porcentaje)
+        # El repositorio ya incrementó la versión, que forma parte de la clave de caché
+        return descuento
 
 class ImpuestoService:
     """
     Capa de servicios para la gestión de impuestos.
     Orquesta la lógica de negocio relacionada con los impuestos, utilizando el repositorio para acceder a los datos.
     """
-    def __init__(self, db_session: Session):
+    CACHE_KEY = 'impuestos:all'
+    RESOURCE = 'impuestos'
+
+    def __init__(self, db_session: Session, cache: CacheBackend = None):
         self.repository = ImpuestoRepository(db_session)
+        self.cache = cache if cache is not None else get_cache()
         logger.info("Servicio de impuestos inicializado")
 
     def listar_impuestos(self):
         logger.info("Listando todos los impuestos")
-        return self.repository.get_all_impuestos()
+        return cached_list(self.cache, self.CACHE_KEY, self.repository.get_all_impuestos,
+                           resource_version(self.repository.db, self.RESOURCE))
 
     def crear_impuesto(self, nombre: str, porcentaje: float):
-        logger.info(f"Creando impuesto: {nombre}")
-        return self.repository.create_impuesto(nombre, porcentaje)
+        logger.info("Creando impuesto: %s", nombre)
+        impuesto = self.repository.create_impuesto(nombre, porcentaje)
+        # El repositorio ya incrementó la versión, que forma parte de la clave de caché
+        return impuesto
 
 class ProductoService:
     """
@@ -94,33 +138,129 @@ class ProductoService:
         self.repository = ProductoRepository(db_session)
         logger.info("Servicio de productos inicializado")
 
-    def listar_productos(self):
+    def listar_productos(self, expand=(), filters=None, columns=None):
         logger.info("Listando todos los productos")
-        return self.repository.get_all_productos()
+        return self.repository.get_all_productos(expand, filters, columns)
 
-    def obtener_producto(self, producto_id: int):
-        logger.info(f"Obteniendo producto por ID: {producto_id}")
-        return self.repository.get_producto_by_id(producto_id)
+    def listar_productos_paginado(self, limit: int, after: int = None, expand=(), filters=None, columns=None):
+        logger.info("Listando productos paginados (limit=%s, after=%s)", limit, after)
+        return self.repository.get_productos_page(limit, after, expand, filters, columns)
+
+    def exportar_productos(self, batch_size: int = 1000):
+        logger.info("Exportando productos en lotes de %s", batch_size)
+        return self.repository.iter_productos(batch_size)
+
+    def obtener_productos(self, ids: list, expand=()):
+        """
+        Retorna los productos en el mismo orden de `ids` y la lista de ids que no existen.
+        """
+        logger.info("Obteniendo %s productos por ID", len(ids))
+        ids = list(dict.fromkeys(ids))  # Sin duplicados, conservando el orden pedido
+        encontrados = self.repository.get_productos_by_ids(ids, expand)
+        productos = [encontrados[i] for i in ids if i in encontrados]
+        faltantes = [i for i in ids if i not in encontrados]
+        return productos, faltantes
+
+    def buscar_productos(self, query: str, limit: int, offset: int = 0):
+        logger.info("Buscando productos: %r", query)
+        return self.repository.search_productos(query, limit, offset)
+
+    def obtener_producto(self, producto_id: int, expand=()):
+        logger.info("Obteniendo producto por ID: %s", producto_id)
+        return self.repository.get_producto_by_id(producto_id, expand, read_only=True)
 
     def crear_producto(self, nombre_producto: str, precio: float, stock: int,
                        id_categoria: int, id_descuento: int = None,
                        id_iva: int = None, id_proveedor: int = None):
-        logger.info(f"Creando producto: {nombre_producto}")
+        logger.info("Creando producto: %s", nombre_producto)
         return self.repository.create_producto(
             nombre_producto, precio, stock,
             id_categoria, id_descuento, id_iva, id_proveedor
         )
 
+    def crear_productos_bulk(self, items: list, batch_size: int = BULK_BATCH_SIZE):
+        """
+        Crea productos de forma masiva. Valida cada fila, inserta las válidas en lotes de
+        `batch_size` (una transacción por lote) y retorna un resumen con los errores por fila.
+        Si un lote falla en la base de datos, sus filas se reintentan una a una para
+        identificar exactamente cuáles fallaron.
+        """
+        logger.info("Creación masiva de %s productos (lotes de %s)", len(items), batch_size)
+        errors = []
+        valid = []
+        for index, item in enumerate(items):
+            row, error = self._validar_fila_producto(item)
+            if error:
+                errors.append({'index': index, 'error': error})
+            else:
+                valid.append((index, row))
+
+        created = 0
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            try:
+                created += self.repository.bulk_create_productos([row for _, row in batch])
+            except SQLAlchemyError as e:
+                logger.warning("Lote fallido (%s filas), reintentando fila por fila: %s", len(batch), e)
+                for index, row in batch:
+                    try:
+                        created += self.repository.bulk_create_productos([row])
+                    except SQLAlchemyError as row_error:
+                        errors.append({'index': index, 'error': str(getattr(row_error, 'orig', None) or row_error)})
+
+        errors.sort(key=lambda e: e['index'])
+        return {'received': len(items), 'created': created, 'errors': errors}
+
+    @staticmethod
+    def _validar_fila_producto(item):
+        """
+        Valida una fila de la carga masiva y la convierte a columnas de Producto.
+        Retorna una tupla (fila, None) si es válida o (None, mensaje) si no lo es.
+        """
+        if not isinstance(item, dict):
+            return None, 'La fila debe ser un objeto JSON'
+        nombre = item.get('nombre_producto')
+        precio = item.get('precio')
+        stock = item.get('stock')
+        id_categoria = item.get('id_categoria')
+        if not nombre or precio is None or stock is None or id_categoria is None:
+            return None, 'Nombre, precio, stock y categoría son obligatorios'
+        if isinstance(precio, bool) or not isinstance(precio, (int, float)) or precio < 0:
+            return None, 'El precio debe ser un número mayor o igual a cero'
+        if isinstance(stock, bool) or not isinstance(stock, int) or stock < 0:
+            return None, 'El stock debe ser un entero mayor o igual a cero'
+        for campo in ('id_categoria', 'id_descuento', 'id_iva', 'id_proveedor'):
+            valor = item.get(campo)
+            if valor is not None and (isinstance(valor, bool) or not isinstance(valor, int)):
+                return None, f'El campo {campo} debe ser un entero'
+        return {
+            'nombre_producto': nombre,
+            'Precio': precio,
+            'Stock': stock,
+            'id_categoria': id_categoria,
+            'id_descuento': item.get('id_descuento'),
+            'id_iva': item.get('id_iva'),
+            'id_proveedor': item.get('id_proveedor')
+        }, None
+
     def actualizar_producto(self, producto_id: int, nombre_producto: str = None,
                             precio: float = None, stock: int = None,
                             id_categoria: int = None, id_descuento: int = None,
                             id_iva: int = None, id_proveedor: int = None):
-        logger.info(f"Actualizando producto: {producto_id}")
+        logger.info("Actualizando producto: %s", producto_id)
         return self.repository.update_producto(
             producto_id, nombre_producto, precio, stock,
             id_categoria, id_descuento, id_iva, id_proveedor
         )
 
+    def ajustar_stock(self, producto_id: int, cantidad: int):
+        logger.info("Ajustando stock del producto %s: %s", producto_id, cantidad)
+        return self.repository.adjust_stock(producto_id, cantidad)
+
+    def ajustar_stock_lote(self, lineas: list, atomic: bool = True):
+        logger.info("Ajustando stock de %s líneas", len(lineas))
+        return self.repository.adjust_stock_batch(lineas, atomic)
+
     def eliminar_producto(self, producto_id: int):
-        logger.info(f"Eliminando producto: {producto_id}")
+        logger.info("Eliminando producto: %s", producto_id)
         return self.repository.delete_producto(producto_id)
@@ -1,15 +1,25 @@
 from repositories.user_repository import UserRepository
 from models.user_model import User
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.hashing import PasswordHasher, get_password_hasher
+from services.cache import CacheBackend, get_cache, snapshot, restore
+from config.jwt import JWT_ACCESS_TOKEN_EXPIRES
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class UsersService:
-    def __init__(self, db_session):
+    # Usuario resuelto por ID (fila sin la contraseña), en la caché compartida de servicios
+    USER_KEY = 'users:{}'
+
+    def __init__(self, db_session, hasher: PasswordHasher = None, cache: CacheBackend = None):
         self.db_session = db_session
         self.user_repo = UserRepository(db_session)  # Usamos UserRepository para manejar la creación de usuarios
+        # El hashing de contraseñas se ejecuta en un pool de procesos acotado (ver services/hashing.py)
+        self.hasher = hasher if hasher is not None else get_password_hasher()
+        self.cache = cache if cache is not None else get_cache()
+
+    def _evict_user(self, user_id: int):
+        self.cache.delete(self.USER_KEY.format(user_id))
 
     def authenticate_user(self, username: str, password: str):
         """
@@ -17,11 +27,11 @@ class UsersService:
         Devuelve el usuario si las credenciales son correctas.
         """
         user = self.db_session.query(User).filter(User.username == username).first()
-        logger.info(f"Authenticating user: {username}")
-        if user and check_password_hash(user.password, password):
-            logger.info(f"User authenticated successfully: {username}")
+        logger.info("Authenticating user: %s", username)
+        if user and self.hasher.verify_password(user.password, password):
+            logger.info("User authenticated successfully: %s", username)
             return user
-        logger.warning(f"Failed authentication attempt: {username}")
+        logger.warning("Failed authentication attempt: %s", username)
         return None
 
     def get_all_users(self):
@@ -29,72 +39,87 @@ class UsersService:
         Recupera todos los usuarios de la base de datos.
         """
         logger.info("Fetching all users")
-        return self.db_session.query(User).all()
+        return self.user_repo.get_all_users()
+
+    def get_users_page(self, limit: int, after: int = None):
+        """
+        Recupera una página de usuarios usando paginación por cursor sobre el ID.
+        """
+        logger.info("Fetching users page (limit=%s, after=%s)", limit, after)
+        return self.user_repo.get_users_page(limit, after)
 
     def get_user_by_id(self, user_id: int):
         """
         Recupera un usuario específico por su ID.
+        Lectura read-through: las consultas repetidas del mismo usuario (el cliente que consulta su
+        propio perfil con su token) se sirven desde la caché durante JWT_ACCESS_TOKEN_EXPIRES segundos,
+        sin consultar la base de datos. update_user y delete_user invalidan la entrada.
         """
-        logger.info(f"Fetching user by ID: {user_id}")
-        return self.db_session.query(User).filter(User.id == user_id).first()
+        logger.info("Fetching user by ID: %s", user_id)
+        key = self.USER_KEY.format(user_id)
+        data = self.cache.get(key)
+        if data is None:
+            user = self.user_repo.get_user_by_id(user_id, read_only=True)
+            if user is None:
+                return None
+            data = snapshot([user])[0]
+            self.cache.set(key, data, ttl=JWT_ACCESS_TOKEN_EXPIRES)
+        return restore([data])[0]
 
     def create_user(self, username: str, password: str, email: str, full_name: str = None):
         """
         Crea un nuevo usuario en la base de datos.
         """
         # Cifra la contraseña antes de almacenarla
-        password_hashed = generate_password_hash(password)
-        logger.info(f"Creating user: {username}")
+        password_hashed = self.hasher.hash_password(password)
+        logger.info("Creating user: %s", username)
 
         # Usamos el repositorio para crear el usuario
         user = self.user_repo.create_user(username, password_hashed, email, full_name)
 
         if user:
-            logger.info(f"Usuario creado con éxito: {username}")
+            logger.info("Usuario creado con éxito: %s", username)
             return user
         else:
-            logger.error(f"No se pudo crear el usuario: {username}")
+            logger.error("No se pudo crear el usuario: %s", username)
             return None
 
     def update_user(self, user_id: int, username: str = None, password: str = None, email: str = None, full_name: str = None):
         """
         Actualiza la información de un usuario existente.
         """
-        logger.info(f"Updating user: {user_id}")
-        password_hashed = generate_password_hash(password) if password else None
+        logger.info("Updating user: %s", user_id)
+        password_hashed = self.hasher.hash_password(password) if password else None
 
-        user = self.db_session.query(User).filter(User.id == user_id).first()
+        # Los valores vacíos no modifican el campo
+        self._evict_user(user_id)
+        try:
+            user = self.user_repo.update_user(user_id, username or None, password_hashed, email or None, full_name or None)
+        finally:
+            # Otra vez tras el commit: descarta una lectura concurrente que rellenó la caché con la fila vieja
+            self._evict_user(user_id)
 
         if user:
-            if username:
-                user.username = username
-            if password_hashed:
-                user.password = password_hashed
-            if email:
-                user.email = email
-            if full_name:
-                user.full_name = full_name
-
-            self.db_session.commit()
-            self.db_session.refresh(user)
-            logger.info(f"Usuario actualizado: {user_id}")
+            logger.info("Usuario actualizado: %s", user_id)
             return user
         else:
-            logger.warning(f"Usuario no encontrado para actualizar: {user_id}")
+            logger.warning("Usuario no encontrado para actualizar: %s", user_id)
             return None
 
     def delete_user(self, user_id: int):
         """
         Elimina un usuario de la base de datos.
         """
-        logger.info(f"Deleting user: {user_id}")
-        user = self.db_session.query(User).filter(User.id == user_id).first()
+        logger.info("Deleting user: %s", user_id)
+        self._evict_user(user_id)
+        try:
+            user = self.user_repo.delete_user(user_id)
+        finally:
+            self._evict_user(user_id)
 
         if user:
-            self.db_session.delete(user)
-            self.db_session.commit()
-            logger.info(f"Usuario eliminado: {user_id}")
+            logger.info("Usuario eliminado: %s", user_id)
             return user
         else:
-            logger.warning(f"Usuario no encontrado para eliminar: {user_id}")
+            logger.warning("Usuario no encontrado para eliminar: %s", user_id)
             return None
@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from models.db import Base
+from repositories import search_index
+from repositories.search_index import create_search_schema
+from repositories.versioning import install_version_tracking
+import models.product_model  # noqa: F401  Registra las tablas en Base.metadata
+import models.user_model  # noqa: F401
+
+"""
+Fixtures comunes: una base SQLite en memoria con el esquema completo para cada prueba, una base
+SQLite en archivo (varias conexiones reales, para pruebas concurrentes) y un cliente HTTP de la
+aplicación sobre esa base, con o sin JWT.
+"""
+
+def _create_schema(engine):
+    Base.metadata.create_all(engine)
+    create_search_schema(engine)
+    install_version_tracking(engine)
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    search_index._indexes.clear()  # Los índices se cachean por URL y todas las pruebas usan 'sqlite://'
+    _create_schema(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def file_engine(tmp_path):
+    # timeout: segundos que SQLite espera un bloqueo de escritura de otra conexión
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={'check_same_thread': False, 'timeout': 30},
+                           pool_size=8, max_overflow=0)
+    _create_schema(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def client(file_engine, monkeypatch):
+    """
+    Cliente de prueba de la aplicación con la sesión por petición (config.database.Session)
+    enlazada a `file_engine`, sin JWT en las rutas de productos públicas.
+    """
+    from flask import Flask
+    from config import database
+    from controllers.product_controllers import product_bp
+    from controllers.serializers import register_json_provider
+    from services.cache import get_cache
+    monkeypatch.setattr(database, '_engines', (file_engine, file_engine, None))
+    database.SessionFactory.configure(bind=file_engine, read_bind=file_engine, replicas=None)
+    get_cache().clear()
+    app = Flask(__name__)
+    register_json_provider(app)
+    app.register_blueprint(product_bp)
+    database.register_session_teardown(app)
+    yield app.test_client()
+    database.Session.remove()
+    database.SessionFactory.configure(bind=None, read_bind=None, replicas=None)
+    get_cache().clear()
+
+@pytest.fixture
+def auth_client(client):
+    """
+    `client` con JWT configurado y un token de acceso válido en cada petición.
+    """
+    from flask_jwt_extended import JWTManager, create_access_token
+    app = client.application
+    app.config['JWT_SECRET_KEY'] = 'clave-de-prueba-de-32-bytes-o-mas'
+    JWTManager(app)
+    with app.app_context():
+        token = create_access_token(identity='1')
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+@pytest.fixture
+def db_session(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
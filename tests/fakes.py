@@ -0,0 +1,50 @@
+import time
+import threading
+
+"""
+Dobles de prueba para los backends compartidos.
+"""
+
+class FakeSharedCache:
+    """
+    Cliente local que imita la parte de la API de Redis usada por RedisCache y RedisVersionStore
+    (get/set/delete/incr/scan_iter). Como Redis, guarda y retorna bytes.
+    Permite probar el backend compartido sin un servidor Redis.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return raw
+
+    def set(self, key, value, ex=None):
+        raw = value.encode() if isinstance(value, str) else value
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex if ex else None, raw)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            expires_at, raw = self._data.get(key, (None, b'0'))
+            value = int(raw) + 1
+            self._data[key] = (expires_at, str(value).encode())
+            return value
+
+    def scan_iter(self, pattern='*'):
+        prefix = pattern.rstrip('*')
+        with self._lock:
+            return [k for k in self._data if k.startswith(prefix)]
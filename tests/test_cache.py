@@ -0,0 +1,75 @@
+from decimal import Decimal
+from collections import namedtuple
+import pytest
+from sqlalchemy.orm import sessionmaker
+from services.cache import TTLCache, RedisCache, cached_list
+from services.product_service import CategoriaService, ProveedorService, DescuentoService, ImpuestoService
+from tests.fakes import FakeSharedCache
+
+@pytest.fixture(params=['memory', 'redis'])
+def cache(request):
+    if request.param == 'redis':
+        return RedisCache(client=FakeSharedCache())
+    return TTLCache()
+
+Fila = namedtuple('Fila', 'id nombre')
+
+class CountingLoader:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.rows
+
+def test_cached_list_read_through(cache):
+    loader = CountingLoader([Fila(1, 'a'), Fila(2, 'b')])
+    first = cached_list(cache, 'k', loader)
+    second = cached_list(cache, 'k', loader)
+    assert loader.calls == 1
+    assert [r.nombre for r in first] == [r.nombre for r in second] == ['a', 'b']
+
+def test_cached_list_reloads_after_delete(cache):
+    loader = CountingLoader([Fila(1, 'a')])
+    cached_list(cache, 'k', loader)
+    cache.delete('k')
+    cached_list(cache, 'k', loader)
+    assert loader.calls == 2
+
+def test_redis_cache_round_trips_decimal_as_json():
+    client = FakeSharedCache()
+    cache = RedisCache(client=client)
+    cache.set('k', [{'porcentaje': Decimal('12.35'), 'nombre': 'IVA'}])
+    assert client.get('api:k') == b'[{"porcentaje":{"__decimal__":"12.35"},"nombre":"IVA"}]'
+    assert cache.get('k') == [{'porcentaje': Decimal('12.35'), 'nombre': 'IVA'}]
+
+def test_redis_cache_rejects_unserializable_values():
+    with pytest.raises(TypeError):
+        RedisCache(client=FakeSharedCache()).set('k', [object()])
+
+@pytest.mark.parametrize('service_class, listar, crear, args', [
+    (CategoriaService, 'listar_categorias', 'crear_categoria', ('Bebidas',)),
+    (ProveedorService, 'listar_proveedores', 'crear_proveedor', ('ACME',)),
+    (DescuentoService, 'listar_descuentos', 'crear_descuento', ('Promo', 10)),
+    (ImpuestoService, 'listar_impuestos', 'crear_impuesto', ('IVA', 21)),
+])
+def test_crear_invalidates_cached_list(db_session, cache, service_class, listar, crear, args):
+    service = service_class(db_session, cache=cache)
+    assert getattr(service, listar)() == []
+    getattr(service, crear)(*args)
+    assert len(getattr(service, listar)()) == 1
+
+@pytest.mark.parametrize('service_class,listar,crear,args', [
+    (CategoriaService, 'listar_categorias', 'crear_categoria', ('Otra',)),
+    (ImpuestoService, 'listar_impuestos', 'crear_impuesto', ('IVA', 21)),
+])
+def test_write_from_other_process_invalidates_cached_list(engine, db_session, service_class, listar, crear, args):
+    # Otro worker escribe con su propia sesión y su propia caché en memoria
+    service = service_class(db_session, cache=TTLCache(ttl=60))
+    assert getattr(service, listar)() == []
+    db_session.commit()  # Fin de la petición
+    other = sessionmaker(bind=engine)()
+    getattr(service_class(other, cache=TTLCache(ttl=60)), crear)(*args)
+    other.close()
+    assert len(getattr(service, listar)()) == 1
@@ -0,0 +1,32 @@
+import logging
+from config import database
+
+"""
+Configuración de la base de datos: prueba de conexión a MySQL y fallback a SQLite.
+"""
+
+class BrokenEngine:
+    def connect(self):
+        raise ValueError('fallo fuera del driver')
+
+def _probe(monkeypatch, create_engine):
+    monkeypatch.setattr(database, 'MYSQL_URI', 'mysql+pymysql://u:p@localhost/db')
+    monkeypatch.setattr(database, '_mysql_probe', None)
+    monkeypatch.setattr(database, '_create_mysql_engine', create_engine)
+    return database.start_connectivity_check()
+
+def test_probe_reports_any_exception(monkeypatch, caplog):
+    with caplog.at_level(logging.WARNING, logger='config.database'):
+        engine, result = _probe(monkeypatch, BrokenEngine)
+        assert result.result(timeout=5) is False
+    assert isinstance(engine, BrokenEngine)
+    assert 'fallo fuera del driver' in caplog.text
+
+def test_unusable_url_falls_back_without_raising(monkeypatch, caplog):
+    def create_engine():
+        return database.make_url('no es una url')  # ArgumentError
+
+    with caplog.at_level(logging.WARNING, logger='config.database'):
+        engine, result = _probe(monkeypatch, create_engine)
+    assert engine is None and result.result(timeout=0) is False
+    assert 'MYSQL_URI no utilizable' in caplog.text
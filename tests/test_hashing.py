@@ -0,0 +1,38 @@
+import time
+import threading
+import pytest
+from flask import Flask
+from controllers.user_controllers import hashing_saturated_response
+from services.hashing import PasswordHasher, HashingSaturatedError, HashingTimeoutError, _mp_context
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, queue_size=2, method='pbkdf2:sha256:1000', timeout=5)
+    yield hasher
+    hasher.shutdown()
+
+def test_start_creates_processes_before_first_use(hasher):
+    hasher.start()
+    assert len(hasher._executor._processes) == 1
+    assert hasher.verify_password(hasher.hash_password('secreta'), 'secreta')
+
+def test_fork_only_from_single_threaded_process():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        # Con otro hilo en marcha el pool no debe crearse con fork
+        assert _mp_context().get_start_method() != 'fork'
+    finally:
+        stop.set()
+        thread.join()
+
+def test_timeout_is_rejected_like_saturation(hasher):
+    hasher.timeout = 0.05
+    with pytest.raises(HashingTimeoutError) as excinfo:
+        hasher._run(time.sleep, 1)
+    assert isinstance(excinfo.value, HashingSaturatedError)
+    with Flask(__name__).app_context():
+        response, status, headers = hashing_saturated_response(excinfo.value)
+        assert status == 503 and headers['Retry-After'] == '1'
+        assert hashing_saturated_response(HashingSaturatedError())[1] == 429
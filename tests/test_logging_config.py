@@ -0,0 +1,19 @@
+import sys
+import queue
+import logging
+from config.logging_config import DeferredQueueHandler
+
+def test_prepare_merges_args_without_formatting():
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    handler.setFormatter(logging.Formatter('FORMATEADO %(message)s'))
+    data = ['a']
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        record = logging.getLogger('x').makeRecord('x', logging.ERROR, __file__, 1, 'valor %s', (data,), sys.exc_info())
+    prepared = handler.prepare(record)
+    data.append('b')
+    assert prepared.msg == "valor ['a']" and prepared.args is None
+    # El formato y la traza quedan para el hilo escritor
+    assert prepared.exc_info is not None and prepared.exc_text is None
+    assert record.args == (data,)
@@ -0,0 +1,79 @@
+import json
+import os
+import pytest
+from sqlalchemy import insert
+from config import metrics
+from config.metrics import HistogramFamily, mark_process_dead, render_metrics, write_process_metrics
+from models.product_model import Categoria, Producto
+
+"""
+Métricas: suma de los acumulados de varios workers (modo multiproceso), workers terminados y
+consultas de las respuestas en streaming.
+"""
+
+def _sample(text: str, prefix: str) -> float:
+    values = [float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(prefix)]
+    assert values, prefix
+    return sum(values)
+
+def _worker_file(directory, pid: int, observaciones: int):
+    family = HistogramFamily(metrics.REQUEST_QUERIES.name, '', ('method', 'route'), metrics.REQUEST_QUERIES.buckets)
+    for _ in range(observaciones):
+        family.observe(2, 'GET', '/otra')
+    state = {'histograms': {family.name: family.dump()}, 'pools': {'primary': 3}}
+    (directory / f"{pid}.json").write_text(json.dumps(state))
+
+def test_render_sums_other_workers_and_labels_pools_by_pid(tmp_path, file_engine):
+    _worker_file(tmp_path, 101, 3)
+    _worker_file(tmp_path, 102, 4)
+    text = render_metrics({'primary': file_engine}, str(tmp_path))
+    assert _sample(text, 'http_request_db_queries_count{method="GET",route="/otra"}') == 7
+    assert _sample(text, 'http_request_db_queries_bucket{method="GET",route="/otra",le="+Inf"}') == 7
+    assert 'db_pool_checked_out{pool="primary",pid="101"} 3' in text
+    assert f'db_pool_checked_out{{pool="primary",pid="{os.getpid()}"}} 0' in text
+
+def test_dead_workers_keep_counting_without_pool_gauge(tmp_path):
+    _worker_file(tmp_path, 101, 3)
+    _worker_file(tmp_path, 102, 4)
+    mark_process_dead(101, str(tmp_path))
+    mark_process_dead(102, str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ['dead.json']
+    text = render_metrics(None, str(tmp_path))
+    # Los contadores no retroceden al reciclar workers
+    assert _sample(text, 'http_request_db_queries_count{method="GET",route="/otra"}') == 7
+    assert 'pid="101"' not in text
+
+def test_write_process_metrics_is_read_by_other_processes(tmp_path):
+    write_process_metrics(str(tmp_path))
+    assert os.listdir(tmp_path) == [f"{os.getpid()}.json"]
+    state = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+    assert set(state['histograms']) == {family.name for family in metrics.FAMILIES}
+
+@pytest.fixture
+def metrics_client(auth_client, file_engine):
+    metrics.register_metrics(auth_client.application, {'primary': file_engine})
+    with file_engine.begin() as conn:
+        conn.execute(insert(Categoria.__table__), {'id_categoria': 1, 'nombre_categoria': 'Cat'})
+        conn.execute(insert(Producto.__table__), [
+            {'id_producto': i, 'nombre_producto': f'Prod{i}', 'Precio': 10, 'Stock': 1, 'id_categoria': 1}
+            for i in range(1, 6)
+        ])
+    return auth_client
+
+def _queries(route: str) -> tuple:
+    for label_values, _, total, count in metrics.REQUEST_QUERIES.dump():
+        if label_values == ['GET', route]:
+            return total, count
+    return 0, 0
+
+def test_streamed_export_counts_its_queries(metrics_client, monkeypatch):
+    from controllers import product_controllers
+    monkeypatch.setattr(product_controllers, 'EXPORT_BATCH_SIZE', 2)
+    total_antes, count_antes = _queries('/productos/export')
+    response = metrics_client.get('/productos/export')
+    assert len(response.get_data(as_text=True).splitlines()) == 5
+    assert 'Server-Timing' not in response.headers
+    total, count = _queries('/productos/export')
+    assert count == count_antes + 1
+    # Las consultas de los lotes se ejecutan mientras se envía el cuerpo y cuentan en la petición
+    assert total - total_antes >= 3
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import insert
+from models.product_model import Producto
+from repositories.product_repository import ProductoRepository
+from repositories.search_index import InMemoryInvertedIndex
+
+def _rows(*nombres):
+    return [{'nombre_producto': nombre, 'Precio': 10, 'Stock': 1} for nombre in nombres]
+
+@pytest.fixture(params=[True, False], ids=['returning', 'sin_returning'])
+def repository(request, db_session, monkeypatch):
+    monkeypatch.setattr(db_session.get_bind().dialect, 'insert_returning', request.param)
+    return ProductoRepository(db_session)
+
+def test_bulk_indexes_only_inserted_rows(repository, db_session, monkeypatch):
+    index = InMemoryInvertedIndex()
+    index.ensure_ready(db_session)
+    monkeypatch.setattr(ProductoRepository, 'search_index', index)
+    # Fila escrita por otro proceso: no pertenece al lote y no debe indexarse aquí
+    db_session.execute(insert(Producto.__table__), _rows('Ajena'))
+    db_session.commit()
+    assert repository.bulk_create_productos(_rows('Manzana roja', 'Pera verde')) == 2
+    ids = [pid for pid, _ in index.search(db_session, 'manzana', 10) + index.search(db_session, 'pera', 10)]
+    assert ids == [2, 3]
+    assert index.search(db_session, 'ajena', 10) == []
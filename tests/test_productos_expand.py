@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import event, insert
+from models.product_model import Categoria, Proveedor, Descuento, Impuesto, Producto
+from controllers.product_controllers import EXPAND_RESPONSE_KEYS, _productos_dicts
+from repositories.product_repository import ProductoRepository
+from services.cache import NullCache
+from services.price_service import PrecioService
+from services.product_service import ProductoService
+
+"""
+Una página de GET /productos?expand=... debe costar un número fijo de consultas, sin importar
+cuántos productos contenga (sin consultas N+1 al serializar las relaciones).
+"""
+
+EXPAND = tuple(ProductoRepository.EXPANDABLE)
+
+@pytest.fixture
+def seeded(db_session):
+    # Varias filas de cada tabla de referencia para que los productos apunten a relaciones distintas
+    for i in range(1, 6):
+        db_session.execute(insert(Categoria.__table__), {'id_categoria': i, 'nombre_categoria': f'Cat{i}'})
+        db_session.execute(insert(Proveedor.__table__), {'id_proveedor': i, 'nombre': f'Prov{i}'})
+        db_session.execute(insert(Descuento.__table__), {'id_descuento': i, 'nombre': f'Desc{i}', 'porcentaje': i})
+        db_session.execute(insert(Impuesto.__table__), {'id_iva': i, 'nombre': f'IVA{i}', 'porcentaje': 10 + i})
+    db_session.execute(insert(Producto.__table__), [
+        {'nombre_producto': f'Prod{n}', 'Precio': 10 + n, 'Stock': n, 'id_categoria': n % 5 + 1,
+         'id_proveedor': (n + 1) % 5 + 1, 'id_descuento': (n + 2) % 5 + 1, 'id_iva': (n + 3) % 5 + 1}
+        for n in range(100)
+    ])
+    db_session.commit()
+    return db_session
+
+def _queries_for_page(db_session, limit: int) -> int:
+    """
+    Cuenta las sentencias SQL de una página expandida: lectura, precios y serialización.
+    """
+    db_session.rollback()  # Transacción nueva por página, como cada petición (versiones incluidas)
+    db_session.expunge_all()  # Sin instancias en el identity map: cada página parte en frío
+    productos_service = ProductoService(db_session)
+    precio_service = PrecioService(db_session, cache=NullCache())
+    statements = []
+    engine = db_session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        productos, _ = productos_service.listar_productos_paginado(limit, expand=EXPAND)
+        items = _productos_dicts(productos, precio_service.calcular_lote(productos), EXPAND)
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    assert len(items) == limit
+    assert all(item[EXPAND_RESPONSE_KEYS[name]] for item in items for name in EXPAND)
+    return len(statements)
+
+def test_expanded_page_query_count_is_constant(seeded):
+    counts = {limit: _queries_for_page(seeded, limit) for limit in (1, 10, 50)}
+    assert len(set(counts.values())) == 1, counts
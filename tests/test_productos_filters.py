@@ -0,0 +1,93 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import insert, text
+from models.product_model import Categoria, Proveedor, Producto
+from repositories.product_repository import ProductoRepository, _prefix_upper_bound
+
+"""
+Filtros de GET /productos: resultados iguales a filtrar en Python, prefijos de nombre en los bordes
+del rango Unicode y uso de los índices (EXPLAIN QUERY PLAN de SQLite).
+"""
+
+MAX = '\U0010ffff'
+BEFORE_SURROGATES = '\ud7ff'  # Su siguiente punto de código es un surrogate (no codificable)
+NOMBRES = ['Cafe', 'Café', 'Cafetera', 'cafe', 'Caf', 'Té', 'Z', 'Z' + MAX, 'Z' + MAX + 'A', 'Z' + MAX + MAX,
+           MAX, MAX + MAX, MAX + 'A', BEFORE_SURROGATES + 'x']
+
+@pytest.fixture
+def productos(db_session):
+    for i in (1, 2):
+        db_session.execute(insert(Categoria.__table__), {'id_categoria': i, 'nombre_categoria': f'Cat{i}'})
+        db_session.execute(insert(Proveedor.__table__), {'id_proveedor': i, 'nombre': f'Prov{i}'})
+    rows = [
+        {'id_producto': n + 1, 'nombre_producto': nombre, 'Precio': Decimal(10 + n), 'Stock': n % 3,
+         'id_categoria': n % 2 + 1, 'id_proveedor': (n // 2) % 2 + 1}
+        for n, nombre in enumerate(NOMBRES)
+    ]
+    db_session.execute(insert(Producto.__table__), rows)
+    db_session.commit()
+    return rows
+
+def _expected(rows, filters):
+    def keep(row):
+        return all((
+            filters.get('id_categoria') in (None, row['id_categoria']),
+            filters.get('id_proveedor') in (None, row['id_proveedor']),
+            filters.get('precio_min') is None or row['Precio'] >= filters['precio_min'],
+            filters.get('precio_max') is None or row['Precio'] <= filters['precio_max'],
+            filters.get('en_stock') is None or (row['Stock'] > 0) == filters['en_stock'],
+            not filters.get('nombre') or row['nombre_producto'].startswith(filters['nombre']),
+        ))
+    return sorted(row['id_producto'] for row in rows if keep(row))
+
+@pytest.mark.parametrize('filters', [
+    {'id_categoria': 1},
+    {'id_categoria': 2, 'precio_min': Decimal('12'), 'precio_max': Decimal('19.5')},
+    {'id_proveedor': 1, 'precio_max': Decimal('15')},
+    {'id_proveedor': 2, 'en_stock': True},
+    {'en_stock': False},
+    {'nombre': 'Caf'},
+    {'nombre': 'Cafe'},
+    {'nombre': 'Z'},
+    {'nombre': 'Z' + MAX},
+    {'nombre': 'Z' + MAX + MAX},
+    {'nombre': MAX},
+    {'nombre': MAX + MAX},
+    {'nombre': BEFORE_SURROGATES},
+    {'nombre': 'Caf', 'id_categoria': 1, 'en_stock': True},
+])
+def test_filters_match_python_filtering(db_session, productos, filters):
+    resultado = ProductoRepository(db_session).get_all_productos(filters=filters)
+    assert sorted(row.id_producto for row in resultado) == _expected(productos, filters)
+
+def test_prefix_upper_bound():
+    assert _prefix_upper_bound('Caf') == 'Cag'
+    assert _prefix_upper_bound('Z' + MAX + MAX) == '['
+    assert _prefix_upper_bound(MAX + MAX) is None
+    assert _prefix_upper_bound('a' + BEFORE_SURROGATES) == 'a\ue000'
+
+def test_prefix_ending_in_last_code_point_is_not_a_server_error(auth_client, file_engine):
+    with file_engine.begin() as conn:
+        conn.execute(insert(Producto.__table__), [
+            {'nombre_producto': nombre, 'Precio': 1, 'Stock': 1} for nombre in ('Z' + MAX, 'Z' + MAX + 'x', 'Zz')
+        ])
+    response = auth_client.get('/productos', query_string={'nombre': 'Z' + MAX})
+    assert response.status_code == 200
+    assert [p['nombre'] for p in response.get_json()] == ['Z' + MAX, 'Z' + MAX + 'x']
+
+def _plan(db_session, filters) -> str:
+    query = ProductoRepository(db_session)._query_productos(filters=filters)
+    sql = query.compile(db_session.get_bind(), compile_kwargs={'literal_binds': True})
+    return ' | '.join(row[-1] for row in db_session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+
+@pytest.mark.parametrize('filters, index', [
+    ({'id_categoria': 1, 'precio_min': Decimal('12'), 'precio_max': Decimal('20')}, 'ix_productos_categoria_precio'),
+    ({'id_categoria': 2}, 'ix_productos_categoria_precio'),
+    ({'id_proveedor': 1, 'precio_max': Decimal('15')}, 'ix_productos_proveedor_precio'),
+    ({'nombre': 'Caf'}, 'ix_productos_nombre'),
+    ({'nombre': MAX}, 'ix_productos_nombre'),
+])
+def test_filters_use_indexes(db_session, productos, filters, index):
+    plan = _plan(db_session, filters)
+    assert f'USING INDEX {index}' in plan, plan
+    assert 'SCAN productos' not in plan
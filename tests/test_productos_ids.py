@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import insert
+from controllers import product_controllers
+from models.product_model import Categoria, Producto
+
+"""
+GET /productos?ids=...: productos en el orden pedido, sin combinarse con paginación ni filtros y
+con un máximo de IDs (MAX_LOOKUP_IDS).
+"""
+
+@pytest.fixture
+def productos(file_engine):
+    with file_engine.begin() as conn:
+        conn.execute(insert(Categoria.__table__), {'id_categoria': 1, 'nombre_categoria': 'Cat'})
+        conn.execute(insert(Producto.__table__), [
+            {'id_producto': i, 'nombre_producto': f'Prod{i}', 'Precio': 10, 'Stock': i, 'id_categoria': 1}
+            for i in range(1, 6)
+        ])
+
+def test_ids_keep_requested_order_and_report_missing(auth_client, productos):
+    response = auth_client.get('/productos?ids=4,1,99&fields=id')
+    assert response.status_code == 200
+    assert response.get_json() == {'items': [{'id': 4}, {'id': 1}], 'missing': [99]}
+
+@pytest.mark.parametrize('query', ['limit=2', 'after=1', 'limit=2&after=1', 'id_categoria=1', 'en_stock=true',
+                                   'nombre=Prod', 'precio_min=1'])
+def test_ids_cannot_be_combined_with_pagination_or_filters(auth_client, productos, query):
+    response = auth_client.get(f'/productos?ids=1,2&{query}')
+    assert response.status_code == 400
+    assert 'ids' in response.get_json()['error']
+
+def test_ids_are_capped_before_parsing(auth_client, productos, monkeypatch):
+    monkeypatch.setattr(product_controllers, 'MAX_LOOKUP_IDS', 3)
+    assert auth_client.get('/productos?ids=1,2,3').status_code == 200
+    # Se rechaza por cantidad aunque algún valor no sea un entero
+    response = auth_client.get('/productos?ids=1,2,3,x')
+    assert response.status_code == 400
+    assert 'como máximo 3' in response.get_json()['error']
+    assert auth_client.get('/productos?ids=1,x').status_code == 400
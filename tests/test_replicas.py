@@ -0,0 +1,130 @@
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import DBAPIError
+from models.product_model import Categoria
+from config.database import RoutingSession
+from config.replicas import ReplicaSet
+
+"""
+Enrutamiento de lecturas: RoutingSession (config/database.py) y ReplicaSet (config/replicas.py) sobre
+un primario y dos réplicas en archivos SQLite. Cada base tiene una categoría con su propio nombre,
+así que cada lectura indica a qué engine fue.
+"""
+
+NAMES = ('primary', 'replica-0', 'replica-1')
+
+@pytest.fixture
+def engines(tmp_path):
+    engines = {}
+    for name in NAMES:
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db", connect_args={'check_same_thread': False})
+        Categoria.__table__.create(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Categoria.__table__), {'id_categoria': 1, 'nombre_categoria': name})
+        engines[name] = engine
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+def _replica_set(engines, strategy='round_robin'):
+    # health_interval=0: sin hilo de chequeos, el estado lo fija cada prueba
+    return ReplicaSet({name: engines[name] for name in NAMES[1:]}, strategy=strategy, health_interval=0)
+
+def _session(engines, **kwargs):
+    return RoutingSession(bind=engines['primary'], **kwargs)
+
+def _read(session) -> str:
+    return session.scalar(select(Categoria.nombre_categoria).where(Categoria.id_categoria == 1))
+
+def _write(session, id_categoria: int = 2):
+    session.add(Categoria(id_categoria=id_categoria, nombre_categoria='nueva'))
+    session.flush()
+
+def _count(engine) -> int:
+    with engine.connect() as conn:
+        return len(conn.execute(select(Categoria.id_categoria)).all())
+
+def test_reads_go_to_one_replica_and_writes_to_primary(engines):
+    session = _session(engines, replicas=_replica_set(engines))
+    replica = _read(session)
+    assert replica in NAMES[1:]
+    # La réplica se elige una vez por sesión
+    assert {_read(session) for _ in range(5)} == {replica}
+    _write(session)
+    session.commit()
+    session.close()
+    assert _count(engines['primary']) == 2
+    assert _count(engines['replica-0']) == _count(engines['replica-1']) == 1
+
+def test_session_stays_on_primary_after_writing_until_closed(engines):
+    session = _session(engines, replicas=_replica_set(engines))
+    assert _read(session) != 'primary'
+    _write(session)
+    # Lee sus propias escrituras dentro de la transacción...
+    assert _read(session) == 'primary'
+    session.commit()
+    # ...y después del commit, porque las réplicas pueden ir retrasadas
+    assert _read(session) == 'primary'
+    session.close()
+    assert _read(session) != 'primary'
+    session.close()
+
+def test_read_bind_returns_to_reader_after_commit(engines):
+    session = _session(engines, read_bind=engines['replica-0'])
+    assert _read(session) == 'replica-0'
+    _write(session)
+    assert _read(session) == 'primary'
+    session.commit()
+    assert _read(session) == 'replica-0'
+    _write(session, 3)
+    session.rollback()
+    assert _read(session) == 'replica-0'
+    session.close()
+
+def test_round_robin_alternates_replicas(engines):
+    replicas = _replica_set(engines)
+    chosen = [replicas.choose() for _ in range(4)]
+    assert chosen[0] is not chosen[1]
+    assert chosen[0] is chosen[2] and chosen[1] is chosen[3]
+    assert {id(engine) for engine in chosen} == {id(engines['replica-0']), id(engines['replica-1'])}
+
+def test_least_connections_avoids_busy_replica(engines):
+    replicas = _replica_set(engines, 'least_connections')
+    with engines['replica-0'].connect():
+        assert all(replicas.choose() is engines['replica-1'] for _ in range(4))
+    with engines['replica-1'].connect():
+        assert all(replicas.choose() is engines['replica-0'] for _ in range(4))
+
+def test_unhealthy_replica_is_skipped_and_primary_used_when_none_left(engines):
+    replicas = _replica_set(engines)
+    replicas.mark_down('replica-0')
+    assert {_read(_session(engines, replicas=replicas)) for _ in range(4)} == {'replica-1'}
+    replicas.mark_down('replica-1')
+    assert replicas.choose() is None
+    assert _read(_session(engines, replicas=replicas)) == 'primary'
+    replicas.mark_up('replica-0')
+    assert _read(_session(engines, replicas=replicas)) == 'replica-0'
+
+def test_health_check_marks_replicas_down_and_up(engines, tmp_path):
+    broken = create_engine(f"sqlite:///{tmp_path / 'no-existe' / 'replica.db'}")
+    replicas = ReplicaSet({'replica-0': engines['replica-0'], 'broken': broken}, health_interval=0)
+    replicas.check_health()
+    assert replicas.healthy() == ['replica-0']
+    assert all(replicas.choose() is engines['replica-0'] for _ in range(3))
+    (tmp_path / 'no-existe').mkdir()
+    replicas.check_health()
+    assert replicas.healthy() == ['replica-0', 'broken']
+    broken.dispose()
+
+def test_disconnect_during_query_marks_replica_down(engines):
+    replicas = _replica_set(engines)
+    session = _session(engines, replicas=replicas)
+    replica = _read(session)
+    # La conexión se pierde a mitad de la sesión: la consulta falla y la réplica sale de servicio
+    engine = session.get_bind(clause=select(Categoria))
+    session.connection(bind_arguments={'bind': engine}).connection.dbapi_connection.close()
+    with pytest.raises(DBAPIError):
+        _read(session)
+    session.close()
+    assert replicas.healthy() == [name for name in NAMES[1:] if name != replica]
+    assert {_read(_session(engines, replicas=replicas)) for _ in range(3)} == set(replicas.healthy())
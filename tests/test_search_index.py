@@ -0,0 +1,102 @@
+import threading
+import pytest
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import sessionmaker
+from models.product_model import Producto
+from repositories.search_index import SearchIndex, SQLiteFTSIndex, InMemoryInvertedIndex, create_search_schema
+
+def _insert(db_session, nombre):
+    return db_session.execute(
+        insert(Producto.__table__).returning(Producto.id_producto), {'nombre_producto': nombre, 'Precio': 1, 'Stock': 1}
+    ).scalar_one()
+
+def test_search_index_is_abstract():
+    with pytest.raises(TypeError):
+        SearchIndex()
+
+def test_create_search_schema_backfills_once(engine, db_session):
+    _insert(db_session, 'Manzana')
+    db_session.commit()
+    create_search_schema(engine)
+    create_search_schema(engine)
+    assert db_session.execute(text("SELECT count(*) FROM productos_fts")).scalar() == 1
+    assert [pid for pid, _ in SQLiteFTSIndex().search(db_session, 'manz', 10)] == [1]
+
+@pytest.mark.parametrize('index_class', [SQLiteFTSIndex, InMemoryInvertedIndex])
+def test_index_follows_transaction_outcome(db_session, index_class):
+    index = index_class()
+    index.ensure_ready(db_session)
+    index.add(db_session, _insert(db_session, 'Pera'), 'Pera')
+    db_session.rollback()
+    assert index.search(db_session, 'pera', 10) == []
+    producto_id = _insert(db_session, 'Uva')
+    index.add(db_session, producto_id, 'Uva')
+    db_session.commit()
+    assert [pid for pid, _ in index.search(db_session, 'uva', 10)] == [producto_id]
+    index.remove(db_session, producto_id)
+    db_session.rollback()
+    assert [pid for pid, _ in index.search(db_session, 'uva', 10)] == [producto_id]
+
+def test_memory_index_applies_changes_after_commit(db_session):
+    index = InMemoryInvertedIndex()
+    index.ensure_ready(db_session)
+    producto_id = _insert(db_session, 'Kiwi')
+    index.add(db_session, producto_id, 'Kiwi')
+    assert index.search(db_session, 'kiwi', 10) == []
+    db_session.commit()
+    assert [pid for pid, _ in index.search(db_session, 'kiwi', 10)] == [producto_id]
+
+@pytest.mark.parametrize('index_class', [SQLiteFTSIndex, InMemoryInvertedIndex])
+def test_fuzzy_matching_is_the_same_in_every_backend(db_session, index_class):
+    index = index_class()
+    index.ensure_ready(db_session)
+    laptop, teclado = (_insert(db_session, nombre) for nombre in ('Laptop Gamer', 'Teclado mecánico'))
+    index.add_many(db_session, [(laptop, 'Laptop Gamer'), (teclado, 'Teclado mecánico')])
+    db_session.commit()
+
+    def found(query):
+        return {pid for pid, _ in index.search(db_session, query, 10)}
+
+    # Sustitución, inserción y omisión de una letra
+    assert found('labtop') == found('laptoop') == found('lapto gamr') == {laptop}
+    assert found('mecanco') == {teclado}
+    # Distancia 2, otra inicial o término corto: sin coincidencias
+    assert found('lbbtop') == found('aptop') == found('lap gamr x') == set()
+
+def test_memory_index_applies_changes_committed_during_build(file_engine):
+    # WAL: la lectura de la construcción no bloquea la escritura concurrente
+    with file_engine.connect() as conn:
+        conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+    Session = sessionmaker(bind=file_engine)
+    writer = Session()
+    viejo = _insert(writer, 'Mouse')
+    writer.commit()
+    index = InMemoryInvertedIndex()
+    reading, proceed = threading.Event(), threading.Event()
+    waited = []
+
+    def pause_build(conn, cursor, statement, *args):
+        if statement.startswith('SELECT id_producto, nombre_producto FROM productos'):
+            reading.set()
+            waited.append(proceed.wait(5))
+
+    event.listen(file_engine, 'after_cursor_execute', pause_build)
+    builder = threading.Thread(target=lambda: index.ensure_ready(Session()))
+    builder.start()
+    try:
+        assert reading.wait(10)
+        # Cambios confirmados después de que la construcción tomó su lectura
+        nuevo = _insert(writer, 'Monitor')
+        index.add(writer, nuevo, 'Monitor')
+        index.remove(writer, viejo)
+        writer.execute(text("DELETE FROM productos WHERE id_producto = :id"), {'id': viejo})
+        writer.commit()
+    finally:
+        proceed.set()
+        builder.join(10)
+        event.remove(file_engine, 'after_cursor_execute', pause_build)
+    # La confirmación del escritor no esperó a que terminara la construcción
+    assert waited == [True]
+    assert [pid for pid, _ in index.search(writer, 'monitor', 10)] == [nuevo]
+    assert index.search(writer, 'mouse', 10) == []
+    writer.close()
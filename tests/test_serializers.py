@@ -0,0 +1,15 @@
+import json
+from decimal import Decimal
+import pytest
+from flask import Flask
+from controllers.serializers import StdJSONProvider, OrjsonProvider
+
+VALUE = {'precio': Decimal('12345678901234.57'), 'iva': Decimal('0.10')}
+EXPECTED = {'precio': '12345678901234.57', 'iva': '0.10'}
+
+def test_std_provider_writes_exact_decimal_text():
+    assert json.loads(StdJSONProvider(Flask(__name__)).dumps(VALUE)) == EXPECTED
+
+def test_orjson_provider_writes_exact_decimal_text():
+    pytest.importorskip('orjson')
+    assert json.loads(OrjsonProvider(Flask(__name__)).dumps(VALUE)) == EXPECTED
@@ -0,0 +1,96 @@
+import threading
+import pytest
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import sessionmaker
+from models.product_model import Categoria, Producto
+from repositories.product_repository import ProductoRepository
+
+"""
+Ajustes de stock: UPDATE condicional sin sobreventa, lotes atómicos y concurrencia real sobre un
+archivo SQLite (cada hilo con su propia conexión).
+"""
+
+STOCK = 10
+
+@pytest.fixture
+def productos(file_engine):
+    with file_engine.begin() as conn:
+        conn.execute(insert(Categoria.__table__), {'id_categoria': 1, 'nombre_categoria': 'Cat'})
+        conn.execute(insert(Producto.__table__), [
+            {'id_producto': i, 'nombre_producto': f'Prod{i}', 'Precio': 10, 'Stock': STOCK, 'id_categoria': 1}
+            for i in (1, 2)
+        ])
+    return file_engine
+
+def _stock(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(select(Producto.id_producto, Producto.Stock)).all())
+
+def test_concurrent_batches_in_opposite_order_do_not_oversell(productos):
+    Session = sessionmaker(bind=productos)
+    aplicados = []
+    barrier = threading.Barrier(8)
+
+    def worker(n):
+        lineas = [(1, 1), (2, 1)] if n % 2 else [(2, 1), (1, 1)]
+        session = Session()
+        barrier.wait()
+        try:
+            for _ in range(3):
+                _, aplicado = ProductoRepository(session).adjust_stock_batch(lineas)
+                aplicados.append(aplicado)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 24 pedidos de una unidad de cada producto sobre 10 unidades: exactamente 10 se aplican
+    assert aplicados.count(True) == STOCK
+    assert _stock(productos) == {1: 0, 2: 0}
+
+def test_failing_line_rolls_back_whole_batch(client, productos):
+    response = client.post('/productos/stock', json={'items': [
+        {'id_producto': 2, 'cantidad': 3}, {'id_producto': 1, 'cantidad': STOCK + 1},
+    ]})
+    assert response.status_code == 409
+    body = response.get_json()
+    assert body['aplicado'] is False
+    # Resultados en el orden de la petición, aunque los UPDATE se ejecuten por id
+    assert [(r['id_producto'], r['error'], r['stock']) for r in body['items']] == [
+        (2, None, None), (1, 'Stock insuficiente', None)]
+    assert _stock(productos) == {1: STOCK, 2: STOCK}
+
+def test_non_atomic_batch_applies_valid_lines(client, productos):
+    response = client.post('/productos/stock', json={'atomic': False, 'items': [
+        {'id_producto': 2, 'cantidad': 3}, {'id_producto': 99, 'cantidad': 1},
+    ]})
+    assert response.status_code == 207
+    assert [r['stock'] for r in response.get_json()['items']] == [STOCK - 3, None]
+    assert _stock(productos) == {1: STOCK, 2: STOCK - 3}
+
+def test_single_adjustment_endpoint(client, productos):
+    assert client.post('/productos/1/stock', json={'cantidad': 4}).get_json() == {'id': 1, 'stock': STOCK - 4}
+    assert client.post('/productos/1/stock', json={'cantidad': STOCK}).status_code == 409
+    assert client.post('/productos/99/stock', json={'cantidad': 1}).status_code == 404
+    assert client.post('/productos/1/stock', json={'cantidad': 0}).status_code == 400
+    assert _stock(productos)[1] == STOCK - 4
+
+def test_batch_locks_rows_in_id_order(productos):
+    # Mismo orden de bloqueo en todos los lotes: sin deadlocks entre lotes concurrentes (InnoDB)
+    updated = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE productos'):
+            updated.append(parameters[1])
+
+    event.listen(productos, 'before_cursor_execute', listener)
+    session = sessionmaker(bind=productos)()
+    try:
+        ProductoRepository(session).adjust_stock_batch([(2, 1), (1, 1), (2, 1)])
+    finally:
+        session.close()
+        event.remove(productos, 'before_cursor_execute', listener)
+    assert updated == [1, 2, 2]
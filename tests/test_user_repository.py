@@ -0,0 +1,21 @@
+import pytest
+from repositories.user_repository import UserRepository, UserConflictError
+
+@pytest.fixture
+def repository(db_session):
+    repository = UserRepository(db_session)
+    repository.create_user('ana', 'hash', 'ana@example.com')
+    repository.create_user('luis', 'hash', 'luis@example.com')
+    return repository
+
+def test_create_duplicate_raises_conflict(repository):
+    with pytest.raises(UserConflictError):
+        repository.create_user('ana', 'hash', 'otra@example.com')
+
+def test_update_duplicate_raises_conflict(repository):
+    with pytest.raises(UserConflictError):
+        repository.update_user(2, email='ana@example.com')
+    assert repository.get_user_by_id(2, read_only=True).email == 'luis@example.com'
+
+def test_update_missing_user_returns_none(repository):
+    assert repository.update_user(99, full_name='Nadie') is None
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import event
+from services.cache import TTLCache, RedisCache
+from services.user_service import UsersService
+from tests.fakes import FakeSharedCache
+
+@pytest.fixture(params=['memory', 'redis'])
+def service(request, db_session):
+    cache = RedisCache(client=FakeSharedCache()) if request.param == 'redis' else TTLCache()
+    service = UsersService(db_session, hasher=None, cache=cache)
+    service.user_repo.create_user('ana', 'hash', 'ana@example.com', 'Ana')
+    return service
+
+def _count_queries(engine):
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+def test_repeated_lookup_skips_database(engine, service):
+    statements = _count_queries(engine)
+    first = service.get_user_by_id(1)
+    second = service.get_user_by_id(1)
+    assert (first.username, second.full_name) == ('ana', 'Ana')
+    assert not hasattr(second, 'password')  # El hash nunca entra en la caché
+    assert len(statements) == 1
+
+def test_update_and_delete_evict_cached_user(service):
+    service.get_user_by_id(1)
+    service.update_user(1, full_name='Ana María')
+    assert service.get_user_by_id(1).full_name == 'Ana María'
+    service.delete_user(1)
+    assert service.get_user_by_id(1) is None
+
+def test_missing_user_is_not_cached(service):
+    assert service.get_user_by_id(2) is None
+    service.user_repo.create_user('luis', 'hash', 'luis@example.com')
+    assert service.get_user_by_id(2).username == 'luis'
@@ -0,0 +1,38 @@
+from sqlalchemy import text
+from repositories.product_repository import CategoriaRepository, ProductoRepository
+from repositories.versioning import DatabaseVersionStore, install_version_tracking
+
+def _version(db_session, resource):
+    return DatabaseVersionStore().get_many([resource], db_session)[0][0]
+
+def test_every_committed_write_bumps_version_once(db_session):
+    assert _version(db_session, 'categorias') == 0
+    CategoriaRepository(db_session).create_categoria('Bebidas')
+    assert _version(db_session, 'categorias') == 1
+    # Un lote es una sola transacción: la versión sube una vez, no una por fila
+    ProductoRepository(db_session).bulk_create_productos([
+        {'nombre_producto': f'Prod{n}', 'Precio': 10, 'Stock': 1, 'id_categoria': 1} for n in range(500)
+    ])
+    assert _version(db_session, 'productos') == 1
+    assert _version(db_session, 'categorias') == 1
+
+def test_failed_write_keeps_version(db_session):
+    repository = ProductoRepository(db_session)
+    assert repository.adjust_stock(999, 1) == (None, 'no_encontrado')
+    assert _version(db_session, 'productos') == 0
+
+def test_no_per_row_triggers(engine, db_session):
+    db_session.execute(text("CREATE TRIGGER trg_productos_version_insert AFTER INSERT ON productos "
+                            "BEGIN UPDATE resource_versions SET version = version + 1; END"))
+    db_session.commit()
+    install_version_tracking(engine)  # migrate elimina los triggers de versiones anteriores
+    triggers = db_session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+    assert triggers == []
+
+def test_validators_are_the_same_for_every_process(engine, db_session):
+    install_version_tracking(engine)  # Idempotente: repetir migrate no reinicia los contadores
+    CategoriaRepository(db_session).create_categoria('Bebidas')
+    first, second = DatabaseVersionStore(), DatabaseVersionStore()
+    assert first.boot_id == second.boot_id
+    assert first.get_many(['categorias'], db_session) == second.get_many(['categorias'], db_session)
+    assert first.get_many(['categorias'], db_session)[0][0] == 1
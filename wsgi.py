@@ -0,0 +1,81 @@
+from main import app  # Primero: main mide el tiempo de importación de la aplicación completa
+
+import gc
+import os
+import time
+import logging
+from config.database import Session, get_engine, dispose_engines
+from config.logging_config import restart_after_fork
+from controllers import product_controllers, user_controllers
+from repositories.search_index import InMemoryInvertedIndex, get_search_index
+from services.cache import TTLCache, get_cache
+from services.hashing import get_password_hasher
+logger = logging.getLogger(__name__)
+
+"""
+Punto de entrada WSGI de producción para servidores prefork:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Con preload_app (ver gunicorn.conf.py) el proceso maestro importa este módulo una sola vez y
+ejecuta warmup() antes de crear los workers: engines elegidos, cachés de tablas de referencia,
+serializadores compilados e índice de búsqueda quedan en memoria compartida (copy-on-write)
+por todos los workers. Cada worker ejecuta after_fork() al nacer (hook post_fork).
+
+Cada worker conserva su propio pool de hashing y sus acumulados de métricas, que /metrics suma a
+través de METRICS_MULTIPROC_DIR; lo que debe ser común a todos (versiones de los recursos, índice de
+búsqueda, caché) vive en la base de datos o en Redis. check_shared_state() impide arrancar varios
+workers con un índice de búsqueda o una caché en memoria.
+"""
+
+# Número de workers del servidor (lo exporta gunicorn.conf.py)
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', '1'))
+
+def check_shared_state(engine, workers: int = WEB_WORKERS):
+    """
+    Lanza RuntimeError si hay varios workers y el índice de búsqueda resuelto es el de memoria (cada
+    worker tendría su propio índice y no vería los productos creados por los demás) o la caché es la
+    de memoria (un usuario actualizado o eliminado seguiría en la caché de los otros workers).
+    """
+    if workers <= 1:
+        return
+    if isinstance(get_search_index(engine), InMemoryInvertedIndex):
+        raise RuntimeError(f"El índice de búsqueda en memoria no se comparte entre {workers} workers: "
+                           "usar SQLite con FTS5 o MySQL (SEARCH_BACKEND=auto|sqlite|mysql)")
+    if isinstance(get_cache(), TTLCache):
+        raise RuntimeError(f"La caché en memoria no se comparte entre {workers} workers: "
+                           "usar CACHE_BACKEND=redis|none")
+
+def warmup(app):
+    """
+    Precarga en el proceso actual lo que cada worker usaría en sus primeras peticiones y deja el
+    proceso listo para hacer fork: sin conexiones abiertas y con los objetos fuera del GC.
+    """
+    start = time.perf_counter()
+    engine = get_engine()  # La prueba de conexión a MySQL se resuelve una vez, en el maestro
+    check_shared_state(engine)
+    with app.app_context():
+        try:
+            product_controllers.warmup()
+            user_controllers.warmup()
+        except Exception as e:
+            # Sin esquema (migrate pendiente) o sin base de datos los workers arrancan igual, en frío
+            logger.warning("Precarga incompleta: %s", e)
+        finally:
+            Session.remove()
+    # Los workers no deben heredar conexiones abiertas del maestro
+    dispose_engines()
+    # Objetos precargados fuera del GC: sus recolecciones en los workers no tocan (ni copian) esas páginas
+    gc.collect()
+    gc.freeze()
+    logger.info("Precarga lista en %.1f ms (%s)", (time.perf_counter() - start) * 1000, engine.url)
+
+def after_fork():
+    """
+    Prepara un worker recién creado: pool de hashing, hilo de logging propio y pools de conexiones nuevos.
+    El pool de hashing se crea primero, mientras el worker tiene un solo hilo (ver services/hashing.py).
+    """
+    get_password_hasher().start()
+    restart_after_fork()
+    dispose_engines(close=False)
+
+warmup(app)